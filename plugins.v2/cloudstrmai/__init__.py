@@ -1,13 +1,16 @@
 import json
 import os
 import shutil
+import threading
+import time
 import urllib.parse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Any, List, Dict, Tuple, Optional
+from typing import Any, List, Dict, Set, Tuple, Optional, Iterator, Iterable, Callable
 
 import pytz
-import requests
 import re
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
@@ -18,15 +21,51 @@ from app.log import logger
 from app.plugins import _PluginBase
 from app.schemas.types import EventType
 
+from .backend import BackendsUnavailable, ChatBackend
+from .cache import FolderInfoCache
+from .catalog import FileCatalog
+from .coordinator import RunCancelled, RunCoordinator
+from .listing import AlistLister, CloudLister, CloudListError, WebDavLister
+from .metrics import MetricsRecorder, RunMetrics
+from .output import OutputWriter
+from .parser import LocalMediaParser, extract_episode, is_season_folder
+from .plan import PlanWriter, SAME, read_plan
+from .watcher import FolderWatcher
+
 
 class CloudStrmAINamer:
-    """AI智能命名助手 - 使用DeepSeek API"""
-    
-    def __init__(self, api_key: str):
-        self.api_key = api_key
-        self.api_url = "https://api.deepseek.com/v1/chat/completions"
-        # 文件夹命名缓存，避免重复调用API
-        self._folder_cache: Dict[str, Dict] = {}
+    """AI智能命名助手
+
+    依次尝试：本地规则解析 -> 缓存 -> 命名后端（按配置顺序，如本地模型服务 -> DeepSeek），
+    前一个后端失败、熔断或回复无法解析时使用下一个。
+    """
+
+    def __init__(self, backends: List[ChatBackend], folder_cache: Optional[FolderInfoCache] = None,
+                 batch_size: int = 1, local_parser: Optional[LocalMediaParser] = None,
+                 local_threshold: float = 0.8):
+        # 命名后端，按顺序回退
+        self._backends = list(backends)
+        for backend in self._backends:
+            backend.on_request = self._record_request
+            backend.on_usage = self._record_usage
+        # 文件夹命名缓存，避免重复调用API（未提供持久化缓存时仅保存在内存中）
+        self._folder_cache = folder_cache or FolderInfoCache(":memory:")
+        # 并发数：各后端另有各自的并发限制
+        self._concurrency = max([backend.concurrency for backend in self._backends] or [1])
+        # 批量命名：单次请求包含的文件夹数量，1为逐个请求
+        self._batch_size = max(int(batch_size or 1), 1)
+        # 本地规则解析，置信度达到阈值时不调用AI
+        self._local_parser = local_parser
+        self._local_threshold = local_threshold
+        # 累计计数，运行统计按运行前后的差值计算
+        self._counter = {"local": 0, "ai": 0, "api_calls": 0, "api_failures": 0, "resolve": 0.0,
+                         "prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0}
+        self._counter_lock = threading.Lock()
+        # 最近的API请求耗时（秒）
+        self._latencies = deque(maxlen=10000)
+        # 因后端均已熔断而未发出请求的文件夹（缓存键），重试时不计入失败次数
+        self._unavailable: Set[Tuple[str, str]] = set()
+        self._unavailable_lock = threading.Lock()
     
     @staticmethod
     def _is_season_folder(folder_name: str) -> bool:
@@ -38,16 +77,7 @@ class CloudStrmAINamer:
         Returns:
             bool: 是否为季度文件夹
         """
-        season_patterns = [
-            r'[Ss](eason)?\s*0?\d+',  # S01, S1, Season 1, season 01
-            r'第\s*[\d一二三四五六七八九十]+\s*季',  # 第一季, 第1季
-            r'Season\s*\d+',  # Season 1, Season 01
-        ]
-        
-        for pattern in season_patterns:
-            if re.search(pattern, folder_name, re.IGNORECASE):
-                return True
-        return False
+        return is_season_folder(folder_name)
         
     def get_folder_info(self, folder_name: str, sample_filename: str) -> Optional[Dict]:
         """获取文件夹的基础信息（只调用一次API）
@@ -55,24 +85,63 @@ class CloudStrmAINamer:
         Returns:
             Dict: 包含剧集基础信息的字典
         """
+        local = self._local_folder_info(folder_name, sample_filename)
+        if local:
+            return local
         # 检查缓存
-        if folder_name in self._folder_cache:
+        cached = self._folder_cache.get(folder_name, sample_filename)
+        if cached:
             logger.info(f"📦 [CloudStrmAI] 使用缓存: {folder_name}")
-            return self._folder_cache[folder_name]
-        
+            return cached
+        return self._request_folder_info(folder_name, sample_filename)
+
+    def _local_folder_info(self, folder_name: str, sample_filename: str) -> Optional[Dict]:
+        """本地规则解析，置信度不足时返回None"""
+        if not self._local_parser:
+            return None
+        try:
+            info, confidence = self._local_parser.parse(folder_name, sample_filename)
+        except Exception as e:
+            logger.error(f"[CloudStrmAI] 本地解析失败: {str(e)}")
+            return None
+        if not info or confidence < self._local_threshold:
+            return None
+        self._count("local")
+        logger.info(f"⚡ [CloudStrmAI] 本地解析({confidence}): {folder_name}")
+        return info
+
+    def _count(self, name: str, value: float = 1):
+        with self._counter_lock:
+            self._counter[name] += value
+
+    def stats(self) -> Dict[str, float]:
+        """累计计数：本地解析/AI请求文件夹数、API请求/失败次数、获取文件夹信息耗时、token用量"""
+        with self._counter_lock:
+            return dict(self._counter)
+
+    def latencies(self, count: int) -> List[float]:
+        """最近count次API请求耗时"""
+        with self._counter_lock:
+            return list(self._latencies)[-count:] if count > 0 else []
+
+    def _request_folder_info(self, folder_name: str, sample_filename: str) -> Optional[Dict]:
+        """调用API获取单个文件夹信息并写入缓存"""
         try:
+            self._count("ai")
             prompt = self._build_prompt(folder_name, sample_filename)
-            response = self._call_deepseek_api(prompt)
-            
-            if not response:
-                logger.warning(f"[CloudStrmAI] API无响应: {folder_name}")
+            try:
+                data = self._call_api(prompt, self._max_tokens, self._parse_folder_info)
+            except BackendsUnavailable:
+                self._mark_unavailable([(folder_name, sample_filename)], True)
                 return None
+            self._mark_unavailable([(folder_name, sample_filename)], False)
             
-            response = re.sub(r'^```json\s*|\s*```$', '', response.strip(), flags=re.MULTILINE)
-            data = json.loads(response)
+            if not data:
+                logger.warning(f"[CloudStrmAI] API无有效响应: {folder_name}")
+                return None
             
             # 缓存结果
-            self._folder_cache[folder_name] = data
+            self._folder_cache.set(folder_name, sample_filename, data)
             logger.info(f"💾 [CloudStrmAI] 已缓存: {folder_name}")
             
             return data
@@ -80,24 +149,180 @@ class CloudStrmAINamer:
         except Exception as e:
             logger.error(f"[CloudStrmAI] 获取文件夹信息失败: {str(e)}")
             return None
+
+    def get_folders_info_batch(self, folders: List[Tuple[str, str]]) -> List[Optional[Dict]]:
+        """批量获取多个文件夹信息（单次API请求）
+
+        批量结果无法解析或缺失的文件夹，退回逐个请求。
+
+        Args:
+            folders: [(文件夹名, 样本文件名)]
+
+        Returns:
+            List[Dict]: 与输入顺序一致的文件夹信息
+        """
+        results: List[Optional[Dict]] = [None] * len(folders)
+        pending = []
+        for index, (folder_name, sample_filename) in enumerate(folders):
+            local = self._local_folder_info(folder_name, sample_filename)
+            if local:
+                results[index] = local
+                continue
+            cached = self._folder_cache.get(folder_name, sample_filename)
+            if cached:
+                logger.info(f"📦 [CloudStrmAI] 使用缓存: {folder_name}")
+                results[index] = cached
+            else:
+                pending.append(index)
+
+        if len(pending) > 1:
+            batch = [folders[index] for index in pending]
+            self._count("ai", len(batch))
+            try:
+                parsed = self._call_api(self._build_batch_prompt(batch),
+                                        min(self._max_tokens_per_folder * len(batch) + 32, 8000),
+                                        lambda response: self._parse_batch_response(response, len(batch)) or None) or {}
+            except BackendsUnavailable:
+                # 逐个请求同样不会发出
+                self._mark_unavailable(batch, True)
+                return results
+            if parsed:
+                logger.info(f"📦 [CloudStrmAI] 批量命名: {len(parsed)}/{len(batch)}个文件夹")
+            else:
+                logger.warning(f"[CloudStrmAI] 批量命名失败，逐个请求: {len(batch)}个文件夹")
+            for position, index in enumerate(pending):
+                data = parsed.get(position)
+                if data:
+                    folder_name, sample_filename = folders[index]
+                    self._folder_cache.set(folder_name, sample_filename, data)
+                    results[index] = data
+            pending = [index for index in pending if not results[index]]
+
+        # 未命中批量结果的文件夹逐个请求
+        for index in pending:
+            results[index] = self._request_folder_info(*folders[index])
+        return results
+
+    def was_unavailable(self, folder_name: str, sample_filename: str) -> bool:
+        """该文件夹最近一次获取信息时后端是否均已熔断（未发出请求）"""
+        with self._unavailable_lock:
+            return self._folder_key(folder_name, sample_filename) in self._unavailable
+
+    def _mark_unavailable(self, folders: List[Tuple[str, str]], unavailable: bool):
+        with self._unavailable_lock:
+            for folder_name, sample_filename in folders:
+                key = self._folder_key(folder_name, sample_filename)
+                if unavailable:
+                    self._unavailable.add(key)
+                else:
+                    self._unavailable.discard(key)
+
+    @staticmethod
+    def _folder_key(folder_name: str, sample_filename: str) -> Tuple[str, str]:
+        """文件夹的键，与缓存一致：(规范化名称, 样本键)"""
+        return FolderInfoCache.normalize(folder_name), FolderInfoCache.sample_key(sample_filename)
+
+    def get_cached_folder_info(self, folder_name: str, sample_filename: str) -> Optional[Dict]:
+        """只从缓存读取文件夹信息，不调用API"""
+        return self._folder_cache.get(folder_name, sample_filename)
+
+    def get_offline_folder_infos(self, folder_name: str, sample_filename: str) -> List[Dict]:
+        """不调用API可得到的候选文件夹信息：本地规则解析（不限置信度）和缓存"""
+        infos = []
+        if self._local_parser:
+            try:
+                info, _ = self._local_parser.parse(folder_name, sample_filename)
+                if info:
+                    infos.append(info)
+            except Exception as e:
+                logger.error(f"[CloudStrmAI] 本地解析失败: {str(e)}")
+        cached = self._folder_cache.get(folder_name, sample_filename)
+        if cached:
+            infos.append(cached)
+        return infos
+
+    def _resolve_chunk(self, folders: List[Tuple[str, str]]) -> List[Optional[Dict]]:
+        start = time.perf_counter()
+        try:
+            if len(folders) == 1:
+                return [self.get_folder_info(*folders[0])]
+            return self.get_folders_info_batch(folders)
+        finally:
+            self._count("resolve", time.perf_counter() - start)
     
+    def resolve_folders(self, folders: Iterable[Tuple[str, str, str]]) -> Iterator[Tuple[str, Optional[Dict]]]:
+        """并发获取多个文件夹信息，按完成先后返回
+
+        按需从folders中读取，同时进行的请求不超过并发数的2倍，输入可以是边遍历边产生的生成器；
+        名称和样本文件名都相同的文件夹在请求完成前只请求一次（与缓存的键一致）。
+
+        Args:
+            folders: [(标识, 文件夹名, 样本文件名)]
+
+        Yields:
+            Tuple[str, Dict]: (标识, 文件夹信息)
+        """
+        max_pending = self._concurrency * 2
+        source = iter(folders)
+        exhausted = False
+        # 请求中的文件夹：(规范化名称, 样本键) -> [(标识, 文件夹名, 样本文件名)]
+        in_flight: Dict[Tuple[str, str], List[Tuple[str, str, str]]] = {}
+        chunk: List[Tuple[str, str]] = []
+        futures = {}
+
+        with ThreadPoolExecutor(max_workers=self._concurrency, thread_name_prefix="CloudStrmAI-AI") as executor:
+            def _submit():
+                futures[executor.submit(self._resolve_chunk,
+                                        [in_flight[key][0][1:] for key in chunk])] = list(chunk)
+                chunk.clear()
+
+            while True:
+                # 补充任务，已有结果时先返回结果
+                while not exhausted and len(futures) < max_pending and not any(f.done() for f in futures):
+                    item = next(source, None)
+                    if item is None:
+                        exhausted = True
+                        break
+                    key = self._folder_key(item[1], item[2])
+                    if key in in_flight:
+                        in_flight[key].append(item)
+                        continue
+                    in_flight[key] = [item]
+                    chunk.append(key)
+                    if len(chunk) >= self._batch_size:
+                        _submit()
+                if chunk and (exhausted or not futures):
+                    _submit()
+                if not futures:
+                    return
+
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    keys = futures.pop(future)
+                    try:
+                        infos = future.result()
+                    except Exception as e:
+                        logger.error(f"[CloudStrmAI] 获取文件夹信息失败: {str(e)}")
+                        infos = [None] * len(keys)
+                    for key, folder_info in zip(keys, infos):
+                        for folder_path, _, _ in in_flight.pop(key):
+                            yield folder_path, folder_info
+
     def get_ai_filename(self, folder_name: str, original_filename: str, folder_info: Dict = None) -> Optional[Tuple[str, str]]:
         """使用AI生成标准化的文件名和文件夹名
         
         Args:
             folder_name: 原文件夹名
             original_filename: 原文件名
-            folder_info: 文件夹基础信息（由get_folder_info获取）
+            folder_info: 文件夹基础信息（由get_folder_info/resolve_folders获取）
         
         Returns:
             Tuple[str, str]: (新文件名, 新文件夹名) 或 None
         """
         try:
             if not folder_info:
-                # 如果没有提供folder_info，则调用API获取
-                folder_info = self.get_folder_info(folder_name, original_filename)
-                if not folder_info:
-                    return None
+                # 没有文件夹信息时不逐个文件调用API，由调用方按原名生成并加入重试队列
+                return None
             
             result = self._parse_ai_response_with_episode(folder_info, original_filename)
             if result:
@@ -110,16 +335,11 @@ class CloudStrmAINamer:
             logger.error(f"[CloudStrmAI] AI命名异常: {str(e)}")
             return None
     
-    def _build_prompt(self, folder_name: str, original_filename: str) -> str:
-        return f"""你是媒体文件命名专家。根据文件夹名和文件名，生成MoviePilot标准文件名和文件夹名。
-
-文件夹: {folder_name}
-文件名: {original_filename}
-
-规则:
+    # 命名规则（单个和批量提示词共用）
+    _NAMING_RULES = """规则:
 1. 识别类型(电影/剧集)
 2. 提取中英文标题、年份
-3. 剧集提取S##E##
+3. 剧集只识别为tv，季集由程序从文件名提取
 4. 保留质量(4K/2160p/1080p/H265)
 5. 保留音频(DDP5.1/Atmos/AAC)
 6. 对于包含特殊字符或难以解析的中文标题：
@@ -132,53 +352,165 @@ class CloudStrmAINamer:
 8. 文件夹命名规则：
    - 电影: "中文标题 英文标题 (年份)"
    - 剧集: "中文标题 英文标题 (年份)"
-   - 必须包含年份，格式为 (YYYY)
+   - 必须包含年份，格式为 (YYYY)"""
 
-输出JSON(纯JSON,不要markdown):
-{{
-  "type": "movie或tv",
+    # 输出字段（文件夹级信息，季集由文件名本地提取）
+    _OUTPUT_FIELDS = """  "type": "movie或tv",
   "chinese_title": "中文标题",
   "english_title": "英文标题",
   "year": "年份",
-  "season": "S##(仅剧集)",
-  "episode": "E##(仅剧集)",
   "quality": "质量",
   "audio": "音频",
   "other": "其他",
-  "folder_name": "标准化的文件夹名称"
+  "folder_name": "标准化的文件夹名称\""""
+
+    # 固定的系统提示词（单个和批量请求共用），每次请求前缀相同，可命中服务端的前缀缓存
+    _SYSTEM_PROMPT = f"""你是媒体文件命名专家。根据文件夹名和文件名，生成MoviePilot标准文件名和文件夹名。
+
+{_NAMING_RULES}
+
+输出JSON对象:
+{{
+{_OUTPUT_FIELDS}
 }}
+输入多组（带序号）时输出 {{"results": [...]}}，每组一个上述对象，按序号顺序排列，并增加"index"字段为序号。
 
 示例:
-输入: 文件夹="飞驰人生2 (2024) 4K", 文件="Pegasus.2.2024.2160p.WEB-DL.H265.DDP5.1.mkv"
-输出: {{"type":"movie","chinese_title":"飞驰人生2","english_title":"Pegasus 2","year":"2024","quality":"4K 2160p H265","audio":"DDP5.1","other":"WEB-DL","folder_name":"飞驰人生2 Pegasus 2 (2024)"}}
+输入:
+文件夹: 飞驰人生2 (2024) 4K
+文件名: Pegasus.2.2024.2160p.WEB-DL.H265.DDP5.1.mkv
+输出: {{"type":"movie","chinese_title":"飞驰人生2","english_title":"Pegasus 2","year":"2024","quality":"4K 2160p H265","audio":"DDP5.1","other":"WEB-DL","folder_name":"飞驰人生2 Pegasus 2 (2024)"}}"""
+
+    # 输出上限：单个对象约100 tokens，批量按文件夹数计算
+    _max_tokens = 256
+    _max_tokens_per_folder = 160
+
+    @staticmethod
+    def _build_prompt(folder_name: str, original_filename: str) -> str:
+        """单个文件夹的用户消息（规则在系统提示词中）"""
+        return f"文件夹: {folder_name}\n文件名: {original_filename}"
 
-现在分析:"""
+    @staticmethod
+    def _build_batch_prompt(folders: List[Tuple[str, str]]) -> str:
+        items = "\n".join(
+            f"{index}. 文件夹: {folder_name} | 文件名: {filename}"
+            for index, (folder_name, filename) in enumerate(folders, start=1)
+        )
+        return f"共{len(folders)}组:\n{items}"
+
+    @staticmethod
+    def _parse_json(response: str) -> Any:
+        """解析JSON响应，兼容仍带markdown代码块的回复"""
+        response = response.strip()
+        if response.startswith("```"):
+            response = re.sub(r'^```(?:json)?\s*|\s*```$', '', response)
+        return json.loads(response)
 
-    def _call_deepseek_api(self, prompt: str) -> Optional[str]:
+    @staticmethod
+    def _parse_folder_info(response: str) -> Optional[Dict]:
+        """解析单个文件夹的命名信息，缺少类型时视为无效"""
         try:
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
-            }
-            
-            payload = {
-                "model": "deepseek-chat",
-                "messages": [{"role": "user", "content": prompt}],
-                "temperature": 0.3,
-                "max_tokens": 500
-            }
-            
-            response = requests.post(self.api_url, headers=headers, json=payload, timeout=30)
-            
-            if response.status_code == 200:
-                return response.json().get("choices", [{}])[0].get("message", {}).get("content", "")
-            else:
-                logger.error(f"[CloudStrmAI] DeepSeek API错误 [{response.status_code}]")
-                return None
-                
-        except Exception as e:
-            logger.error(f"[CloudStrmAI] API调用异常: {str(e)}")
+            data = CloudStrmAINamer._parse_json(response)
+        except (ValueError, AttributeError) as e:
+            logger.error(f"[CloudStrmAI] JSON解析失败: {str(e)}")
             return None
+        return data if isinstance(data, dict) and data.get("type") else None
+
+    @staticmethod
+    def _parse_batch_response(response: str, count: int) -> Dict[int, Dict]:
+        """解析批量响应
+
+        Returns:
+            Dict[int, Dict]: 位置(从0开始) -> 文件夹信息，解析失败返回空字典
+        """
+        try:
+            data = CloudStrmAINamer._parse_json(response)
+        except (ValueError, AttributeError) as e:
+            logger.error(f"[CloudStrmAI] 批量JSON解析失败: {str(e)}")
+            return {}
+        if isinstance(data, dict):
+            data = data.get("results")
+        if not isinstance(data, list):
+            return {}
+
+        results = {}
+        for position, item in enumerate(data):
+            if not isinstance(item, dict) or not item.get("type"):
+                continue
+            index = item.pop("index", None)
+            try:
+                position = int(index) - 1 if index is not None else position
+            except (TypeError, ValueError):
+                pass
+            if 0 <= position < count:
+                results[position] = item
+        return results
+
+    def _call_api(self, prompt: str, max_tokens: int, parse: Callable[[str], Any]) -> Any:
+        """按顺序请求命名后端，返回第一个可解析的结果
+
+        固定规则放在系统提示词中，prompt只包含本次的文件夹和文件名。
+        后端请求失败、已熔断或回复无法解析时使用下一个后端。
+
+        Args:
+            parse: 解析回复内容，无效时返回None
+
+        Raises:
+            BackendsUnavailable: 所有后端均已熔断，未发出请求
+        """
+        tried = False
+        for backend in self._backends:
+            if not backend.allow():
+                continue
+            tried = True
+            response = backend.chat(self._SYSTEM_PROMPT, prompt, max_tokens)
+            if response is None:
+                self._count("api_failures")
+                continue
+            result = parse(response)
+            backend.record(success=result is not None)
+            if result is not None:
+                return result
+            self._count("api_failures")
+            logger.warning(f"[CloudStrmAI] {backend.name}回复无法解析")
+        if not tried:
+            raise BackendsUnavailable()
+        return None
+
+    def _record_request(self, latency: float):
+        with self._counter_lock:
+            self._counter["api_calls"] += 1
+            self._latencies.append(latency)
+
+    def _record_usage(self, usage: Optional[Dict], latency: float):
+        """记录单次请求的token用量（提示词中命中缓存的部分单独统计）"""
+        if not isinstance(usage, dict):
+            return
+        prompt_tokens = int(usage.get("prompt_tokens") or 0)
+        completion_tokens = int(usage.get("completion_tokens") or 0)
+        cached_tokens = int(usage.get("prompt_cache_hit_tokens")
+                            or (usage.get("prompt_tokens_details") or {}).get("cached_tokens") or 0)
+        with self._counter_lock:
+            self._counter["prompt_tokens"] += prompt_tokens
+            self._counter["completion_tokens"] += completion_tokens
+            self._counter["cached_tokens"] += cached_tokens
+        logger.debug(f"[CloudStrmAI] API请求 {latency * 1000:.0f}ms 提示{prompt_tokens}(缓存{cached_tokens}) "
+                     f"输出{completion_tokens} tokens")
+
+    def begin_run(self):
+        """开始新一轮运行，重置各后端的熔断状态"""
+        for backend in self._backends:
+            backend.reset()
+        with self._unavailable_lock:
+            self._unavailable.clear()
+
+    def backend_stats(self) -> List[Dict[str, Any]]:
+        """各命名后端的成功率和耗时"""
+        return [backend.stats() for backend in self._backends]
+
+    def close(self):
+        for backend in self._backends:
+            backend.close()
     
     def _extract_episode_number(self, filename: str) -> Optional[Tuple[str, str]]:
         """从文件名中提取季集信息
@@ -186,26 +518,8 @@ class CloudStrmAINamer:
         Returns:
             Tuple[str, str]: (season, episode) 或 None
         """
-        # 匹配各种集数格式
-        patterns = [
-            r'[Ss](\d{1,2})[Ee](\d{1,2})',  # S01E01
-            r'第\s*(\d+)\s*季.*?第\s*(\d+)\s*集',  # 第1季第1集
-            r'[Ee][Pp]?(\d{1,2})',  # EP01, E01
-            r'第\s*(\d+)\s*集',  # 第1集
-            r'^\.?(\d{1,2})\.',  # 开头的数字: 01., .01.
-            r'[^\d](\d{1,2})\.',  # 中间的数字
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, filename)
-            if match:
-                groups = match.groups()
-                if len(groups) == 2:
-                    return (f"S{int(groups[0]):02d}", f"E{int(groups[1]):02d}")
-                elif len(groups) == 1:
-                    return ("S01", f"E{int(groups[0]):02d}")
-        
-        return None
+        episode = extract_episode(filename)
+        return episode[:2] if episode else None
     
     def _parse_ai_response_with_episode(self, folder_info: Dict, original_filename: str) -> Optional[Tuple[str, str]]:
         """基于文件夹信息和文件名生成标准文件名
@@ -397,7 +711,7 @@ class CloudStrmAI(_PluginBase):
     # 插件图标
     plugin_icon = "https://raw.githubusercontent.com/thsrite/MoviePilot-Plugins/main/icons/create.png"
     # 插件版本
-    plugin_version = "1.0.3"
+    plugin_version = "1.0.5"
     # 插件作者
     plugin_author = "dogzong"
     # 作者主页
@@ -417,28 +731,97 @@ class CloudStrmAI(_PluginBase):
     _onlyonce = False
     _copy_files = False
     _rebuild = False
+    _fast_rebuild = False
+    _fast_rebuild_verify = False
     _https = False
     _enable_ai_naming = True
     _deepseek_api_key = None
+    _folder_cache_ttl = 30
+    _folder_cache_size = 10000
+    _ai_concurrency = 4
+    _ai_rate_limit = 0
+    _ai_base_url = "https://api.deepseek.com/v1"
+    _ai_model = "deepseek-chat"
+    _ai_timeout = 30
+    _local_llm_url = None
+    _local_llm_model = None
+    _local_llm_concurrency = 2
+    _local_llm_timeout = 60
+    _ai_batch_size = 1
+    _local_parse = True
+    _local_parse_threshold = 0.8
+    _ai_retry_attempts = 5
+    _incremental_scan = False
+    _full_scan_interval = 24
+    _api_listing = False
+    _cloud_api_auth = None
+    _api_listing_concurrency = 4
+    _watch_mode = False
+    _watch_debounce = 10
+    _watch_poll_interval = 30
+    _reconcile_targets = True
+    _delete_stale = False
+    _delete_threshold = 10
+    _output_workers = 4
+    _mount_concurrency = 1
+    _mount_timeout = 10
+    _plan_mode = False
+    _apply_plan = False
+    # 并行运行时输出进度的间隔秒数
+    _progress_interval = 60
+    # AI命名失败后首次重试的间隔秒数，之后按失败次数翻倍
+    _retry_backoff = 600
+    # 目录状态分批写入索引的数量
+    _dir_state_batch = 1000
+    # 停止插件时等待未结束任务的秒数
+    _stop_timeout = 30
     __cloud_files_json = "cloudstrmai_files.json"
+    __catalog_db = "cloudstrmai_files.db"
+    __folder_cache_db = "cloudstrmai_folder_cache.db"
+    __plan_file = "cloudstrmai_plan.jsonl"
+    __plan_diff = "cloudstrmai_plan.diff"
 
     _dirconf = {}
     _libraryconf = {}
     _cloudtypeconf = {}
     _cloudurlconf = {}
     _cloudpathconf = {}
-    __cloud_files = []
+    _catalog: Optional[FileCatalog] = None
+    # 后台加载索引的线程，加载完成（或失败）后设置事件
+    _catalog_loader: Optional[threading.Thread] = None
+    _catalog_ready: Optional[threading.Event] = None
+    # 插件停止时设置，运行中的任务检查后中止；_run_state.stop为当前线程所属任务启动时的事件
+    _stop_event: Optional[threading.Event] = None
+    _run_state = threading.local()
+    # 挂载无响应、不再等待但仍在运行的任务线程
+    _abandoned_runs: set = set()
+    _folder_cache: Optional[FolderInfoCache] = None
     _ai_namer: Optional[CloudStrmAINamer] = None
     _scheduler: Optional[BackgroundScheduler] = None
+    _watcher: Optional[FolderWatcher] = None
+    _coordinator: Optional[RunCoordinator] = None
+    _metrics: Optional[MetricsRecorder] = None
+    # 源目录 -> 所在挂载点，挂载点 -> 并发限制
+    _dir_mounts: Dict[str, str] = {}
+    _mount_slots: Dict[str, threading.BoundedSemaphore] = {}
 
     def init_plugin(self, config: dict = None):
+        if not self._coordinator:
+            self._coordinator = RunCoordinator()
+        if not self._metrics:
+            self._metrics = MetricsRecorder()
+            self._metrics.load(self.get_data("run_history") or [])
         # 清空配置
         self._dirconf = {}
         self._libraryconf = {}
         self._cloudtypeconf = {}
         self._cloudurlconf = {}
         self._cloudpathconf = {}
-        self.__cloud_files_json = os.path.join(self.get_data_path(), self.__cloud_files_json)
+        self.__cloud_files_json = os.path.join(self.get_data_path(), "cloudstrmai_files.json")
+        self.__catalog_db = os.path.join(self.get_data_path(), "cloudstrmai_files.db")
+        self.__folder_cache_db = os.path.join(self.get_data_path(), "cloudstrmai_folder_cache.db")
+        self.__plan_file = os.path.join(self.get_data_path(), "cloudstrmai_plan.jsonl")
+        self.__plan_diff = os.path.join(self.get_data_path(), "cloudstrmai_plan.diff")
 
         if config:
             self._enabled = config.get("enabled")
@@ -446,25 +829,77 @@ class CloudStrmAI(_PluginBase):
             self._rebuild_cron = config.get("rebuild_cron")
             self._onlyonce = config.get("onlyonce")
             self._rebuild = config.get("rebuild")
+            self._fast_rebuild = config.get("fast_rebuild", False)
+            self._fast_rebuild_verify = config.get("fast_rebuild_verify", False)
             self._https = config.get("https")
             self._copy_files = config.get("copy_files")
             self._monitor_confs = config.get("monitor_confs")
             self._enable_ai_naming = config.get("enable_ai_naming", True)
             self._deepseek_api_key = config.get("deepseek_api_key")
-            
-        # 初始化AI
+            self._folder_cache_ttl = self.__to_number(config.get("folder_cache_ttl"), 30)
+            self._folder_cache_size = int(self.__to_number(config.get("folder_cache_size"), 10000))
+            self._ai_concurrency = int(self.__to_number(config.get("ai_concurrency"), 4))
+            self._ai_rate_limit = self.__to_number(config.get("ai_rate_limit"), 0)
+            self._ai_base_url = config.get("ai_base_url") or "https://api.deepseek.com/v1"
+            self._ai_model = config.get("ai_model") or "deepseek-chat"
+            self._ai_timeout = self.__to_number(config.get("ai_timeout"), 30)
+            self._local_llm_url = config.get("local_llm_url")
+            self._local_llm_model = config.get("local_llm_model")
+            self._local_llm_concurrency = int(self.__to_number(config.get("local_llm_concurrency"), 2))
+            self._local_llm_timeout = self.__to_number(config.get("local_llm_timeout"), 60)
+            self._ai_batch_size = int(self.__to_number(config.get("ai_batch_size"), 1))
+            self._local_parse = config.get("local_parse", True)
+            self._local_parse_threshold = self.__to_number(config.get("local_parse_threshold"), 0.8)
+            self._ai_retry_attempts = int(self.__to_number(config.get("ai_retry_attempts"), 5))
+            self._incremental_scan = config.get("incremental_scan", False)
+            self._full_scan_interval = self.__to_number(config.get("full_scan_interval"), 24)
+            self._api_listing = config.get("api_listing", False)
+            self._cloud_api_auth = config.get("cloud_api_auth")
+            self._api_listing_concurrency = int(self.__to_number(config.get("api_listing_concurrency"), 4))
+            self._watch_mode = config.get("watch_mode", False)
+            self._watch_debounce = self.__to_number(config.get("watch_debounce"), 10)
+            self._watch_poll_interval = self.__to_number(config.get("watch_poll_interval"), 30)
+            self._reconcile_targets = config.get("reconcile_targets", True)
+            self._delete_stale = config.get("delete_stale", False)
+            self._delete_threshold = self.__to_number(config.get("delete_threshold"), 10)
+            self._output_workers = int(self.__to_number(config.get("output_workers"), 4))
+            self._mount_concurrency = max(int(self.__to_number(config.get("mount_concurrency"), 1)), 1)
+            self._mount_timeout = self.__to_number(config.get("mount_timeout"), 10)
+            self._plan_mode = config.get("plan_mode", False)
+            self._apply_plan = config.get("apply_plan", False)
+
+        self.stop_service()
+        self._stop_event = threading.Event()
+
+        # 初始化AI：本地规则 -> 本地模型服务 -> DeepSeek
+        backends = []
+        if self._enable_ai_naming and self._local_llm_url:
+            backends.append(ChatBackend("本地模型", self._local_llm_url, self._local_llm_model or "default",
+                                        concurrency=self._local_llm_concurrency,
+                                        timeout=self._local_llm_timeout, max_retries=1))
         if self._enable_ai_naming and self._deepseek_api_key:
+            backends.append(ChatBackend("DeepSeek", self._ai_base_url, self._ai_model,
+                                        api_key=self._deepseek_api_key, concurrency=self._ai_concurrency,
+                                        timeout=self._ai_timeout, rate_limit=self._ai_rate_limit))
+        if backends:
             try:
-                self._ai_namer = CloudStrmAINamer(self._deepseek_api_key)
-                logger.info("✨ [CloudStrmAI] AI智能命名已启用")
+                self._folder_cache = FolderInfoCache(self.__folder_cache_db,
+                                                     ttl_days=self._folder_cache_ttl,
+                                                     max_size=self._folder_cache_size)
+                self._folder_cache.purge_expired()
+                self._ai_namer = CloudStrmAINamer(backends,
+                                                  folder_cache=self._folder_cache,
+                                                  batch_size=self._ai_batch_size,
+                                                  local_parser=LocalMediaParser() if self._local_parse else None,
+                                                  local_threshold=self._local_parse_threshold)
+                logger.info(f"✨ [CloudStrmAI] AI智能命名已启用: "
+                            f"{' -> '.join(backend.name for backend in backends)}")
             except Exception as e:
                 logger.error(f"[CloudStrmAI] AI初始化失败: {str(e)}")
                 self._ai_namer = None
         else:
             self._ai_namer = None
 
-        self.stop_service()
-
         if self._enabled or self._onlyonce:
             self._scheduler = BackgroundScheduler(timezone=settings.TZ)
 
@@ -494,6 +929,18 @@ class CloudStrmAI(_PluginBase):
                     self._cloudurlconf[source_dir] = cloud_url
                     self._dirconf[source_dir] = target_dir
 
+            # 按挂载点限制并行
+            mounts = self.__read_mounts()
+            self._dir_mounts = {source_dir: self.__mount_point(source_dir, mounts) for source_dir in self._dirconf}
+            self._mount_slots = {mount: threading.BoundedSemaphore(self._mount_concurrency)
+                                 for mount in set(self._dir_mounts.values())}
+
+            # 在后台打开并载入文件索引，不阻塞插件启动；运行开始前等待加载完成
+            self._catalog_ready = threading.Event()
+            self._catalog_loader = threading.Thread(target=self.__load_catalog, name="CloudStrmAI-Catalog",
+                                                    daemon=True)
+            self._catalog_loader.start()
+
             if self._onlyonce:
                 logger.info("[CloudStrmAI] 立即执行一次")
                 self._scheduler.add_job(
@@ -504,6 +951,14 @@ class CloudStrmAI(_PluginBase):
                 )
                 self._onlyonce = False
                 self.__update_config()
+            elif self._apply_plan:
+                logger.info("[CloudStrmAI] 应用试运行计划")
+                self._scheduler.add_job(
+                    func=self.scan,
+                    trigger='date',
+                    run_date=datetime.now(tz=pytz.timezone(settings.TZ)) + timedelta(seconds=3),
+                    name="CloudStrmAI应用计划"
+                )
 
             if self._cron:
                 try:
@@ -529,6 +984,52 @@ class CloudStrmAI(_PluginBase):
                 self._scheduler.print_jobs()
                 self._scheduler.start()
 
+            # 实时监控，定时扫描和无事件时的轮询作为兜底
+            if self._enabled and self._watch_mode:
+                self._watcher = FolderWatcher(self.__process_changes, debounce=self._watch_debounce,
+                                              poll=self.__poll_watched, poll_interval=self._watch_poll_interval * 60)
+                watched = [source_dir for source_dir in self._dirconf.keys() if self._watcher.watch(source_dir)]
+                if watched:
+                    self._watcher.start()
+                    logger.info(f"[CloudStrmAI] 👀 实时监控已启动: {len(watched)}个目录")
+                else:
+                    self._watcher = None
+
+    def __load_catalog(self):
+        """打开文件索引并将目录路径载入内存，旧版json列表和旧格式索引一次性迁移
+
+        索引在插件运行期间常驻，定时运行之间不重新加载，只在数据库被其他连接修改后刷新。
+        """
+        try:
+            start = time.perf_counter()
+            catalog = FileCatalog(self.__catalog_db)
+            if catalog.is_empty():
+                catalog.migrate_from_json(self.__cloud_files_json, list(self._dirconf.keys()))
+            paths = catalog.load()
+            self._catalog = catalog
+            logger.info(f"[CloudStrmAI] 索引已载入: {catalog.count()}条记录，{paths}个路径，"
+                        f"耗时{time.perf_counter() - start:.1f}s")
+        except Exception as e:
+            logger.error(f"[CloudStrmAI] 打开索引失败: {e}")
+            self._catalog = None
+        finally:
+            self._catalog_ready.set()
+
+    def __wait_catalog(self) -> bool:
+        """等待后台加载索引完成，返回索引是否可用，并在数据库被外部修改时刷新缓存"""
+        ready = self._catalog_ready
+        if not ready:
+            return False
+        if not ready.is_set():
+            logger.info("[CloudStrmAI] ⏳ 等待索引载入完成")
+            ready.wait()
+        catalog = self._catalog
+        if not catalog:
+            return False
+        if catalog.refresh():
+            logger.info("[CloudStrmAI] 索引已被外部修改，已重新载入")
+        return True
+
     @eventmanager.register(EventType.PluginAction)
     def scan(self, event: Event = None):
         """扫描生成strm"""
@@ -545,285 +1046,1318 @@ class CloudStrmAI(_PluginBase):
                 return
             logger.info("[CloudStrmAI] 收到扫描命令")
 
-        logger.info("[CloudStrmAI] 🚀 任务开始")
-        
-        __init_flag = False
-        if self._rebuild or not Path(self.__cloud_files_json).exists():
-            logger.info("[CloudStrmAI] 重建索引...")
-            self.__init_cloud_files_json()
-            self._rebuild = False
+        if not self.__wait_catalog():
+            logger.error("[CloudStrmAI] 索引未就绪")
+            return
+
+        if self._apply_plan:
+            self._apply_plan = False
             self.__update_config()
-            __init_flag = True
-        else:
-            try:
-                with open(self.__cloud_files_json, 'r') as file:
-                    content = file.read()
-                    if content:
-                        self.__cloud_files = json.loads(content)
-            except Exception as e:
-                logger.error(f"[CloudStrmAI] 加载缓存失败: {e}")
+            self.__apply_plan()
+            return
+        if self._plan_mode:
+            self.__make_plan()
+            return
 
-        if not self.__cloud_files and not __init_flag:
+        if self._rebuild or self._catalog.is_empty():
+            logger.info("[CloudStrmAI] 重建索引...")
             self.__init_cloud_files_json()
-            __init_flag = True
-
-        if not __init_flag:
-            __save_flag = False
-            for source_dir in self._dirconf.keys():
-                logger.info(f"[CloudStrmAI] 扫描目录: {source_dir}")
-                
-                # 按文件夹分组新文件
-                new_folder_files = {}
-                for root, dirs, files in os.walk(source_dir):
-                    if "extrafanart" in dirs:
-                        dirs.remove("extrafanart")
-
-                    for file in files:
-                        source_file = os.path.join(root, file)
-                        
-                        if any(x in source_file for x in ["/@Recycle", "/#recycle", "/.", "/@eaDir"]):
-                            continue
-
-                        if not self._copy_files and Path(file).suffix.lower() not in settings.RMT_MEDIAEXT:
-                            continue
-
-                        if source_file not in self.__cloud_files:
-                            folder_path = str(Path(source_file).parent)
-                            if folder_path not in new_folder_files:
-                                new_folder_files[folder_path] = []
-                            new_folder_files[folder_path].append(source_file)
-                
-                # 按文件夹批量处理新文件
-                for folder_path, files in new_folder_files.items():
-                    logger.info(f"[CloudStrmAI] 📂 新文件夹: {Path(folder_path).name} ({len(files)}个新文件)")
-                    
-                    # 获取文件夹信息（智能识别嵌套结构）
-                    folder_info = None
-                    if self._ai_namer:
-                        folder_name = Path(folder_path).name
-                        sample_file = Path(files[0]).name
-                        
-                        # 判断是否为季度文件夹（嵌套结构）
-                        if self._ai_namer._is_season_folder(folder_name):
-                            # 使用父文件夹名称获取信息
-                            parent_folder = Path(folder_path).parent.name
-                            logger.info(f"📚 [CloudStrmAI] 检测到季度文件夹，使用父文件夹: {parent_folder}")
-                            folder_info = self._ai_namer.get_folder_info(parent_folder, sample_file)
-                        else:
-                            # 普通文件夹
-                            folder_info = self._ai_namer.get_folder_info(folder_name, sample_file)
-                        
-                        if folder_info:
-                            logger.info(f"✨ [CloudStrmAI] 文件夹信息: {folder_info.get('chinese_title', '')} {folder_info.get('english_title', '')} ({folder_info.get('year', '')})")
-                    
-                    # 处理该文件夹下的所有新文件
-                    for source_file in files:
-                        self.__cloud_files.append(source_file)
-                        self.__strm(source_file, folder_info)
-                        __save_flag = True
+            if self._rebuild:
+                self._rebuild = False
+                self.__update_config()
+            return
 
-            if __save_flag:
-                self.__save_json()
+        logger.info("[CloudStrmAI] 🚀 任务开始")
+        self.__begin_run()
+        self.__run_dirs("scan", self.__scan_dir)
+        self.__finish_run()
 
-        logger.info("[CloudStrmAI] ✅ 任务完成")
+    def __run_dirs(self, job: str, func: Callable[[str, RunMetrics], None], wait: bool = False) -> bool:
+        """并行运行各源目录的任务
 
-    def __init_cloud_files_json(self):
-        """初始化文件列表（按文件夹批量处理）"""
-        self.__cloud_files = []
-        for source_dir in self._dirconf.keys():
-            # 按文件夹分组
-            folder_files = {}
-            for root, dirs, files in os.walk(source_dir):
-                if "extrafanart" in dirs:
-                    dirs.remove("extrafanart")
+        不同挂载的源目录同时运行，同一挂载最多同时运行mount_concurrency个；同一源目录正在运行时合并为一次后续运行。
+        某个源目录长时间没有进展（挂载无响应）时不再等待，不影响其他源目录和后续的定时任务。
 
-                for file in files:
-                    source_file = os.path.join(root, file)
-                    
-                    if any(x in source_file for x in ["/@Recycle", "/#recycle", "/.", "/@eaDir"]):
-                        continue
+        Args:
+            wait: 等待正在运行的源目录结束后再运行、无进展时也继续等待，直到全部完成或插件停止（试运行和应用计划）
 
-                    if not self._copy_files and Path(file).suffix.lower() not in settings.RMT_MEDIAEXT:
-                        continue
+        Returns:
+            bool: 各源目录的任务是否都已结束
+        """
+        stop = self._stop_event or threading.Event()
+        threads: Dict[str, threading.Thread] = {}
+        self._abandoned_runs = {thread for thread in self._abandoned_runs if thread.is_alive()}
+        for source_dir in list(self._dirconf.keys()):
+            slot = self._mount_slots.get(self._dir_mounts.get(source_dir)) or threading.BoundedSemaphore(1)
 
-                    # 按文件夹分组
-                    folder_path = str(Path(source_file).parent)
-                    if folder_path not in folder_files:
-                        folder_files[folder_path] = []
-                    folder_files[folder_path].append(source_file)
-            
-            # 按文件夹批量处理
-            for folder_path, files in folder_files.items():
-                logger.info(f"[CloudStrmAI] 📂 处理文件夹: {Path(folder_path).name} ({len(files)}个文件)")
-                
-                # 获取文件夹信息（智能识别嵌套结构）
-                folder_info = None
-                if self._ai_namer and files:
-                    folder_name = Path(folder_path).name
-                    sample_file = Path(files[0]).name
-                    
-                    # 判断是否为季度文件夹（嵌套结构）
-                    if self._ai_namer._is_season_folder(folder_name):
-                        # 使用父文件夹名称获取信息
-                        parent_folder = Path(folder_path).parent.name
-                        logger.info(f"📚 [CloudStrmAI] 检测到季度文件夹，使用父文件夹: {parent_folder}")
-                        folder_info = self._ai_namer.get_folder_info(parent_folder, sample_file)
+            def _run(d=source_dir, s=slot):
+                with s:
+                    if wait:
+                        self._coordinator.run(d, job, self.__tracked(d, job, func), cancelled=stop.is_set)
                     else:
-                        # 普通文件夹
-                        folder_info = self._ai_namer.get_folder_info(folder_name, sample_file)
-                    
-                    if folder_info:
-                        logger.info(f"✨ [CloudStrmAI] 文件夹信息: {folder_info.get('chinese_title', '')} {folder_info.get('english_title', '')} ({folder_info.get('year', '')})")
-                
-                # 处理该文件夹下的所有文件
-                for source_file in files:
-                    self.__cloud_files.append(source_file)
-                    self.__strm(source_file, folder_info)
+                        self._coordinator.submit(d, job, self.__tracked(d, job, func))
 
-        if self.__cloud_files:
-            self.__save_json()
+            thread = threading.Thread(target=_run, name=f"CloudStrmAI-{job}", daemon=True)
+            thread.start()
+            threads[source_dir] = thread
 
-    def __save_json(self):
-        """保存文件列表"""
-        with open(self.__cloud_files_json, 'w') as file:
-            file.write(json.dumps(self.__cloud_files))
+        last_report = time.monotonic()
+        finished = True
+        warned = set()
+        while threads:
+            for source_dir, thread in list(threads.items()):
+                thread.join(timeout=1)
+                if not thread.is_alive():
+                    threads.pop(source_dir)
+            if not threads:
+                break
+            if wait and stop.is_set():
+                # 插件停止，不再等待；仍在运行的线程由停止服务等待结束
+                self._abandoned_runs.update(threads.values())
+                return False
 
-    def __strm(self, source_file, folder_info: Dict = None):
-        """生成strm文件"""
-        try:
-            for source_dir in self._dirconf.keys():
-                if not str(source_file).startswith(source_dir):
+            report = time.monotonic() - last_report >= self._progress_interval
+            if report:
+                last_report = time.monotonic()
+            for source_dir in list(threads.keys()):
+                metrics = self._metrics.active(source_dir)
+                if not metrics:
                     continue
-                    
-                dest_dir = self._dirconf.get(source_dir)
-                library_dir = self._libraryconf.get(source_dir)
-                cloud_type = self._cloudtypeconf.get(source_dir)
-                cloud_path = self._cloudpathconf.get(source_dir)
-                cloud_url = self._cloudurlconf.get(source_dir)
+                if report:
+                    counters = metrics.counters
+                    logger.info(f"[CloudStrmAI] ⏱ 进度 {source_dir} ({self._dir_mounts.get(source_dir)}): "
+                                f"文件{counters.get('files_seen', 0)} 新增{counters.get('new_files', 0)} "
+                                f"已生成{counters.get('strm', 0) + counters.get('copied', 0)}")
+                idle = metrics.idle_seconds()
+                if self._mount_timeout and idle >= self._mount_timeout * 60:
+                    if wait:
+                        if source_dir not in warned:
+                            warned.add(source_dir)
+                            logger.warning(f"[CloudStrmAI] ⚠️ {source_dir} 已{idle:.0f}秒无进展，挂载可能无响应，"
+                                           f"{job}需全部完成，继续等待")
+                        continue
+                    logger.warning(f"[CloudStrmAI] ⚠️ {source_dir} 已{idle:.0f}秒无进展，挂载可能无响应，本次不再等待")
+                    # 线程仍在运行，停止插件时需通知并等待其结束后才能关闭索引
+                    self._abandoned_runs.add(threads.pop(source_dir))
+                    finished = False
+        return finished
 
-                dest_file = source_file.replace(source_dir, dest_dir)
-                
-                if Path(dest_file).suffix.lower() in settings.RMT_MEDIAEXT:
-                    self.__create_strm_file(
-                        scheme="https" if self._https else "http",
-                        dest_file=dest_file,
-                        dest_dir=dest_dir,
-                        source_file=source_file,
-                        library_dir=library_dir,
-                        cloud_type=cloud_type,
-                        cloud_path=cloud_path,
-                        cloud_url=cloud_url,
-                        ai_namer=self._ai_namer,
-                        folder_info=folder_info
-                    )
-                elif self._copy_files:
-                    if not Path(dest_file).parent.exists():
-                        os.makedirs(Path(dest_file).parent, exist_ok=True)
-                    shutil.copy2(source_file, dest_file)
-                    
-        except Exception as e:
-            logger.error(f"[CloudStrmAI] 处理失败: {e}")
+    def __scan_dir(self, source_dir: str, metrics: RunMetrics):
+        """扫描单个源目录"""
+        if not self._catalog:
+            return
+        logger.info(f"[CloudStrmAI] 扫描目录: {source_dir}")
+        incremental = self.__incremental_enabled(source_dir)
 
-    @staticmethod
-    def __create_strm_file(dest_file: str, dest_dir: str, source_file: str, library_dir: str = None,
-                           cloud_type: str = None, cloud_path: str = None, cloud_url: str = None,
-                           scheme: str = None, ai_namer: Optional[CloudStrmAINamer] = None,
-                           folder_info: Dict = None):
-        """创建strm文件(支持AI命名，包括文件夹重命名)"""
-        try:
-            video_name = Path(dest_file).name
-            dest_path = Path(dest_file).parent
-            
-            # AI智能命名（文件名和文件夹名）
-            if ai_namer:
-                try:
-                    folder_name = Path(source_file).parent.name
-                    original_filename = Path(source_file).name
-                    
-                    # 使用缓存的folder_info
-                    ai_result = ai_namer.get_ai_filename(folder_name, original_filename, folder_info)
-                    
-                    if ai_result:
-                        ai_filename, ai_foldername = ai_result
-                        video_name = ai_filename
-                        
-                        # 使用AI生成的文件夹名重构路径
-                        if ai_foldername:
-                            # 获取dest_path的父目录，然后拼接新的文件夹名
-                            parent_path = dest_path.parent
-                            dest_path = parent_path / ai_foldername
-                        
-                        dest_file = str(dest_path / ai_filename)
-                except Exception as e:
-                    logger.error(f"[CloudStrmAI] AI命名失败: {str(e)}")
-
-            if not dest_path.exists():
-                os.makedirs(str(dest_path), exist_ok=True)
+        # 边遍历边处理新文件，同时收集已删除的源文件
+        dir_states = {}
+        deletions = [] if self._delete_stale else None
+        self.__begin_walk(source_dir)
+        self.__process_folders(source_dir, self.__iter_folders(source_dir, dir_states, metrics, incremental,
+                                                               deletions=deletions),
+                               metrics)
+        self.__check_stop()
+        if deletions and not self.__remove_stale(source_dir, deletions, metrics):
+            # 跳过删除时不保存目录状态，下次扫描完整遍历重新检查
+            self._catalog.commit()
+            return
+        self.__save_dir_states(source_dir, dir_states, full_walk=not incremental)
+        self._catalog.commit()
 
-            strm_path = os.path.join(dest_path, f"{os.path.splitext(video_name)[0]}.strm")
-            
-            if Path(strm_path).exists():
-                return
+        # 重试AI命名失败的文件夹
+        if self._ai_namer:
+            self.__retry_naming(source_dir, metrics)
 
-            # 云盘模式
-            if cloud_type:
-                dest_file = source_file.replace("\\", "/").replace(cloud_path, "")
-                dest_file = urllib.parse.quote(dest_file, safe='')
-                
-                if str(cloud_type) == "cd2":
-                    dest_file = f"{scheme}://{cloud_url}/static/{scheme}/{cloud_url}/False/{dest_file}"
-                elif str(cloud_type) == "alist":
-                    dest_file = f"{scheme}://{cloud_url}/dav/{dest_file}"
-                else:
-                    logger.error(f"[CloudStrmAI] 未知云盘类型: {cloud_type}")
-                    return
-            else:
-                dest_file = dest_file.replace(dest_dir, library_dir)
+        # 检查目标strm是否缺失
+        if self._reconcile_targets:
+            with metrics.phase("reconcile"):
+                self.__reconcile_targets(source_dir)
 
-            with open(strm_path, 'w', encoding='utf-8') as f:
-                f.write(dest_file)
+    def __begin_run(self):
+        """运行开始：重置命名后端的熔断状态"""
+        if self._ai_namer:
+            self._ai_namer.begin_run()
 
-            logger.info(f"[CloudStrmAI] ✅ 创建: {Path(strm_path).name}")
-            
-        except Exception as e:
-            logger.error(f"[CloudStrmAI] 创建失败: {e}")
+    def __finish_run(self):
+        """运行结束：合并WAL日志"""
+        if not self._catalog:
+            return
+        self._catalog.checkpoint()
+        if self._ai_namer:
+            for stats in self._ai_namer.backend_stats():
+                if stats["requests"]:
+                    rate = f"{stats['success_rate'] * 100:.0f}%" if stats["success_rate"] is not None else "-"
+                    p50 = f"{stats['p50'] * 1000:.0f}ms" if stats["p50"] is not None else "-"
+                    logger.info(f"[CloudStrmAI] 🔌 {stats['name']}: 请求{stats['requests']}次 "
+                                f"成功率{rate} p50={p50}")
+        logger.info("[CloudStrmAI] ✅ 任务完成")
 
-    def __update_config(self):
-        """更新配置"""
-        self.update_config({
-            "enabled": self._enabled,
-            "onlyonce": self._onlyonce,
-            "rebuild": self._rebuild,
-            "copy_files": self._copy_files,
-            "https": self._https,
-            "cron": self._cron,
-            "rebuild_cron": self._rebuild_cron,
-            "monitor_confs": self._monitor_confs,
-            "enable_ai_naming": self._enable_ai_naming,
-            "deepseek_api_key": self._deepseek_api_key,
-        })
+    def __tracked(self, source_dir: str, job: str,
+                  func: Callable[[str, RunMetrics], None]) -> Callable[[], None]:
+        """包装单个源目录的任务，记录本次运行的分阶段耗时和计数"""
+        def _run():
+            namer = self._ai_namer
+            self._run_state.stop = self._stop_event
+            metrics = self._metrics.start(job, source_dir)
+            before = self.__metric_totals(namer)
+            try:
+                func(source_dir, metrics)
+            except RunCancelled:
+                raise
+            except Exception:
+                metrics.incr("failures")
+                raise
+            finally:
+                after = self.__metric_totals(namer)
+                api_calls = int(after.get("api_calls", 0) - before.get("api_calls", 0))
+                metrics.finish(before, after, namer.latencies(api_calls) if namer else [])
+                self._metrics.finish(metrics)
+                logger.info(f"[CloudStrmAI] 📊 {metrics.summary()}")
+                self.__save_metrics()
+        return _run
 
-    def get_state(self) -> bool:
-        return self._enabled
+    def __check_stop(self):
+        """插件已停止时中止当前任务，避免在索引关闭后继续写入"""
+        stop = getattr(self._run_state, "stop", None)
+        if stop and stop.is_set():
+            raise RunCancelled()
 
-    @staticmethod
-    def get_command() -> List[Dict[str, Any]]:
-        """远程命令"""
-        return [{
-            "cmd": "/cloudstrmai",
-            "event": EventType.PluginAction,
-            "desc": "云盘StrmAI生成",
-            "category": "",
-            "data": {"action": "cloudstrmai_scan"}
-        }]
+    def __metric_totals(self, namer: Optional[CloudStrmAINamer]) -> Dict[str, float]:
+        """AI、缓存和索引的累计计数"""
+        totals = {}
+        if namer:
+            stats = namer.stats()
+            totals.update({
+                "local": stats["local"],
+                "ai_folders": stats["ai"],
+                "api_calls": stats["api_calls"],
+                "api_failures": stats["api_failures"],
+                "resolve": stats["resolve"],
+                "prompt_tokens": stats["prompt_tokens"],
+                "completion_tokens": stats["completion_tokens"],
+                "cached_tokens": stats["cached_tokens"],
+            })
+        folder_cache = self._folder_cache
+        if folder_cache:
+            stats = folder_cache.stats()
+            totals.update({"cache_hits": stats["hits"], "cache_misses": stats["misses"]})
+        catalog = self._catalog
+        if catalog:
+            totals["commit"] = catalog.commit_seconds
+        return totals
 
-    def get_api(self) -> List[Dict[str, Any]]:
-        pass
+    def __save_metrics(self):
+        """保存最近的运行记录，插件重载后仍可查看"""
+        try:
+            self.save_data("run_history", self._metrics.recent())
+        except Exception as e:
+            logger.error(f"[CloudStrmAI] 保存运行记录失败: {str(e)}")
 
-    def get_form(self) -> Tuple[List[dict], Dict[str, Any]]:
-        """配置表单"""
-        return [
-            {
+    def __process_changes(self, source_dir: str, folders: List[str]):
+        """处理实时监控到的文件夹变化，只遍历发生变化的文件夹"""
+        if not self._enabled or self._plan_mode or not self.__wait_catalog():
+            return
+
+        def _run(_, metrics: RunMetrics):
+            self.__begin_run()
+            self.__process_changed_folders(source_dir, folders, metrics)
+
+        # 源目录正在扫描时稍后重试，不与扫描同时处理
+        if self._coordinator.try_run(source_dir, "watch", self.__tracked(source_dir, "watch", _run)):
+            self.__finish_run()
+            return
+        watcher = self._watcher
+        if watcher:
+            for folder in folders:
+                watcher.touch(source_dir, folder)
+
+    def __poll_watched(self, source_dir: str):
+        """监控的源目录长时间没有事件（挂载可能不支持文件系统通知）时扫描一次"""
+        if not self._enabled or self._plan_mode or not self.__wait_catalog():
+            return
+        logger.info(f"[CloudStrmAI] 👀 {source_dir} {self._watch_poll_interval}分钟内没有变化通知，轮询扫描")
+
+        def _run(_, metrics: RunMetrics):
+            self.__begin_run()
+            self.__scan_dir(source_dir, metrics)
+
+        # 源目录正在运行时本次不再轮询
+        if self._coordinator.try_run(source_dir, "scan", self.__tracked(source_dir, "scan", _run)):
+            self.__finish_run()
+
+    def __process_changed_folders(self, source_dir: str, folders: List[str], metrics: RunMetrics):
+        if not self._catalog:
+            return
+
+        # 父文件夹已在列表中时，子文件夹不再单独处理
+        roots = []
+        for folder in sorted(set(folders)):
+            if not any(folder == root or folder.startswith(root + os.sep) for root in roots):
+                roots.append(folder)
+
+        new_folder_files: Dict[str, List[str]] = {}
+        for folder in roots:
+            if not folder.startswith(source_dir) or self.__is_ignored(folder) or not os.path.isdir(folder):
+                continue
+            for root, dirs, files in os.walk(folder):
+                dirs[:] = [d for d in dirs if d != "extrafanart" and not self.__is_ignored(os.path.join(root, d))]
+                metrics.incr("files_seen", len(files))
+                known = self._catalog.folder_names(root) if files else set()
+                for file in files:
+                    source_file = os.path.join(root, file)
+                    if file in known or not self.__should_process(source_file):
+                        continue
+                    new_folder_files.setdefault(root, []).append(source_file)
+                    metrics.incr("new_files")
+
+        if not new_folder_files:
+            return
+        logger.info(f"[CloudStrmAI] 👀 检测到新文件: {len(new_folder_files)}个文件夹")
+        self.__process_folders(source_dir, ((folder_path, files, None)
+                                            for folder_path, files in new_folder_files.items()), metrics)
+        self._catalog.commit()
+
+    def __reconcile_targets(self, source_dir: str):
+        """按索引检查目标目录，重新生成缺失的strm文件
+
+        每个目标文件夹只列一次目录，缺失的strm直接按索引记录的路径重建，不调用API也不遍历源目录；
+        旧版索引迁移来的记录没有strm路径，查找旧版已生成的strm并补记，不生成新文件。
+        """
+        missing = 0
+        current_dir, existing = None, set()
+        for source_file, strm_path in self._catalog.iter_targets(source_dir):
+            if not strm_path.endswith(".strm"):
+                continue
+            target_dir, name = os.path.split(strm_path)
+            if target_dir != current_dir:
+                current_dir = target_dir
+                try:
+                    with os.scandir(target_dir) as entries:
+                        existing = {entry.name for entry in entries}
+                except OSError:
+                    existing = set()
+            if name in existing:
+                continue
+
+            content = self.__source_strm_content(source_dir, source_file)
+            if not content:
+                continue
+            try:
+                os.makedirs(target_dir, exist_ok=True)
+                with open(strm_path, 'w', encoding='utf-8') as f:
+                    f.write(content)
+                existing.add(name)
+                missing += 1
+            except OSError as e:
+                logger.error(f"[CloudStrmAI] 重建strm失败: {strm_path} {e}")
+
+        # 旧版索引记录：依次按本地解析、缓存的文件夹信息和原名推算旧版生成的strm，已存在时补记，不调用API也不写入
+        untracked = [path for path in self._catalog.untracked_targets(source_dir)
+                     if Path(path).suffix.lower() in settings.RMT_MEDIAEXT]
+        folder_files: Dict[str, List[str]] = {}
+        for path in untracked:
+            folder_files.setdefault(str(Path(path).parent), []).append(path)
+        recorded = 0
+        for folder_path, files in folder_files.items():
+            infos = []
+            if self._ai_namer:
+                infos = self._ai_namer.get_offline_folder_infos(*self.__folder_lookup(folder_path, files))
+            for source_file in files:
+                for folder_info in infos + [None]:
+                    target = self.__plan_target(source_file, folder_info)
+                    if target and target[1] is not None and os.path.exists(target[0]):
+                        self._catalog.set_strm_path(source_file, target[0])
+                        recorded += 1
+                        break
+        self._catalog.commit()
+
+        if missing or untracked:
+            logger.info(f"[CloudStrmAI] 🔧 目标检查: 重建{missing}个缺失strm，"
+                        f"补记{recorded}/{len(untracked)}个旧索引记录")
+
+    def __record_naming(self, source_dir: str, folder_path: str, lookup: Tuple[str, str],
+                        folder_info: Optional[Dict]):
+        """记录文件夹的AI命名结果：失败的加入重试队列（此次先按原名生成），成功的移出队列"""
+        if folder_info:
+            self._catalog.remove_retry(folder_path)
+            return
+        name, sample = lookup
+        if self._ai_namer.was_unavailable(name, sample):
+            # 后端均已熔断，未发出请求，不计入失败次数
+            self._catalog.add_retry(folder_path, source_dir, name, sample, backoff=self._retry_backoff, count=False)
+            return
+        attempts = self._catalog.add_retry(folder_path, source_dir, name, sample, backoff=self._retry_backoff)
+        if attempts >= self._ai_retry_attempts:
+            self._catalog.remove_retry(folder_path)
+            logger.warning(f"[CloudStrmAI] AI命名失败{attempts}次，不再重试: {folder_path}")
+
+    def __retry_naming(self, source_dir: str, metrics: RunMetrics):
+        """重试AI命名失败的文件夹，不遍历源目录
+
+        成功后按AI命名重新生成strm，删除此前按原名生成的strm，并更新索引中的strm路径。
+        """
+        due = self._catalog.due_retries(source_dir)
+        if not due:
+            return
+        logger.info(f"[CloudStrmAI] 🔁 重试AI命名: {len(due)}个文件夹")
+        retries = {record["folder"]: record for record in due}
+        succeeded = 0
+        writer = OutputWriter(workers=self._output_workers, same_source=self.__same_source)
+        try:
+            for folder_path, folder_info in self._ai_namer.resolve_folders(
+                    (record["folder"], record["name"], record["sample"]) for record in due):
+                record = retries[folder_path]
+                self.__record_naming(source_dir, folder_path, (record["name"], record["sample"]), folder_info)
+                if not folder_info:
+                    continue
+                succeeded += 1
+                for source_file, old_path in self._catalog.folder_files(folder_path):
+                    if Path(source_file).suffix.lower() in settings.RMT_MEDIAEXT:
+                        writer.submit_strm(self.__rename_output, source_file, old_path, folder_info, writer, metrics)
+        finally:
+            writer.close()
+        self._catalog.commit()
+        metrics.incr("retried", len(due))
+        logger.info(f"[CloudStrmAI] 🔁 重试完成: 成功{succeeded}个，"
+                    f"队列中还有{self._catalog.retry_count(source_dir)}个文件夹")
+
+    def __rename_output(self, source_file: str, old_path: Optional[str], folder_info: Dict,
+                        writer: OutputWriter, metrics: RunMetrics):
+        """按AI命名重新生成strm，替换按原名生成的strm"""
+        with metrics.phase("write"):
+            strm_path = self.__strm(source_file, folder_info, writer=writer)
+            if not strm_path:
+                metrics.incr("failures")
+                return
+            self._catalog.set_strm_path(source_file, strm_path)
+            if old_path and old_path != strm_path and not self._catalog.is_target(old_path):
+                try:
+                    os.remove(old_path)
+                except OSError:
+                    pass
+                old_dir, target_root = os.path.dirname(old_path), self.__target_root(source_file)
+                if target_root and old_dir != os.path.dirname(strm_path):
+                    self.__prune_empty_dirs(old_dir, target_root)
+        metrics.incr("renamed")
+
+    def __target_root(self, source_file: str) -> Optional[str]:
+        """源文件所属配置的目标目录"""
+        for source_dir, dest_dir in self._dirconf.items():
+            if source_file.startswith(source_dir):
+                return str(Path(dest_dir))
+        return None
+
+    def __remove_stale(self, source_dir: str, deletions: List[Tuple[str, Optional[str]]],
+                       metrics: RunMetrics) -> bool:
+        """删除已不存在的源文件的索引记录和strm，清理随之变空的目标文件夹
+
+        挂载断开时目录可能列出为空，将删除全部记录或删除数量超过安全阈值时跳过本次删除。
+
+        Returns:
+            bool: 是否已删除
+        """
+        total = self._catalog.count(source_dir)
+        stale = len(deletions)
+        if stale >= total:
+            logger.warning(f"[CloudStrmAI] ⚠️ {source_dir} 本次将删除全部{total}条记录，挂载可能异常，已跳过删除")
+            return False
+        # 少量删除不受百分比阈值限制
+        if stale > 10 and self._delete_threshold and stale * 100 > total * self._delete_threshold:
+            logger.warning(f"[CloudStrmAI] ⚠️ {source_dir} 本次将删除{stale}/{total}条记录，"
+                           f"超过安全阈值{self._delete_threshold}%，挂载可能异常，已跳过删除")
+            return False
+
+        with metrics.phase("reconcile"):
+            dest_dir = str(Path(self._dirconf.get(source_dir)))
+            self._catalog.remove([path for path, _ in deletions])
+            removed = 0
+            for _, strm_path in deletions:
+                # 同一strm仍被其他记录使用时保留
+                if not strm_path or not strm_path.startswith(dest_dir + os.sep) or self._catalog.is_target(strm_path):
+                    continue
+                try:
+                    os.remove(strm_path)
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    logger.error(f"[CloudStrmAI] 删除strm失败: {strm_path} {e}")
+                    continue
+                self.__prune_empty_dirs(os.path.dirname(strm_path), dest_dir)
+            self._catalog.commit()
+        metrics.incr("deleted", stale)
+        logger.info(f"[CloudStrmAI] 🗑 源文件已删除: 清理{stale}条记录，删除{removed}个目标文件")
+        return True
+
+    @staticmethod
+    def __prune_empty_dirs(path: str, stop: str):
+        """向上删除空文件夹，不超出目标目录"""
+        while path.startswith(stop + os.sep):
+            try:
+                os.rmdir(path)
+            except OSError:
+                return
+            path = os.path.dirname(path)
+
+    def __source_strm_content(self, source_dir: str, source_file: str) -> Optional[str]:
+        """按源目录配置生成strm内容"""
+        dest_dir = self._dirconf.get(source_dir)
+        return self.__strm_content(
+            source_file=source_file,
+            dest_file=source_file.replace(source_dir, dest_dir),
+            dest_dir=dest_dir,
+            library_dir=self._libraryconf.get(source_dir),
+            cloud_type=self._cloudtypeconf.get(source_dir),
+            cloud_path=self._cloudpathconf.get(source_dir),
+            cloud_url=self._cloudurlconf.get(source_dir),
+            scheme="https" if self._https else "http"
+        )
+
+    def __same_source(self, strm_path: str, content: str, source_file: str) -> bool:
+        """已存在且内容不同的strm是否属于该源文件
+
+        切换https、修改云盘地址或媒体库目录后，同一源文件的strm内容会变化，应覆盖而非另存为 "名称 - 2"
+        """
+        source_dir = next((source_dir for source_dir in self._dirconf if source_file.startswith(source_dir)), None)
+        if source_dir is None:
+            return False
+        cloud_type = self._cloudtypeconf.get(source_dir)
+        cloud_path = self._cloudpathconf.get(source_dir)
+        decoded = self.__strm_source(
+            content=content,
+            source_dir=source_dir,
+            library_dir=self._libraryconf.get(source_dir),
+            cloud_type=cloud_type,
+            cloud_path=cloud_path,
+            cloud_url=self._cloudurlconf.get(source_dir)
+        )
+        if decoded:
+            return decoded == source_file
+        if cloud_type and "://" in content:
+            # 云盘地址已变化，按末尾的编码路径比较
+            return (cloud_path or "") + urllib.parse.unquote(content.rsplit("/", 1)[-1]) == source_file
+        # 媒体库目录已变化，按索引记录判断；无记录时视为旧配置生成的strm（本次运行内的重名已由预留排除）
+        sources = self._catalog.target_sources(strm_path) if self._catalog else []
+        return not sources or source_file in sources
+
+    def __init_cloud_files_json(self):
+        """初始化文件列表（按文件夹批量处理）"""
+        if not self.__wait_catalog():
+            return
+        if self._plan_mode:
+            self.__make_plan()
+            return
+        logger.info("[CloudStrmAI] 🚀 重建索引开始")
+        self.__begin_run()
+        # 清理已不在配置中的源目录的记录
+        self._catalog.retain(list(self._dirconf.keys()))
+        self._catalog.commit()
+        self.__run_dirs("rebuild", self.__rebuild_from_targets if self._fast_rebuild else self.__rebuild_dir)
+        self.__finish_run()
+
+    def __rebuild_dir(self, source_dir: str, metrics: RunMetrics):
+        """重建单个源目录的索引"""
+        if not self._catalog:
+            return
+        self._catalog.clear(source_dir)
+        self._catalog.clear_dirs(source_dir)
+        # 边遍历边处理，不预先收集全部文件
+        dir_states = {}
+        self.__begin_walk(source_dir)
+        self.__process_folders(source_dir, self.__iter_folders(source_dir, dir_states, metrics, skip_known=False),
+                               metrics)
+        self.__check_stop()
+        self.__save_dir_states(source_dir, dir_states, full_walk=True)
+        self._catalog.commit()
+
+    def __rebuild_from_targets(self, source_dir: str, metrics: RunMetrics):
+        """从目标目录的strm文件重建单个源目录的索引，不遍历云盘挂载，也不调用AI
+
+        strm内容按生成规则反推源文件路径；开启校验时逐个检查源文件是否存在，并恢复复制的非媒体文件。
+        未开启校验时复制的文件由下次扫描补记，目标中已有相同副本的不再复制。
+        目标目录中没有可识别的strm时回退到完整重建。
+        """
+        if not self._catalog:
+            return
+        dest_dir = str(Path(self._dirconf.get(source_dir)))
+        self._catalog.clear(source_dir)
+        restored = skipped = 0
+        walker = os.walk(dest_dir)
+        while True:
+            with metrics.phase("walk"):
+                entry = next(walker, None)
+            if entry is None:
+                break
+            root, _, files = entry
+            metrics.incr("files_seen", len(files))
+            for name in files:
+                target = os.path.join(root, name)
+                if name.endswith(".strm"):
+                    try:
+                        with open(target, 'r', encoding='utf-8') as f:
+                            content = f.read().strip()
+                    except (OSError, UnicodeDecodeError):
+                        skipped += 1
+                        continue
+                    source_file = self.__strm_source(
+                        content=content,
+                        source_dir=source_dir,
+                        library_dir=self._libraryconf.get(source_dir),
+                        cloud_type=self._cloudtypeconf.get(source_dir),
+                        cloud_path=self._cloudpathconf.get(source_dir),
+                        cloud_url=self._cloudurlconf.get(source_dir)
+                    )
+                elif self._copy_files and self._fast_rebuild_verify:
+                    # 复制的文件未改名，需校验以排除媒体服务器生成的nfo、图片等
+                    source_file = os.path.join(source_dir, os.path.relpath(target, dest_dir))
+                    if Path(source_file).suffix.lower() in settings.RMT_MEDIAEXT:
+                        continue
+                else:
+                    continue
+                if not source_file or not source_file.startswith(source_dir) or self.__is_ignored(source_file):
+                    skipped += 1
+                    continue
+
+                stat = None
+                if self._fast_rebuild_verify:
+                    with metrics.phase("lookup"):
+                        try:
+                            st = os.stat(source_file)
+                            stat = (st.st_size, st.st_mtime)
+                        except OSError:
+                            stat = None
+                    if not stat:
+                        skipped += 1
+                        continue
+                self.__check_stop()
+                self._catalog.add(source_file, source_dir, size=stat[0] if stat else None,
+                                  mtime=stat[1] if stat else None, strm_path=target)
+                restored += 1
+                metrics.incr("new_files")
+                self._catalog.commit_if_due()
+
+        if not restored:
+            logger.info(f"[CloudStrmAI] 目标目录中没有可恢复的strm，完整重建: {source_dir}")
+            self.__rebuild_dir(source_dir, metrics)
+            return
+        self._catalog.commit()
+        logger.info(f"[CloudStrmAI] ⚡ 快速重建: {source_dir} 从目标目录恢复{restored}条记录，跳过{skipped}个文件")
+
+    def __make_plan(self):
+        """试运行：完整遍历并获取文件夹信息，生成strm计划和与目标目录的差异，不写入目标目录和索引"""
+        logger.info("[CloudStrmAI] 📝 试运行开始，只生成计划不写入")
+        self.__begin_run()
+        plan = PlanWriter(self.__plan_file, self.__plan_diff)
+        try:
+            finished = self.__run_dirs("plan", lambda source_dir, metrics: self.__plan_dir(source_dir, metrics, plan),
+                                       wait=True)
+        except Exception:
+            plan.discard()
+            raise
+        if not finished:
+            plan.discard()
+            logger.warning("[CloudStrmAI] 📝 试运行未完成，已丢弃计划")
+            return
+        plan.close()
+        counts = plan.counts
+        logger.info(f"[CloudStrmAI] 📝 试运行完成: 新增{counts['add']} 变化{counts['change']} "
+                    f"一致{counts['same']} 计划外{counts['orphan']}，计划: {self.__plan_file} 差异: {self.__plan_diff}")
+
+    def __plan_dir(self, source_dir: str, metrics: RunMetrics, plan: PlanWriter):
+        """生成单个源目录的计划"""
+        logger.info(f"[CloudStrmAI] 试运行目录: {source_dir}")
+        self.__process_folders(source_dir, self.__iter_folders(source_dir, {}, metrics, skip_known=False,
+                                                               save_states=False),
+                               metrics, plan=plan)
+        with metrics.phase("reconcile"):
+            plan.orphans(source_dir, self._dirconf.get(source_dir))
+
+    def __apply_plan(self):
+        """应用试运行生成的计划：按计划中的路径和内容写入，不再获取文件夹信息"""
+        if not os.path.exists(self.__plan_file):
+            logger.warning(f"[CloudStrmAI] 没有可应用的计划: {self.__plan_file}")
+            return
+        logger.info(f"[CloudStrmAI] 🚀 应用计划开始: {self.__plan_file}")
+        finished = self.__run_dirs("apply", self.__apply_plan_dir, wait=True)
+        self.__finish_run()
+        if not finished:
+            logger.warning(f"[CloudStrmAI] 应用计划未完成，计划已保留，可再次应用: {self.__plan_file}")
+            return
+        # 已应用的计划不再重复应用
+        os.replace(self.__plan_file, f"{self.__plan_file}.applied")
+
+    def __apply_plan_dir(self, source_dir: str, metrics: RunMetrics):
+        """应用单个源目录的计划，计划中的文件夹信息写入缓存供后续扫描复用"""
+        if not self._catalog:
+            return
+        writer = OutputWriter(workers=self._output_workers, same_source=self.__same_source)
+        try:
+            for record in read_plan(self.__plan_file, source_dir):
+                self.__check_stop()
+                if record.get("type") == "folder":
+                    metrics.incr("folders")
+                    if self._folder_cache and record.get("info") and record.get("name"):
+                        self._folder_cache.set(record["name"], record.get("sample"), record["info"])
+                elif record.get("type") == "file":
+                    metrics.incr("new_files")
+                    submit = writer.submit_strm if record.get("content") is not None else writer.submit_copy
+                    submit(self.__apply_file, source_dir, record, writer, metrics)
+        finally:
+            writer.close()
+        self._catalog.commit()
+
+    def __apply_file(self, source_dir: str, record: Dict, writer: OutputWriter, metrics: RunMetrics):
+        """按计划写入单个文件并写入索引，源文件已删除的跳过"""
+        source_file, target, content = record.get("source"), record.get("target"), record.get("content")
+        with metrics.phase("write"):
+            try:
+                st = os.stat(source_file)
+            except OSError:
+                metrics.incr("skipped")
+                return
+            try:
+                if record.get("diff") != SAME:
+                    writer.ensure_dir(os.path.dirname(target))
+                    if content is None:
+                        shutil.copy2(source_file, target)
+                    else:
+                        with open(target, 'w', encoding='utf-8') as f:
+                            f.write(content)
+            except OSError as e:
+                logger.error(f"[CloudStrmAI] 应用计划失败: {target} {e}")
+                metrics.incr("failures")
+                return
+            self.__record(source_dir, source_file, target, stat=(st.st_size, st.st_mtime))
+        metrics.incr("strm" if content is not None else "copied")
+        self._catalog.commit_if_due()
+
+    @staticmethod
+    def __is_ignored(path: str) -> bool:
+        """回收站、隐藏文件等不处理"""
+        return any(x in path for x in ["/@Recycle", "/#recycle", "/.", "/@eaDir"])
+
+    def __should_process(self, source_file: str) -> bool:
+        """是否需要为该文件生成strm或复制"""
+        if self.__is_ignored(source_file):
+            return False
+        if not self._copy_files and Path(source_file).suffix.lower() not in settings.RMT_MEDIAEXT:
+            return False
+        return True
+
+    def __incremental_enabled(self, source_dir: str) -> bool:
+        """是否使用增量扫描，距上次完整遍历超过间隔时强制完整遍历"""
+        if not self._incremental_scan:
+            return False
+        if self._catalog.get_meta(f"walking:{source_dir}") == "1":
+            # 上次遍历中断，已写入的目录状态可能早于其中文件的处理结果
+            logger.info(f"[CloudStrmAI] 上次扫描未完成，本次完整遍历: {source_dir}")
+            return False
+        last_full_walk = float(self._catalog.get_meta(f"full_walk:{source_dir}", 0))
+        if self._full_scan_interval and time.time() - last_full_walk > self._full_scan_interval * 3600:
+            logger.info(f"[CloudStrmAI] 距上次完整遍历超过{self._full_scan_interval}小时，本次完整遍历: {source_dir}")
+            return False
+        return True
+
+    def __walk_source(self, source_dir: str, dir_states: Dict[str, Tuple[Optional[float], List[str]]],
+                      incremental: bool = False) -> Iterator[Tuple[str, List[str], Optional[Dict], List[str]]]:
+        """遍历源目录，返回需要处理的目录及其文件名
+
+        Alist/CD2目录开启云盘API列目录时直接通过API遍历，失败则回退到本地挂载。
+        增量模式下，修改时间与上次扫描一致的目录不再列出内容，按记录的子目录继续向下检查，
+        只返回有变化的目录。遍历到的目录状态写入dir_states，处理完成后再保存。
+
+        Yields:
+            Tuple: (目录路径, 文件名列表, 文件名 -> (大小, 修改时间)，本地遍历时为None, 子目录名列表（含被过滤的）)
+        """
+        lister = self.__cloud_lister(source_dir)
+        if lister:
+            try:
+                count = 0
+                for root, files, stats, dirs in lister.walk(
+                        source_dir,
+                        dir_filter=lambda path: Path(path).name != "extrafanart" and not self.__is_ignored(path)):
+                    count += 1
+                    yield root, files, stats, dirs
+                logger.info(f"[CloudStrmAI] 云盘API列目录: {count}个目录")
+                return
+            except CloudListError as e:
+                logger.warning(f"[CloudStrmAI] 云盘API列目录失败，回退到本地遍历: {source_dir} {str(e)}")
+            finally:
+                lister.close()
+
+        listed = skipped = 0
+        stack = [source_dir]
+        while stack:
+            path = stack.pop()
+            try:
+                mtime = os.stat(path).st_mtime
+            except OSError as e:
+                logger.warning(f"[CloudStrmAI] 目录不可访问: {path} {e}")
+                continue
+            self.__check_stop()
+
+            if incremental:
+                record = self._catalog.get_dir(path)
+                if record and record["mtime"] == mtime:
+                    skipped += 1
+                    stack.extend(os.path.join(path, name) for name in reversed(record["subdirs"]))
+                    continue
+
+            files, subdirs, dirs = [], [], []
+            try:
+                with os.scandir(path) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            dirs.append(entry.name)
+                            if entry.name != "extrafanart" and not self.__is_ignored(entry.path):
+                                subdirs.append(entry.name)
+                        elif entry.is_symlink() and entry.is_dir():
+                            # 目录的符号链接不向下遍历，指向上级目录时会无限递归
+                            dirs.append(entry.name)
+                        else:
+                            files.append(entry.name)
+            except OSError as e:
+                logger.warning(f"[CloudStrmAI] 目录读取失败: {path} {e}")
+                continue
+            listed += 1
+
+            # 刚修改过的目录不记录修改时间，避免同一时间粒度内的后续变更被跳过
+            if time.time() - mtime < 2:
+                mtime = None
+            dir_states[path] = (mtime, subdirs)
+            stack.extend(os.path.join(path, name) for name in reversed(subdirs))
+            yield path, files, None, dirs
+
+        if incremental:
+            logger.info(f"[CloudStrmAI] 增量扫描: 列出{listed}个目录，跳过{skipped}个未变化目录")
+
+    def __iter_folders(self, source_dir: str, dir_states: Dict[str, Tuple[Optional[float], List[str]]],
+                       metrics: RunMetrics, incremental: bool = False, skip_known: bool = True,
+                       save_states: bool = True, deletions: Optional[List[Tuple[str, Optional[str]]]] = None
+                       ) -> Iterator[Tuple[str, List[str], Optional[Dict[str, Tuple[Optional[int], Optional[float]]]]]]:
+        """流式遍历源目录，每列出一个文件夹即返回其中需要处理的文件
+
+        内存中只保留正在处理的文件夹；目录状态累积到一定数量后先写入索引（与处理结果一同提交）。
+
+        Args:
+            skip_known: 跳过索引中已有的文件
+            save_states: 将目录状态写入索引（试运行时不写入）
+            deletions: 收集列出的文件夹中已不存在的索引记录 (源文件, strm路径)
+
+        Yields:
+            Tuple: (文件夹路径, 源文件列表, 源文件 -> (大小, 修改时间)，本地遍历时为None)
+        """
+        walker = self.__walk_source(source_dir, dir_states, incremental)
+        while True:
+            with metrics.phase("walk"):
+                entry = next(walker, None)
+            self.__check_stop()
+            if entry is None:
+                return
+            root, files, stats, dirs = entry
+            folder_path = str(Path(root))
+            folder_files, folder_stats = [], {}
+            with metrics.phase("lookup"):
+                if deletions is not None:
+                    deletions.extend(self._catalog.stale_entries(folder_path, set(files) | set(dirs)))
+                # 每个文件夹一次取出已记录的文件名，逐个文件在内存中检查
+                known = self._catalog.folder_names(folder_path) if skip_known and files else set()
+                for file in files:
+                    source_file = os.path.join(folder_path, file)
+                    if file in known or not self.__should_process(source_file):
+                        continue
+                    folder_files.append(source_file)
+                    if stats:
+                        folder_stats[source_file] = stats.get(file)
+            metrics.incr("files_seen", len(files))
+            metrics.incr("new_files", len(folder_files))
+            if folder_files:
+                yield folder_path, folder_files, folder_stats or None
+            if len(dir_states) >= self._dir_state_batch:
+                if save_states:
+                    self._catalog.set_dirs(source_dir, dir_states)
+                dir_states.clear()
+
+    def __cloud_lister(self, source_dir: str) -> Optional[CloudLister]:
+        """创建云盘API列目录客户端，未开启或非Alist/CD2目录返回None"""
+        if not self._api_listing:
+            return None
+        cloud_type = self._cloudtypeconf.get(source_dir)
+        cloud_url = self._cloudurlconf.get(source_dir)
+        if not cloud_type or not cloud_url:
+            return None
+        base_url = f"{'https' if self._https else 'http'}://{cloud_url}"
+        cloud_path = self._cloudpathconf.get(source_dir) or ""
+        if str(cloud_type) == "alist":
+            return AlistLister(base_url, cloud_path, token=self._cloud_api_auth,
+                               concurrency=self._api_listing_concurrency)
+        if str(cloud_type) == "cd2":
+            return WebDavLister(base_url, cloud_path, auth=self._cloud_api_auth,
+                                concurrency=self._api_listing_concurrency)
+        return None
+
+    @staticmethod
+    def __read_mounts() -> List[str]:
+        """系统挂载点列表，读取/proc/mounts而不访问挂载本身，避免无响应的挂载阻塞"""
+        try:
+            with open("/proc/mounts", encoding="utf-8") as f:
+                return [line.split()[1].replace("\\040", " ") for line in f if len(line.split()) > 1]
+        except OSError:
+            return []
+
+    @staticmethod
+    def __mount_point(path: str, mounts: List[str]) -> str:
+        """路径所在的挂载点（最长前缀匹配），无法获取时以路径本身为挂载"""
+        matched = [mount for mount in mounts
+                   if path == mount or path.startswith(mount.rstrip("/") + "/")]
+        return max(matched, key=len) if matched else path
+
+    def __begin_walk(self, source_dir: str):
+        """标记遍历开始，遍历完成保存目录状态时清除"""
+        self._catalog.set_meta(f"walking:{source_dir}", 1)
+        self._catalog.commit()
+
+    def __save_dir_states(self, source_dir: str, dir_states: Dict, full_walk: bool = False):
+        """保存本次遍历的目录状态（需调用commit落盘）"""
+        self._catalog.set_dirs(source_dir, dir_states)
+        self._catalog.set_meta(f"walking:{source_dir}", 0)
+        if full_walk:
+            self._catalog.set_meta(f"full_walk:{source_dir}", time.time())
+
+    def __folder_lookup(self, folder_path: str, files: List[str]) -> Tuple[str, str]:
+        """确定用于获取AI信息的文件夹名和样本文件（智能识别嵌套结构）
+
+        Returns:
+            Tuple[str, str]: (文件夹名, 样本文件名)
+        """
+        folder_name = Path(folder_path).name
+        sample_file = Path(files[0]).name
+
+        # 判断是否为季度文件夹（嵌套结构）
+        if self._ai_namer._is_season_folder(folder_name):
+            # 使用父文件夹名称获取信息
+            parent_folder = Path(folder_path).parent.name
+            logger.info(f"📚 [CloudStrmAI] 检测到季度文件夹，使用父文件夹: {parent_folder}")
+            return parent_folder, sample_file
+        return folder_name, sample_file
+
+    def __process_folders(self, source_dir: str,
+                          folders: Iterable[Tuple[str, List[str], Optional[Dict[str, Tuple]]]],
+                          metrics: RunMetrics, plan: Optional[PlanWriter] = None):
+        """按文件夹处理文件：流水线方式，边遍历边获取文件夹信息，每个文件夹拿到结果后立即生成strm
+
+        Args:
+            folders: [(文件夹路径, 源文件列表, 源文件 -> (大小, 修改时间))]，可以是生成器
+            plan: 试运行时写入计划而不生成文件
+        """
+        # 已读取、尚未输出的文件夹
+        pending: Dict[str, Tuple[List[str], Optional[Dict]]] = {}
+        # 文件夹 -> 获取信息使用的(文件夹名, 样本文件名)
+        lookups: Dict[str, Tuple[str, str]] = {}
+
+        def _lookup(folder_path: str, files: List[str]) -> Tuple[str, str, str]:
+            lookups[folder_path] = self.__folder_lookup(folder_path, files)
+            return (folder_path, *lookups[folder_path])
+
+        def _pending_folders() -> Iterator[Tuple[str, List[str]]]:
+            for folder_path, folder_files, folder_stats in folders:
+                if folder_files:
+                    pending[folder_path] = (folder_files, folder_stats)
+                    yield folder_path, folder_files
+
+        if self._ai_namer:
+            resolved = self._ai_namer.resolve_folders(
+                _lookup(folder_path, files) for folder_path, files in _pending_folders()
+            )
+        else:
+            resolved = ((folder_path, None) for folder_path, _ in _pending_folders())
+
+        writer = OutputWriter(workers=self._output_workers, same_source=self.__same_source)
+        try:
+            for folder_path, folder_info in resolved:
+                self.__check_stop()
+                files, file_stats = pending.pop(folder_path)
+                lookup = lookups.pop(folder_path, (None, None))
+                metrics.incr("folders")
+                logger.info(f"[CloudStrmAI] 📂 处理文件夹: {Path(folder_path).name} ({len(files)}个文件)")
+                if folder_info:
+                    logger.info(f"✨ [CloudStrmAI] 文件夹信息: {folder_info.get('chinese_title', '')} {folder_info.get('english_title', '')} ({folder_info.get('year', '')})")
+
+                if self._ai_namer and not plan:
+                    self.__record_naming(source_dir, folder_path, lookup, folder_info)
+
+                if plan:
+                    plan.folder(source_dir, folder_path, *lookup, folder_info)
+                    for source_file in files:
+                        with metrics.phase("write"):
+                            target = self.__plan_target(source_file, folder_info)
+                        if target:
+                            plan.file(source_dir, source_file, *target)
+                            metrics.incr("planned")
+                        else:
+                            metrics.incr("failures")
+                    continue
+
+                # 处理该文件夹下的所有文件：媒体文件写strm，其他文件复制
+                for source_file in files:
+                    submit = writer.submit_strm \
+                        if Path(source_file).suffix.lower() in settings.RMT_MEDIAEXT else writer.submit_copy
+                    submit(self.__output_file, source_dir, source_file, folder_info,
+                           file_stats.get(source_file) if file_stats else None, writer, metrics)
+        finally:
+            writer.close()
+
+    def __output_file(self, source_dir: str, source_file: str, folder_info: Optional[Dict],
+                      stat: Optional[Tuple[Optional[int], Optional[float]]], writer: OutputWriter,
+                      metrics: RunMetrics):
+        """生成单个文件的strm（或复制）并写入索引"""
+        with metrics.phase("write"):
+            strm_path = self.__strm(source_file, folder_info, writer=writer)
+            self.__record(source_dir, source_file, strm_path, stat=stat)
+        if not strm_path:
+            metrics.incr("failures" if Path(source_file).suffix.lower() in settings.RMT_MEDIAEXT else "skipped")
+        else:
+            metrics.incr("strm" if strm_path.endswith(".strm") else "copied")
+        # 逐个文件记录，定期提交，中断时已处理的文件不会丢失
+        self._catalog.commit_if_due()
+
+    def __record(self, source_dir: str, source_file: str, strm_path: Optional[str] = None,
+                 stat: Tuple[Optional[int], Optional[float]] = None):
+        """写入文件索引，未提供大小和修改时间时从挂载读取"""
+        if stat:
+            size, mtime = stat
+        else:
+            try:
+                st = os.stat(source_file)
+                size, mtime = st.st_size, st.st_mtime
+            except OSError:
+                size, mtime = None, None
+        self._catalog.add(source_file, source_dir, size=size, mtime=mtime, strm_path=strm_path)
+
+    def __strm(self, source_file, folder_info: Dict = None, writer: OutputWriter = None) -> Optional[str]:
+        """生成strm文件
+
+        Returns:
+            str: 生成的strm路径（或复制的目标文件路径）
+        """
+        try:
+            for source_dir in self._dirconf.keys():
+                if not str(source_file).startswith(source_dir):
+                    continue
+                    
+                dest_dir = self._dirconf.get(source_dir)
+                library_dir = self._libraryconf.get(source_dir)
+                cloud_type = self._cloudtypeconf.get(source_dir)
+                cloud_path = self._cloudpathconf.get(source_dir)
+                cloud_url = self._cloudurlconf.get(source_dir)
+
+                dest_file = source_file.replace(source_dir, dest_dir)
+                
+                if Path(dest_file).suffix.lower() in settings.RMT_MEDIAEXT:
+                    return self.__create_strm_file(
+                        scheme="https" if self._https else "http",
+                        dest_file=dest_file,
+                        dest_dir=dest_dir,
+                        source_file=source_file,
+                        library_dir=library_dir,
+                        cloud_type=cloud_type,
+                        cloud_path=cloud_path,
+                        cloud_url=cloud_url,
+                        ai_namer=self._ai_namer,
+                        folder_info=folder_info,
+                        makedirs=writer.ensure_dir if writer else None,
+                        reserve=writer.reserve if writer else None
+                    )
+                elif self._copy_files:
+                    if writer:
+                        writer.ensure_dir(Path(dest_file).parent)
+                    elif not Path(dest_file).parent.exists():
+                        os.makedirs(Path(dest_file).parent, exist_ok=True)
+                    if not self.__copied(source_file, dest_file):
+                        shutil.copy2(source_file, dest_file)
+                    return dest_file
+                    
+        except Exception as e:
+            logger.error(f"[CloudStrmAI] 处理失败: {e}")
+        return None
+
+    @staticmethod
+    def __copied(source_file: str, dest_file: str) -> bool:
+        """目标文件是否为源文件的副本（大小和修改时间一致，copy2会保留修改时间）
+
+        快速重建未校验时不恢复复制文件的索引，扫描时据此跳过重复复制
+        """
+        try:
+            source_st, dest_st = os.stat(source_file), os.stat(dest_file)
+        except OSError:
+            return False
+        return source_st.st_size == dest_st.st_size and int(source_st.st_mtime) == int(dest_st.st_mtime)
+
+    def __plan_target(self, source_file: str, folder_info: Dict = None) -> Optional[Tuple[str, Optional[str]]]:
+        """计算文件的目标路径和strm内容（与生成时一致），不写入
+
+        Returns:
+            Tuple: (目标路径, strm内容，复制的文件为None)
+        """
+        for source_dir in self._dirconf.keys():
+            if not str(source_file).startswith(source_dir):
+                continue
+            dest_dir = self._dirconf.get(source_dir)
+            dest_file = source_file.replace(source_dir, dest_dir)
+            if Path(dest_file).suffix.lower() in settings.RMT_MEDIAEXT:
+                return self.__strm_target(
+                    scheme="https" if self._https else "http",
+                    dest_file=dest_file,
+                    dest_dir=dest_dir,
+                    source_file=source_file,
+                    library_dir=self._libraryconf.get(source_dir),
+                    cloud_type=self._cloudtypeconf.get(source_dir),
+                    cloud_path=self._cloudpathconf.get(source_dir),
+                    cloud_url=self._cloudurlconf.get(source_dir),
+                    ai_namer=self._ai_namer,
+                    folder_info=folder_info
+                )
+            if self._copy_files:
+                return dest_file, None
+        return None
+
+    @staticmethod
+    def __create_strm_file(dest_file: str, dest_dir: str, source_file: str, library_dir: str = None,
+                           cloud_type: str = None, cloud_path: str = None, cloud_url: str = None,
+                           scheme: str = None, ai_namer: Optional[CloudStrmAINamer] = None,
+                           folder_info: Dict = None, makedirs: Callable[[str], None] = None,
+                           reserve: Callable[[str, str, str], Tuple[str, bool]] = None) -> Optional[str]:
+        """创建strm文件(支持AI命名，包括文件夹重命名)
+
+        Args:
+            reserve: 预留目标路径，并行写入时避免不同源文件写入同一个strm
+
+        Returns:
+            str: strm文件路径，失败返回None
+        """
+        try:
+            target = CloudStrmAI.__strm_target(
+                dest_file=dest_file, dest_dir=dest_dir, source_file=source_file, library_dir=library_dir,
+                cloud_type=cloud_type, cloud_path=cloud_path, cloud_url=cloud_url, scheme=scheme,
+                ai_namer=ai_namer, folder_info=folder_info
+            )
+            if not target:
+                return None
+            strm_path, content = target
+            dest_path = Path(strm_path).parent
+
+            if makedirs:
+                makedirs(str(dest_path))
+            elif not dest_path.exists():
+                os.makedirs(str(dest_path), exist_ok=True)
+
+            if reserve:
+                strm_path, write = reserve(strm_path, content, source_file)
+                if not write:
+                    return strm_path
+            elif Path(strm_path).exists():
+                return strm_path
+
+            with open(strm_path, 'w', encoding='utf-8') as f:
+                f.write(content)
+
+            logger.info(f"[CloudStrmAI] ✅ 创建: {Path(strm_path).name}")
+            return strm_path
+            
+        except Exception as e:
+            logger.error(f"[CloudStrmAI] 创建失败: {e}")
+            return None
+
+    @staticmethod
+    def __strm_target(dest_file: str, dest_dir: str, source_file: str, library_dir: str = None,
+                      cloud_type: str = None, cloud_path: str = None, cloud_url: str = None,
+                      scheme: str = None, ai_namer: Optional[CloudStrmAINamer] = None,
+                      folder_info: Dict = None) -> Optional[Tuple[str, str]]:
+        """计算strm路径和内容（AI命名后的路径），不写入文件
+
+        Returns:
+            Tuple[str, str]: (strm路径, strm内容)，失败返回None
+        """
+        content = CloudStrmAI.__strm_content(
+            source_file=source_file, dest_file=dest_file, dest_dir=dest_dir, library_dir=library_dir,
+            cloud_type=cloud_type, cloud_path=cloud_path, cloud_url=cloud_url, scheme=scheme
+        )
+        if not content:
+            return None
+
+        video_name = Path(dest_file).name
+        dest_path = Path(dest_file).parent
+
+        # AI智能命名（文件名和文件夹名），没有文件夹信息时按原名生成
+        if ai_namer and folder_info:
+            try:
+                folder_name = Path(source_file).parent.name
+                original_filename = Path(source_file).name
+
+                # 使用缓存的folder_info
+                ai_result = ai_namer.get_ai_filename(folder_name, original_filename, folder_info)
+
+                if ai_result:
+                    ai_filename, ai_foldername = ai_result
+                    video_name = ai_filename
+
+                    # 使用AI生成的文件夹名重构路径
+                    if ai_foldername:
+                        # 获取dest_path的父目录，然后拼接新的文件夹名
+                        parent_path = dest_path.parent
+                        dest_path = parent_path / ai_foldername
+            except Exception as e:
+                logger.error(f"[CloudStrmAI] AI命名失败: {str(e)}")
+
+        return os.path.join(dest_path, f"{os.path.splitext(video_name)[0]}.strm"), content
+
+    @staticmethod
+    def __strm_content(source_file: str, dest_file: str, dest_dir: str, library_dir: str = None,
+                       cloud_type: str = None, cloud_path: str = None, cloud_url: str = None,
+                       scheme: str = None) -> Optional[str]:
+        """生成strm文件内容（播放地址）
+
+        Args:
+            dest_file: 按源目录结构映射到目标目录的原始路径（未经AI重命名）
+        """
+        # 云盘模式
+        if cloud_type:
+            content = source_file.replace("\\", "/").replace(cloud_path, "")
+            content = urllib.parse.quote(content, safe='')
+
+            if str(cloud_type) == "cd2":
+                return f"{scheme}://{cloud_url}/static/{scheme}/{cloud_url}/False/{content}"
+            elif str(cloud_type) == "alist":
+                return f"{scheme}://{cloud_url}/dav/{content}"
+            logger.error(f"[CloudStrmAI] 未知云盘类型: {cloud_type}")
+            return None
+        return dest_file.replace(dest_dir, library_dir)
+
+    @staticmethod
+    def __strm_source(content: str, source_dir: str, library_dir: str = None, cloud_type: str = None,
+                      cloud_path: str = None, cloud_url: str = None) -> Optional[str]:
+        """由strm内容反推源文件路径（__strm_content的逆过程），无法识别时返回None"""
+        if cloud_type:
+            if str(cloud_type) == "cd2":
+                prefixes = [f"{scheme}://{cloud_url}/static/{scheme}/{cloud_url}/False/" for scheme in ("http", "https")]
+            elif str(cloud_type) == "alist":
+                prefixes = [f"{scheme}://{cloud_url}/dav/" for scheme in ("http", "https")]
+            else:
+                return None
+            prefix = next((prefix for prefix in prefixes if content.startswith(prefix)), None)
+            if not prefix:
+                return None
+            return (cloud_path or "") + urllib.parse.unquote(content[len(prefix):])
+        if library_dir is None or not content.startswith(library_dir):
+            return None
+        return source_dir + content[len(library_dir):]
+
+    @staticmethod
+    def __to_number(value: Any, default: float) -> float:
+        """配置项转数字，无效时使用默认值"""
+        try:
+            return float(value) if value not in (None, "") else default
+        except (TypeError, ValueError):
+            return default
+
+    def __update_config(self):
+        """更新配置"""
+        self.update_config({
+            "enabled": self._enabled,
+            "onlyonce": self._onlyonce,
+            "rebuild": self._rebuild,
+            "fast_rebuild": self._fast_rebuild,
+            "fast_rebuild_verify": self._fast_rebuild_verify,
+            "copy_files": self._copy_files,
+            "https": self._https,
+            "cron": self._cron,
+            "rebuild_cron": self._rebuild_cron,
+            "monitor_confs": self._monitor_confs,
+            "enable_ai_naming": self._enable_ai_naming,
+            "deepseek_api_key": self._deepseek_api_key,
+            "folder_cache_ttl": self._folder_cache_ttl,
+            "folder_cache_size": self._folder_cache_size,
+            "ai_concurrency": self._ai_concurrency,
+            "ai_rate_limit": self._ai_rate_limit,
+            "ai_base_url": self._ai_base_url,
+            "ai_model": self._ai_model,
+            "ai_timeout": self._ai_timeout,
+            "local_llm_url": self._local_llm_url,
+            "local_llm_model": self._local_llm_model,
+            "local_llm_concurrency": self._local_llm_concurrency,
+            "local_llm_timeout": self._local_llm_timeout,
+            "ai_batch_size": self._ai_batch_size,
+            "local_parse": self._local_parse,
+            "local_parse_threshold": self._local_parse_threshold,
+            "ai_retry_attempts": self._ai_retry_attempts,
+            "incremental_scan": self._incremental_scan,
+            "full_scan_interval": self._full_scan_interval,
+            "api_listing": self._api_listing,
+            "cloud_api_auth": self._cloud_api_auth,
+            "api_listing_concurrency": self._api_listing_concurrency,
+            "watch_mode": self._watch_mode,
+            "watch_debounce": self._watch_debounce,
+            "watch_poll_interval": self._watch_poll_interval,
+            "reconcile_targets": self._reconcile_targets,
+            "delete_stale": self._delete_stale,
+            "delete_threshold": self._delete_threshold,
+            "output_workers": self._output_workers,
+            "mount_concurrency": self._mount_concurrency,
+            "mount_timeout": self._mount_timeout,
+            "plan_mode": self._plan_mode,
+            "apply_plan": self._apply_plan,
+        })
+
+    def get_state(self) -> bool:
+        return self._enabled
+
+    @staticmethod
+    def get_command() -> List[Dict[str, Any]]:
+        """远程命令"""
+        return [{
+            "cmd": "/cloudstrmai",
+            "event": EventType.PluginAction,
+            "desc": "云盘StrmAI生成",
+            "category": "",
+            "data": {"action": "cloudstrmai_scan"}
+        }]
+
+    def get_api(self) -> List[Dict[str, Any]]:
+        return [{
+            "path": "/run_state",
+            "endpoint": self.run_state,
+            "methods": ["GET"],
+            "auth": "bear",
+            "summary": "运行状态",
+            "description": "各源目录的运行状态：idle空闲、running运行中、queued运行中且已有排队的后续运行"
+        }, {
+            "path": "/metrics",
+            "endpoint": self.run_metrics,
+            "methods": ["GET"],
+            "auth": "bear",
+            "summary": "运行统计",
+            "description": "正在运行和最近完成的运行：分阶段耗时、文件/缓存/API计数、API延迟百分位，以及各命名后端的成功率和延迟"
+        }]
+
+    def run_metrics(self) -> Dict[str, Any]:
+        """正在运行和最近完成的运行统计，以及各命名后端的成功率和耗时"""
+        backends = self._ai_namer.backend_stats() if self._ai_namer else []
+        if not self._metrics:
+            return {"running": [], "recent": [], "backends": backends}
+        return {"running": self._metrics.running(), "recent": self._metrics.recent(), "backends": backends}
+
+    def run_state(self) -> Dict[str, Any]:
+        """各源目录的运行状态"""
+        snapshot = self._coordinator.snapshot() if self._coordinator else {}
+        return {
+            source_dir: snapshot.get(source_dir, {"state": RunCoordinator.IDLE})
+            for source_dir in self._dirconf.keys()
+        }
+
+    def get_form(self) -> Tuple[List[dict], Dict[str, Any]]:
+        """配置表单"""
+        return [
+            {
                 'component': 'VForm',
                 'content': [
                     {
@@ -834,7 +2368,202 @@ class CloudStrmAI(_PluginBase):
                                 'props': {'cols': 12, 'md': 4},
                                 'content': [{
                                     'component': 'VSwitch',
-                                    'props': {'model': 'enabled', 'label': '启用插件'}
+                                    'props': {'model': 'enabled', 'label': '启用插件'}
+                                }]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {'cols': 12, 'md': 4},
+                                'content': [{
+                                    'component': 'VSwitch',
+                                    'props': {'model': 'onlyonce', 'label': '立即运行一次'}
+                                }]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {'cols': 12, 'md': 4},
+                                'content': [{
+                                    'component': 'VSwitch',
+                                    'props': {'model': 'rebuild', 'label': '重建索引'}
+                                }]
+                            }
+                        ]
+                    },
+                    {
+                        'component': 'VRow',
+                        'content': [
+                            {
+                                'component': 'VCol',
+                                'props': {'cols': 12, 'md': 6},
+                                'content': [{
+                                    'component': 'VTextField',
+                                    'props': {
+                                        'model': 'cron',
+                                        'label': '执行周期',
+                                        'placeholder': '*/30 * * * * (每30分钟)'
+                                    }
+                                }]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {'cols': 12, 'md': 6},
+                                'content': [{
+                                    'component': 'VTextField',
+                                    'props': {
+                                        'model': 'rebuild_cron',
+                                        'label': '重建周期',
+                                        'placeholder': '0 2 * * * (每天2点)'
+                                    }
+                                }]
+                            }
+                        ]
+                    },
+                    {
+                        'component': 'VRow',
+                        'content': [
+                            {
+                                'component': 'VCol',
+                                'props': {'cols': 12, 'md': 6},
+                                'content': [{
+                                    'component': 'VSwitch',
+                                    'props': {'model': 'fast_rebuild', 'label': '快速重建(从目标strm恢复索引)'}
+                                }]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {'cols': 12, 'md': 6},
+                                'content': [{
+                                    'component': 'VSwitch',
+                                    'props': {'model': 'fast_rebuild_verify', 'label': '快速重建时校验源文件'}
+                                }]
+                            }
+                        ]
+                    },
+                    {
+                        'component': 'VRow',
+                        'content': [
+                            {
+                                'component': 'VCol',
+                                'props': {'cols': 12, 'md': 6},
+                                'content': [{
+                                    'component': 'VSwitch',
+                                    'props': {'model': 'incremental_scan', 'label': '增量扫描(跳过未变化目录)'}
+                                }]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {'cols': 12, 'md': 6},
+                                'content': [{
+                                    'component': 'VTextField',
+                                    'props': {
+                                        'model': 'full_scan_interval',
+                                        'label': '完整遍历间隔(小时)',
+                                        'placeholder': '24，增量扫描时定期完整遍历兜底'
+                                    }
+                                }]
+                            }
+                        ]
+                    },
+                    {
+                        'component': 'VRow',
+                        'content': [
+                            {
+                                'component': 'VCol',
+                                'props': {'cols': 12, 'md': 4},
+                                'content': [{
+                                    'component': 'VSwitch',
+                                    'props': {'model': 'watch_mode', 'label': '实时监控(定时扫描兜底)'}
+                                }]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {'cols': 12, 'md': 4},
+                                'content': [{
+                                    'component': 'VTextField',
+                                    'props': {
+                                        'model': 'watch_debounce',
+                                        'label': '监控合并等待(秒)',
+                                        'placeholder': '10，文件夹无新变化后再处理'
+                                    }
+                                }]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {'cols': 12, 'md': 4},
+                                'content': [{
+                                    'component': 'VTextField',
+                                    'props': {
+                                        'model': 'watch_poll_interval',
+                                        'label': '无通知轮询间隔(分钟)',
+                                        'placeholder': '30，网络挂载收不到变化通知时轮询，0为不轮询'
+                                    }
+                                }]
+                            }
+                        ]
+                    },
+                    {
+                        'component': 'VRow',
+                        'content': [
+                            {
+                                'component': 'VCol',
+                                'props': {'cols': 12, 'md': 4},
+                                'content': [{
+                                    'component': 'VSwitch',
+                                    'props': {'model': 'api_listing', 'label': '云盘API列目录(Alist/CD2)'}
+                                }]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {'cols': 12, 'md': 4},
+                                'content': [{
+                                    'component': 'VTextField',
+                                    'props': {
+                                        'model': 'cloud_api_auth',
+                                        'label': '云盘API认证',
+                                        'placeholder': 'Alist填Token，CD2填WebDAV用户名:密码',
+                                        'type': 'password'
+                                    }
+                                }]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {'cols': 12, 'md': 4},
+                                'content': [{
+                                    'component': 'VTextField',
+                                    'props': {
+                                        'model': 'api_listing_concurrency',
+                                        'label': '列目录并发数',
+                                        'placeholder': '4'
+                                    }
+                                }]
+                            }
+                        ]
+                    },
+                    {
+                        'component': 'VRow',
+                        'content': [{
+                            'component': 'VCol',
+                            'props': {'cols': 12},
+                            'content': [{
+                                'component': 'VTextarea',
+                                'props': {
+                                    'model': 'monitor_confs',
+                                    'label': '监控目录',
+                                    'rows': 5,
+                                    'placeholder': '源目录#目标目录#媒体库路径\n例: /dav/quark/quark/movies#/downloads/complete/movies#/media/movies'
+                                }
+                            }]
+                        }]
+                    },
+                    {
+                        'component': 'VRow',
+                        'content': [
+                            {
+                                'component': 'VCol',
+                                'props': {'cols': 12, 'md': 4},
+                                'content': [{
+                                    'component': 'VSwitch',
+                                    'props': {'model': 'copy_files', 'label': '复制非媒体文件'}
                                 }]
                             },
                             {
@@ -842,7 +2571,7 @@ class CloudStrmAI(_PluginBase):
                                 'props': {'cols': 12, 'md': 4},
                                 'content': [{
                                     'component': 'VSwitch',
-                                    'props': {'model': 'onlyonce', 'label': '立即运行一次'}
+                                    'props': {'model': 'https', 'label': '启用HTTPS'}
                                 }]
                             },
                             {
@@ -850,7 +2579,7 @@ class CloudStrmAI(_PluginBase):
                                 'props': {'cols': 12, 'md': 4},
                                 'content': [{
                                     'component': 'VSwitch',
-                                    'props': {'model': 'rebuild', 'label': '重建索引'}
+                                    'props': {'model': 'enable_ai_naming', 'label': '✨ AI智能命名'}
                                 }]
                             }
                         ]
@@ -860,15 +2589,36 @@ class CloudStrmAI(_PluginBase):
                         'content': [
                             {
                                 'component': 'VCol',
-                                'props': {'cols': 12, 'md': 6},
+                                'props': {'cols': 12, 'md': 4},
+                                'content': [{
+                                    'component': 'VSwitch',
+                                    'props': {'model': 'reconcile_targets', 'label': '重建缺失的strm'}
+                                }]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {'cols': 12, 'md': 4},
                                 'content': [{
                                     'component': 'VTextField',
                                     'props': {
-                                        'model': 'cron',
-                                        'label': '执行周期',
-                                        'placeholder': '*/30 * * * * (每30分钟)'
+                                        'model': 'output_workers',
+                                        'label': '写入线程数',
+                                        'placeholder': '4，strm写入和文件复制各自的线程数'
                                     }
                                 }]
+                            }
+                        ]
+                    },
+                    {
+                        'component': 'VRow',
+                        'content': [
+                            {
+                                'component': 'VCol',
+                                'props': {'cols': 12, 'md': 6},
+                                'content': [{
+                                    'component': 'VSwitch',
+                                    'props': {'model': 'delete_stale', 'label': '同步删除(源文件删除后清理strm)'}
+                                }]
                             },
                             {
                                 'component': 'VCol',
@@ -876,55 +2626,60 @@ class CloudStrmAI(_PluginBase):
                                 'content': [{
                                     'component': 'VTextField',
                                     'props': {
-                                        'model': 'rebuild_cron',
-                                        'label': '重建周期',
-                                        'placeholder': '0 2 * * * (每天2点)'
+                                        'model': 'delete_threshold',
+                                        'label': '删除安全阈值(%)',
+                                        'placeholder': '10，单次删除超过索引的该比例时跳过，0为不限制'
                                     }
                                 }]
                             }
                         ]
                     },
-                    {
-                        'component': 'VRow',
-                        'content': [{
-                            'component': 'VCol',
-                            'props': {'cols': 12},
-                            'content': [{
-                                'component': 'VTextarea',
-                                'props': {
-                                    'model': 'monitor_confs',
-                                    'label': '监控目录',
-                                    'rows': 5,
-                                    'placeholder': '源目录#目标目录#媒体库路径\n例: /dav/quark/quark/movies#/downloads/complete/movies#/media/movies'
-                                }
-                            }]
-                        }]
-                    },
                     {
                         'component': 'VRow',
                         'content': [
                             {
                                 'component': 'VCol',
-                                'props': {'cols': 12, 'md': 4},
+                                'props': {'cols': 12, 'md': 6},
                                 'content': [{
-                                    'component': 'VSwitch',
-                                    'props': {'model': 'copy_files', 'label': '复制非媒体文件'}
+                                    'component': 'VTextField',
+                                    'props': {
+                                        'model': 'mount_concurrency',
+                                        'label': '同一挂载并行目录数',
+                                        'placeholder': '1，不同挂载的源目录始终并行扫描'
+                                    }
                                 }]
                             },
                             {
                                 'component': 'VCol',
-                                'props': {'cols': 12, 'md': 4},
+                                'props': {'cols': 12, 'md': 6},
+                                'content': [{
+                                    'component': 'VTextField',
+                                    'props': {
+                                        'model': 'mount_timeout',
+                                        'label': '挂载无响应超时(分钟)',
+                                        'placeholder': '10，超时后本次不再等待该目录，0为一直等待'
+                                    }
+                                }]
+                            }
+                        ]
+                    },
+                    {
+                        'component': 'VRow',
+                        'content': [
+                            {
+                                'component': 'VCol',
+                                'props': {'cols': 12, 'md': 6},
                                 'content': [{
                                     'component': 'VSwitch',
-                                    'props': {'model': 'https', 'label': '启用HTTPS'}
+                                    'props': {'model': 'plan_mode', 'label': '试运行(只生成计划不写入)'}
                                 }]
                             },
                             {
                                 'component': 'VCol',
-                                'props': {'cols': 12, 'md': 4},
+                                'props': {'cols': 12, 'md': 6},
                                 'content': [{
                                     'component': 'VSwitch',
-                                    'props': {'model': 'enable_ai_naming', 'label': '✨ AI智能命名'}
+                                    'props': {'model': 'apply_plan', 'label': '应用计划'}
                                 }]
                             }
                         ]
@@ -945,6 +2700,207 @@ class CloudStrmAI(_PluginBase):
                             }]
                         }]
                     },
+                    {
+                        'component': 'VRow',
+                        'content': [
+                            {
+                                'component': 'VCol',
+                                'props': {'cols': 12, 'md': 5},
+                                'content': [{
+                                    'component': 'VTextField',
+                                    'props': {
+                                        'model': 'ai_base_url',
+                                        'label': 'DeepSeek接口地址',
+                                        'placeholder': 'https://api.deepseek.com/v1'
+                                    }
+                                }]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {'cols': 12, 'md': 4},
+                                'content': [{
+                                    'component': 'VTextField',
+                                    'props': {
+                                        'model': 'ai_model',
+                                        'label': 'DeepSeek模型',
+                                        'placeholder': 'deepseek-chat'
+                                    }
+                                }]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {'cols': 12, 'md': 3},
+                                'content': [{
+                                    'component': 'VTextField',
+                                    'props': {
+                                        'model': 'ai_timeout',
+                                        'label': 'DeepSeek超时(秒)',
+                                        'placeholder': '30'
+                                    }
+                                }]
+                            }
+                        ]
+                    },
+                    {
+                        'component': 'VRow',
+                        'content': [
+                            {
+                                'component': 'VCol',
+                                'props': {'cols': 12, 'md': 4},
+                                'content': [{
+                                    'component': 'VTextField',
+                                    'props': {
+                                        'model': 'local_llm_url',
+                                        'label': '本地模型接口地址',
+                                        'placeholder': 'http://127.0.0.1:11434/v1，OpenAI兼容，优先于DeepSeek'
+                                    }
+                                }]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {'cols': 12, 'md': 4},
+                                'content': [{
+                                    'component': 'VTextField',
+                                    'props': {
+                                        'model': 'local_llm_model',
+                                        'label': '本地模型名称',
+                                        'placeholder': 'qwen2.5:7b'
+                                    }
+                                }]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {'cols': 12, 'md': 2},
+                                'content': [{
+                                    'component': 'VTextField',
+                                    'props': {
+                                        'model': 'local_llm_concurrency',
+                                        'label': '本地并发数',
+                                        'placeholder': '2'
+                                    }
+                                }]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {'cols': 12, 'md': 2},
+                                'content': [{
+                                    'component': 'VTextField',
+                                    'props': {
+                                        'model': 'local_llm_timeout',
+                                        'label': '本地超时(秒)',
+                                        'placeholder': '60'
+                                    }
+                                }]
+                            }
+                        ]
+                    },
+                    {
+                        'component': 'VRow',
+                        'content': [
+                            {
+                                'component': 'VCol',
+                                'props': {'cols': 12, 'md': 6},
+                                'content': [{
+                                    'component': 'VTextField',
+                                    'props': {
+                                        'model': 'folder_cache_ttl',
+                                        'label': '缓存有效期(天)',
+                                        'placeholder': '30，0为永不过期'
+                                    }
+                                }]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {'cols': 12, 'md': 6},
+                                'content': [{
+                                    'component': 'VTextField',
+                                    'props': {
+                                        'model': 'folder_cache_size',
+                                        'label': '缓存容量(条)',
+                                        'placeholder': '10000，超出后淘汰最久未使用的记录'
+                                    }
+                                }]
+                            }
+                        ]
+                    },
+                    {
+                        'component': 'VRow',
+                        'content': [
+                            {
+                                'component': 'VCol',
+                                'props': {'cols': 12, 'md': 4},
+                                'content': [{
+                                    'component': 'VTextField',
+                                    'props': {
+                                        'model': 'ai_concurrency',
+                                        'label': 'AI并发数',
+                                        'placeholder': '4，同时请求的文件夹数量'
+                                    }
+                                }]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {'cols': 12, 'md': 4},
+                                'content': [{
+                                    'component': 'VTextField',
+                                    'props': {
+                                        'model': 'ai_rate_limit',
+                                        'label': 'AI限流(次/分钟)',
+                                        'placeholder': '0为不限制，收到429时自动暂停'
+                                    }
+                                }]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {'cols': 12, 'md': 4},
+                                'content': [{
+                                    'component': 'VTextField',
+                                    'props': {
+                                        'model': 'ai_batch_size',
+                                        'label': 'AI批量命名',
+                                        'placeholder': '1为逐个请求，大批量补录时可设为10'
+                                    }
+                                }]
+                            }
+                        ]
+                    },
+                    {
+                        'component': 'VRow',
+                        'content': [
+                            {
+                                'component': 'VCol',
+                                'props': {'cols': 12, 'md': 4},
+                                'content': [{
+                                    'component': 'VSwitch',
+                                    'props': {'model': 'local_parse', 'label': '本地规则解析优先'}
+                                }]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {'cols': 12, 'md': 4},
+                                'content': [{
+                                    'component': 'VTextField',
+                                    'props': {
+                                        'model': 'local_parse_threshold',
+                                        'label': '本地解析置信度阈值',
+                                        'placeholder': '0.8，低于阈值的名称交给AI'
+                                    }
+                                }]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {'cols': 12, 'md': 4},
+                                'content': [{
+                                    'component': 'VTextField',
+                                    'props': {
+                                        'model': 'ai_retry_attempts',
+                                        'label': 'AI命名最多尝试次数',
+                                        'placeholder': '5，失败的文件夹在后续扫描中退避重试'
+                                    }
+                                }]
+                            }
+                        ]
+                    },
                     {
                         'component': 'VRow',
                         'content': [{
@@ -983,23 +2939,202 @@ class CloudStrmAI(_PluginBase):
             "rebuild_cron": "",
             "onlyonce": False,
             "rebuild": False,
+            "fast_rebuild": False,
+            "fast_rebuild_verify": False,
             "copy_files": False,
             "https": False,
             "enable_ai_naming": True,
             "deepseek_api_key": "",
+            "folder_cache_ttl": 30,
+            "folder_cache_size": 10000,
+            "ai_concurrency": 4,
+            "ai_rate_limit": 0,
+            "ai_base_url": "https://api.deepseek.com/v1",
+            "ai_model": "deepseek-chat",
+            "ai_timeout": 30,
+            "local_llm_url": "",
+            "local_llm_model": "",
+            "local_llm_concurrency": 2,
+            "local_llm_timeout": 60,
+            "ai_batch_size": 1,
+            "local_parse": True,
+            "local_parse_threshold": 0.8,
+            "ai_retry_attempts": 5,
+            "incremental_scan": False,
+            "full_scan_interval": 24,
+            "api_listing": False,
+            "cloud_api_auth": "",
+            "api_listing_concurrency": 4,
+            "watch_mode": False,
+            "watch_debounce": 10,
+            "watch_poll_interval": 30,
+            "reconcile_targets": True,
+            "delete_stale": False,
+            "delete_threshold": 10,
+            "output_workers": 4,
+            "mount_concurrency": 1,
+            "mount_timeout": 10,
+            "plan_mode": False,
+            "apply_plan": False,
             "monitor_confs": "",
         }
 
     def get_page(self) -> List[dict]:
-        pass
+        """运行统计页面：最近一次运行概览和最近运行列表"""
+        metrics = self.run_metrics()
+        runs = metrics["running"] + metrics["recent"]
+        if not runs:
+            return [{
+                'component': 'div',
+                'text': '暂无运行记录',
+                'props': {'class': 'text-center'}
+            }]
+
+        def _seconds(value) -> str:
+            return f"{value:.1f}s" if value else "-"
+
+        def _ms(value) -> str:
+            return f"{value * 1000:.0f}ms" if value is not None else "-"
+
+        latest = runs[0]
+        counters, latency = latest.get("counters", {}), latest.get("api_latency", {})
+        cards = [
+            ("总耗时", _seconds(latest.get("duration"))),
+            ("新增文件", counters.get("new_files", 0)),
+            ("AI请求", f"{int(counters.get('api_calls', 0))}次"),
+            ("API延迟p90", _ms(latency.get("p90"))),
+            ("失败", counters.get("failures", 0) + int(counters.get("api_failures", 0))),
+        ]
+
+        headers = ["开始时间", "源目录", "任务", "状态", "总耗时", "遍历", "索引", "AI", "写入", "提交", "检查",
+                   "文件", "新增", "缓存命中/未命中", "本地/AI", "API p50/p99", "失败"]
+        rows = []
+        running = len(metrics["running"])
+        for index, run in enumerate(runs):
+            phases, counters, latency = run.get("phases", {}), run.get("counters", {}), run.get("api_latency", {})
+            values = [
+                datetime.fromtimestamp(run.get("started_at") or 0).strftime("%m-%d %H:%M:%S"),
+                run.get("source_dir"),
+                run.get("job"),
+                "运行中" if index < running else "完成",
+                _seconds(run.get("duration")),
+                _seconds(phases.get("walk")),
+                _seconds(phases.get("lookup")),
+                _seconds(phases.get("resolve")),
+                _seconds(phases.get("write")),
+                _seconds(phases.get("commit")),
+                _seconds(phases.get("reconcile")),
+                counters.get("files_seen", 0),
+                counters.get("new_files", 0),
+                f"{int(counters.get('cache_hits', 0))}/{int(counters.get('cache_misses', 0))}",
+                f"{int(counters.get('local', 0))}/{int(counters.get('ai_folders', 0))}",
+                f"{_ms(latency.get('p50'))}/{_ms(latency.get('p99'))}",
+                counters.get("failures", 0) + int(counters.get("api_failures", 0)),
+            ]
+            rows.append({
+                'component': 'tr',
+                'content': [{'component': 'td', 'text': str(value)} for value in values]
+            })
+
+        tables = [(headers, rows)]
+        if metrics.get("backends"):
+            backend_rows = []
+            for stats in metrics["backends"]:
+                values = [
+                    stats.get("name"),
+                    stats.get("model"),
+                    stats.get("requests", 0),
+                    stats.get("success", 0),
+                    stats.get("failures", 0),
+                    f"{stats['success_rate'] * 100:.0f}%" if stats.get("success_rate") is not None else "-",
+                    f"{_ms(stats.get('p50'))}/{_ms(stats.get('p90'))}",
+                    "可用" if stats.get("available") else "已熔断",
+                ]
+                backend_rows.append({
+                    'component': 'tr',
+                    'content': [{'component': 'td', 'text': str(value)} for value in values]
+                })
+            tables.append((["命名后端", "模型", "请求", "成功", "失败", "成功率", "延迟p50/p90", "状态"],
+                           backend_rows))
+
+        return [
+            {
+                'component': 'VRow',
+                'content': [{
+                    'component': 'VCol',
+                    'props': {'cols': 6, 'md': 2},
+                    'content': [{
+                        'component': 'VCard',
+                        'props': {'variant': 'tonal'},
+                        'content': [{
+                            'component': 'VCardText',
+                            'content': [
+                                {'component': 'div', 'props': {'class': 'text-caption'}, 'text': title},
+                                {'component': 'div', 'props': {'class': 'text-h6'}, 'text': str(value)}
+                            ]
+                        }]
+                    }]
+                } for title, value in cards]
+            },
+            *[{
+                'component': 'VRow',
+                'content': [{
+                    'component': 'VCol',
+                    'props': {'cols': 12},
+                    'content': [{
+                        'component': 'VTable',
+                        'props': {'hover': True, 'density': 'compact'},
+                        'content': [
+                            {
+                                'component': 'thead',
+                                'content': [{
+                                    'component': 'tr',
+                                    'content': [{'component': 'th', 'props': {'class': 'text-start'}, 'text': header}
+                                                for header in table_headers]
+                                }]
+                            },
+                            {'component': 'tbody', 'content': table_rows}
+                        ]
+                    }]
+                }]
+            } for table_headers, table_rows in tables]
+        ]
 
     def stop_service(self):
         """停止服务"""
         try:
+            if self._stop_event:
+                self._stop_event.set()
+            if self._watcher:
+                self._watcher.stop()
+                self._watcher = None
+            if self._coordinator:
+                self._coordinator.clear()
+            # 等待后台加载结束再关闭索引
+            if self._catalog_loader:
+                self._catalog_loader.join()
+                self._catalog_loader = None
             if self._scheduler:
                 self._scheduler.remove_all_jobs()
                 if self._scheduler.running:
                     self._scheduler.shutdown()
                 self._scheduler = None
+            # 等待挂载无响应而不再等待的任务结束，它们恢复后检查停止事件中止，不再写入索引
+            deadline = time.monotonic() + self._stop_timeout
+            for thread in self._abandoned_runs:
+                thread.join(timeout=max(deadline - time.monotonic(), 0))
+            self._abandoned_runs = {thread for thread in self._abandoned_runs if thread.is_alive()}
+            if self._abandoned_runs:
+                logger.warning(f"[CloudStrmAI] ⚠️ {len(self._abandoned_runs)}个任务仍阻塞在无响应的挂载上，"
+                               f"恢复后将直接中止")
+            if self._catalog:
+                self._catalog.close()
+                self._catalog = None
+            if self._ai_namer:
+                self._ai_namer.close()
+                self._ai_namer = None
+            if self._folder_cache:
+                self._folder_cache.close()
+                self._folder_cache = None
         except Exception as e:
             logger.error(f"[CloudStrmAI] 停止失败: {str(e)}")
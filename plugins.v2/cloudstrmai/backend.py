@@ -0,0 +1,242 @@
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Optional
+
+import pytz
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.log import logger
+
+from .metrics import percentile
+
+
+class RateLimiter:
+    """请求限流器：按固定间隔放行请求，收到429时所有线程统一暂停"""
+
+    def __init__(self, rate_per_minute: float = 0):
+        self._interval = 60.0 / rate_per_minute if rate_per_minute and rate_per_minute > 0 else 0
+        self._lock = threading.Lock()
+        self._next_time = 0.0
+        self._paused_until = 0.0
+
+    def acquire(self):
+        """等待直到允许发起下一次请求"""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_time, self._paused_until)
+            self._next_time = start + self._interval
+        if start > now:
+            time.sleep(start - now)
+
+    def pause(self, seconds: float):
+        """暂停放行请求"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+class CircuitBreaker:
+    """熔断器：连续失败达到阈值后，本轮运行内不再调用API"""
+
+    def __init__(self, threshold: int = 5, name: str = "API"):
+        self._threshold = threshold
+        self._name = name
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._open = False
+
+    def allow(self) -> bool:
+        return not self._open
+
+    def record(self, success: bool):
+        with self._lock:
+            if success:
+                self._failures = 0
+                return
+            self._failures += 1
+            if not self._open and self._failures >= self._threshold:
+                self._open = True
+                logger.error(f"[CloudStrmAI] ⛔ {self._name}连续失败{self._failures}次，本轮运行不再使用")
+
+    def reset(self):
+        with self._lock:
+            self._failures = 0
+            self._open = False
+
+
+class BackendsUnavailable(Exception):
+    """所有命名后端均已熔断，未发出请求"""
+    pass
+
+
+class ChatBackend:
+    """OpenAI兼容的chat/completions命名后端（DeepSeek、本地模型服务等）
+
+    每个后端有独立的连接池、并发限制、超时、限流、重试和熔断，并统计请求成功率和耗时。
+    """
+
+    _backoff_base = 1
+    _backoff_max = 30
+    # 需要重试的状态码
+    _retry_status = (429, 500, 502, 503, 504)
+
+    def __init__(self, name: str, base_url: str, model: str, api_key: str = None, concurrency: int = 4,
+                 timeout: float = 30, rate_limit: float = 0, max_retries: int = 3):
+        """
+        Args:
+            base_url: 接口地址，如 https://api.deepseek.com/v1 或 http://127.0.0.1:11434/v1
+            timeout: 读取超时（秒），本地模型生成较慢时可调大
+            max_retries: 超时、连接错误、429和5xx的最多重试次数
+        """
+        self.name = name
+        base_url = base_url.rstrip("/")
+        self.api_url = base_url if base_url.endswith("/chat/completions") else f"{base_url}/chat/completions"
+        self.model = model
+        self.concurrency = max(int(concurrency or 1), 1)
+        self._timeout = max(float(timeout or 30), 1)
+        self._max_retries = max(int(max_retries), 0)
+        self._slots = threading.BoundedSemaphore(self.concurrency)
+        self._limiter = RateLimiter(rate_limit)
+        self._breaker = CircuitBreaker(name=name)
+        # 复用连接的HTTP会话
+        self._session = requests.Session()
+        self._session.headers.update({"Content-Type": "application/json"})
+        if api_key:
+            self._session.headers.update({"Authorization": f"Bearer {api_key}"})
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.concurrency)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+        # 每次HTTP请求的耗时和token用量回调
+        self.on_request: Optional[Callable[[float], None]] = None
+        self.on_usage: Optional[Callable[[Optional[Dict], float], None]] = None
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "success": 0, "failures": 0}
+        self._latencies = deque(maxlen=1000)
+
+    def allow(self) -> bool:
+        return self._breaker.allow()
+
+    def chat(self, system: str, prompt: str, max_tokens: int) -> Optional[str]:
+        """发送请求（JSON输出模式），返回回复内容，失败返回None
+
+        超时、连接错误、429和5xx按指数退避（带抖动）重试，优先遵循Retry-After；
+        重试耗尽计入熔断器。回复内容是否可用由调用方解析后通过record记录。
+        """
+        payload = {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": system},
+                {"role": "user", "content": prompt}
+            ],
+            "response_format": {"type": "json_object"},
+            "temperature": 0.3,
+            "max_tokens": max_tokens
+        }
+
+        with self._slots:
+            for attempt in range(self._max_retries + 1):
+                self._limiter.acquire()
+                wait = None
+                start = time.perf_counter()
+                try:
+                    response = self._session.post(self.api_url, json=payload, timeout=(10, self._timeout))
+                except requests.RequestException as e:
+                    self._record_request(time.perf_counter() - start)
+                    logger.warning(f"[CloudStrmAI] {self.name}请求异常: {str(e)}")
+                else:
+                    latency = time.perf_counter() - start
+                    self._record_request(latency)
+                    if response.status_code == 200:
+                        try:
+                            body = response.json()
+                            content = body.get("choices", [{}])[0].get("message", {}).get("content", "")
+                        except (ValueError, AttributeError, IndexError) as e:
+                            logger.error(f"[CloudStrmAI] {self.name}响应解析失败: {str(e)}")
+                            self.record(success=False)
+                            return None
+                        if self.on_usage:
+                            self.on_usage(body.get("usage"), latency)
+                        return content
+
+                    if response.status_code not in self._retry_status:
+                        logger.error(f"[CloudStrmAI] {self.name}接口错误 [{response.status_code}]")
+                        self.record(success=False)
+                        return None
+
+                    wait = self._retry_after(response)
+                    if response.status_code == 429:
+                        # 限流：暂停该后端的所有请求
+                        wait = wait if wait is not None else self._backoff(attempt)
+                        logger.warning(f"[CloudStrmAI] {self.name}限流，暂停{wait:.0f}秒")
+                        self._limiter.pause(wait)
+                    else:
+                        logger.warning(f"[CloudStrmAI] {self.name}接口错误 [{response.status_code}]")
+
+                if attempt < self._max_retries:
+                    time.sleep(wait if wait is not None else self._backoff(attempt))
+
+        logger.error(f"[CloudStrmAI] {self.name}请求失败，已重试{self._max_retries}次")
+        self.record(success=False)
+        return None
+
+    def record(self, success: bool):
+        """记录一次命名请求的结果（回复可解析为命名信息才算成功）"""
+        self._breaker.record(success=success)
+        with self._lock:
+            self._stats["success" if success else "failures"] += 1
+
+    def _record_request(self, latency: float):
+        with self._lock:
+            self._stats["requests"] += 1
+            self._latencies.append(latency)
+        if self.on_request:
+            self.on_request(latency)
+
+    def stats(self) -> Dict[str, Any]:
+        """请求次数、成功率和耗时"""
+        with self._lock:
+            stats = dict(self._stats)
+            latencies = list(self._latencies)
+        total = stats["success"] + stats["failures"]
+        p50, p90 = percentile(latencies, 50), percentile(latencies, 90)
+        return {
+            "name": self.name,
+            "model": self.model,
+            "url": self.api_url,
+            **stats,
+            "success_rate": round(stats["success"] / total, 3) if total else None,
+            "p50": round(p50, 3) if p50 is not None else None,
+            "p90": round(p90, 3) if p90 is not None else None,
+            "available": self._breaker.allow(),
+        }
+
+    def _backoff(self, attempt: int) -> float:
+        """指数退避时间（带抖动）"""
+        delay = min(self._backoff_base * (2 ** attempt), self._backoff_max)
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    @staticmethod
+    def _retry_after(response: requests.Response) -> Optional[float]:
+        """解析Retry-After响应头（秒数或HTTP日期）"""
+        value = response.headers.get("Retry-After")
+        if not value:
+            return None
+        try:
+            return max(float(value), 0)
+        except ValueError:
+            pass
+        try:
+            return max((parsedate_to_datetime(value) - datetime.now(tz=pytz.utc)).total_seconds(), 0)
+        except (TypeError, ValueError):
+            return None
+
+    def reset(self):
+        """开始新一轮运行，重置熔断状态"""
+        self._breaker.reset()
+
+    def close(self):
+        self._session.close()
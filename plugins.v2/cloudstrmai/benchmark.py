@@ -0,0 +1,399 @@
+"""CloudStrmAI 性能测试
+
+生成指定规模的模拟媒体目录，使用本地HTTP服务模拟DeepSeek接口（可配置延迟和错误率），
+依次测量重建索引、增量扫描和无变化扫描的耗时、吞吐、API调用次数、峰值内存和系统调用次数，
+结果保存为JSON，便于不同版本之间对比。
+
+在MoviePilot后端目录下运行:
+    python -m app.plugins.cloudstrmai.benchmark --scale 10k --output v1.json
+    python -m app.plugins.cloudstrmai.benchmark --scale 10k --output v2.json --compare v1.json
+"""
+import argparse
+import json
+import os
+import random
+import re
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from . import CloudStrmAI
+
+SCALES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+_WORDS = ["Silent", "River", "Night", "Crown", "Empire", "Frozen", "Ghost", "Iron", "Lost", "Ocean",
+          "Shadow", "Storm", "Golden", "Hidden", "Last", "Wild", "Broken", "Dark", "Blue", "Stone"]
+_CHINESE = ["风起", "长安", "山海", "繁花", "人间", "漫长", "归途", "星河", "旧梦", "烟火"]
+_QUALITY = ["2160p.WEB-DL.H265.DDP5.1", "1080p.BluRay.x264.DTS", "1080p.WEB-DL.H264.AAC", "720p.HDTV.x264"]
+
+
+class MediaTreeGenerator:
+    """生成模拟媒体目录
+
+    包含电影文件夹、多季剧集嵌套、字幕/海报等非媒体文件，以及回收站、隐藏目录和extrafanart，
+    一部分使用规范的场景命名，一部分使用需要AI识别的不规范命名。
+    """
+
+    def __init__(self, root: str, seed: int = 42, ambiguous: float = 0.3):
+        self.root = root
+        self._random = random.Random(seed)
+        self._ambiguous = ambiguous
+        self._serial = 0
+        self.media_files = 0
+        self.other_files = 0
+
+    def generate(self, total: int) -> int:
+        """生成约total个文件，返回实际文件数"""
+        os.makedirs(self.root, exist_ok=True)
+        start = self.media_files + self.other_files
+        while self.media_files + self.other_files - start < total:
+            roll = self._random.random()
+            if roll < 0.4:
+                self._movie()
+            elif roll < 0.97:
+                self._show()
+            else:
+                self._junk()
+        return self.media_files + self.other_files - start
+
+    def _title(self) -> Tuple[str, str, int]:
+        self._serial += 1
+        words = self._random.sample(_WORDS, 2)
+        english = f"{words[0]}.{words[1]}.{self._serial}"
+        chinese = f"{self._random.choice(_CHINESE)}{self._serial}"
+        return english, chinese, self._random.randint(1980, 2024)
+
+    def _movie(self):
+        english, chinese, year = self._title()
+        quality = self._random.choice(_QUALITY)
+        if self._random.random() < self._ambiguous:
+            folder = os.path.join(self.root, f"【高清】{chinese} 国语中字")
+            name = f"{chinese}.mp4"
+        else:
+            folder = os.path.join(self.root, f"{chinese} ({year})")
+            name = f"{english}.{year}.{quality}.mkv"
+        self._write(folder, name, media=True)
+        self._write(folder, "poster.jpg")
+        self._write(folder, "movie.nfo")
+
+    def _show(self):
+        english, chinese, year = self._title()
+        quality = self._random.choice(_QUALITY)
+        ambiguous = self._random.random() < self._ambiguous
+        show = os.path.join(self.root, f"{chinese}" if ambiguous else f"{english}.{year}")
+        self._write(show, "tvshow.nfo")
+        for season in range(1, self._random.randint(1, 3) + 1):
+            folder = os.path.join(show, f"第{season}季" if ambiguous else f"Season {season}")
+            for episode in range(1, self._random.randint(6, 12) + 1):
+                if ambiguous:
+                    name = f"{episode:02d}.mp4"
+                else:
+                    name = f"{english}.S{season:02d}E{episode:02d}.{quality}.mkv"
+                self._write(folder, name, media=True)
+                self._write(folder, f"{Path(name).stem}.srt")
+
+    def _junk(self):
+        """回收站、隐藏目录、extrafanart，扫描时应被跳过"""
+        english, _, year = self._title()
+        parent = self._random.choice(["@Recycle", "#recycle", ".hidden", f"{english}.{year}/extrafanart"])
+        folder = os.path.join(self.root, parent, f"{english}.{year}")
+        self._write(folder, f"{english}.{year}.1080p.mkv", media=True)
+        self._write(folder, "fanart.jpg")
+
+    def _write(self, folder: str, name: str, media: bool = False):
+        os.makedirs(folder, exist_ok=True)
+        with open(os.path.join(folder, name), "w") as f:
+            f.write("")
+        if media:
+            self.media_files += 1
+        else:
+            self.other_files += 1
+
+
+class StubNamingServer:
+    """模拟DeepSeek chat/completions接口，按提示词中的文件夹名返回命名结果
+
+    token用量按字符数估算，与上一次请求相同的系统提示词计为命中前缀缓存。
+    """
+
+    def __init__(self, latency: float = 0.2, error_rate: float = 0, seed: int = 42):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.calls = 0
+        self.errors = 0
+        self.prompt_tokens = 0
+        self._system_prompt = None
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}/v1/chat/completions"
+
+    def start(self):
+        stub = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+                status, content, usage = stub.handle(body)
+                self.send_response(status)
+                if status != 200:
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                payload = json.dumps({
+                    "choices": [{"message": {"content": content}}],
+                    "usage": usage
+                }, ensure_ascii=False).encode()
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="CloudStrmAI-BenchAPI", daemon=True).start()
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def handle(self, body: Dict) -> Tuple[int, str, Dict]:
+        messages = body.get("messages") or [{}]
+        system = next((m.get("content", "") for m in messages if m.get("role") == "system"), "")
+        prompt_tokens = sum(len(m.get("content", "")) for m in messages)
+        with self._lock:
+            self.calls += 1
+            failed = self._random.random() < self.error_rate
+            if failed:
+                self.errors += 1
+            self.prompt_tokens += prompt_tokens
+            cached = len(system) if system and system == self._system_prompt else 0
+            self._system_prompt = system
+        time.sleep(self.latency)
+        if failed:
+            return self._random.choice([429, 500, 503]), "", {}
+
+        prompt = messages[-1].get("content", "")
+        batch = re.findall(r'^(\d+)\. 文件夹: (.*?) \| 文件名: (.*)$', prompt, re.MULTILINE)
+        if batch:
+            content = json.dumps({"results": [dict(self._answer(folder, file), index=int(index))
+                                              for index, folder, file in batch]}, ensure_ascii=False)
+        else:
+            folder = re.search(r'^文件夹: (.*)$', prompt, re.MULTILINE)
+            file = re.search(r'^文件名: (.*)$', prompt, re.MULTILINE)
+            content = json.dumps(self._answer(folder.group(1) if folder else "",
+                                              file.group(1) if file else ""), ensure_ascii=False)
+        return 200, content, {"prompt_tokens": prompt_tokens, "prompt_cache_hit_tokens": cached,
+                              "completion_tokens": len(content)}
+
+    @staticmethod
+    def _answer(folder: str, filename: str) -> Dict:
+        title = re.sub(r'【.*?】|国语中字|\(\d{4}\)', '', folder).strip() or "未知"
+        is_tv = not filename.endswith(".mp4") or bool(re.match(r'^\d+\.', filename))
+        return {
+            "type": "tv" if is_tv else "movie",
+            "chinese_title": title,
+            "english_title": "",
+            "year": "2020",
+            "quality": "1080p",
+            "audio": "",
+            "other": "",
+            "folder_name": f"{title} (2020)"
+        }
+
+
+class _BenchCloudStrmAI(CloudStrmAI):
+    """数据目录指向临时目录、不保存配置的插件实例"""
+
+    def __init__(self, data_path: str):
+        super().__init__()
+        self._bench_data_path = data_path
+
+    def get_data_path(self, plugin_id: str = None) -> Path:
+        return Path(self._bench_data_path)
+
+    def update_config(self, config: dict, plugin_id: str = None) -> bool:
+        return True
+
+
+def _proc_io() -> Optional[Dict[str, int]]:
+    """当前进程的读写系统调用次数（仅Linux）"""
+    try:
+        with open("/proc/self/io") as f:
+            values = dict(line.split(":", 1) for line in f.read().splitlines() if ":" in line)
+        return {"syscr": int(values["syscr"]), "syscw": int(values["syscw"])}
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _peak_rss_mb() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS单位为字节，Linux为KB
+    return round(usage / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _count_outputs(dest: str) -> int:
+    return sum(len(files) for _, _, files in os.walk(dest))
+
+
+def _measure(name: str, func, files: int, server: Optional[StubNamingServer]) -> Dict:
+    calls, errors, tokens = (server.calls, server.errors, server.prompt_tokens) if server else (0, 0, 0)
+    io_before = _proc_io()
+    cpu = time.process_time()
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    io_after = _proc_io()
+    result = {
+        "seconds": round(elapsed, 3),
+        "cpu_seconds": round(time.process_time() - cpu, 3),
+        "files": files,
+        "files_per_sec": round(files / elapsed, 1) if elapsed > 0 else None,
+        "api_calls": server.calls - calls if server else 0,
+        "api_errors": server.errors - errors if server else 0,
+        "prompt_tokens": server.prompt_tokens - tokens if server else 0,
+        "peak_rss_mb": _peak_rss_mb(),
+        "syscr": io_after["syscr"] - io_before["syscr"] if io_before and io_after else None,
+        "syscw": io_after["syscw"] - io_before["syscw"] if io_before and io_after else None,
+    }
+    print(f"{name:<12} {result['seconds']:>9.2f}s {result['files_per_sec'] or 0:>12.1f} files/s "
+          f"{result['api_calls']:>7} calls {result['peak_rss_mb']:>8.1f} MB "
+          f"syscr={result['syscr']} syscw={result['syscw']}")
+    return result
+
+
+def run(args) -> Dict:
+    total = SCALES.get(str(args.scale).lower()) or int(args.scale)
+    workdir = args.workdir or tempfile.mkdtemp(prefix="cloudstrmai-bench-")
+    source, dest, data = (os.path.join(workdir, name) for name in ("source", "strm", "data"))
+    for path in (dest, data):
+        os.makedirs(path, exist_ok=True)
+
+    print(f"生成模拟目录: {total}个文件 -> {source}")
+    generator = MediaTreeGenerator(source, seed=args.seed, ambiguous=args.ambiguous)
+    start = time.perf_counter()
+    generated = generator.generate(total)
+    print(f"生成完成: 媒体{generator.media_files} 其他{generator.other_files} ({time.perf_counter() - start:.1f}s)")
+
+    server = None
+    if not args.no_ai:
+        server = StubNamingServer(latency=args.latency / 1000, error_rate=args.error_rate, seed=args.seed)
+        server.start()
+
+    config = {
+        "enabled": True,
+        "monitor_confs": f"{source}#{dest}#{source}",
+        "copy_files": args.copy_files,
+        "enable_ai_naming": not args.no_ai,
+        "deepseek_api_key": "benchmark",
+        "ai_base_url": server.url if server else "",
+        "ai_concurrency": args.ai_concurrency,
+        "ai_batch_size": args.ai_batch_size,
+        "local_parse": not args.no_local_parse,
+        "incremental_scan": args.incremental_scan,
+    }
+    plugin = _BenchCloudStrmAI(data)
+    plugin.init_plugin(config)
+
+    phases = {}
+    try:
+        phases["rebuild"] = _measure("rebuild", plugin.scan, generated, server)
+        time.sleep(args.settle)
+        added = generator.generate(max(int(generated * args.new_ratio), 1))
+        phases["incremental"] = _measure("incremental", plugin.scan, added, server)
+        phases["noop"] = _measure("noop", plugin.scan, 0, server)
+        outputs = _count_outputs(dest)
+    finally:
+        plugin.stop_service()
+        if server:
+            server.stop()
+        if not args.keep and not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "plugin_version": plugin.plugin_version,
+        "created_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "python": sys.version.split()[0],
+        "params": {
+            "scale": total,
+            "seed": args.seed,
+            "ambiguous": args.ambiguous,
+            "latency_ms": args.latency,
+            "error_rate": args.error_rate,
+            "ai": not args.no_ai,
+            "local_parse": not args.no_local_parse,
+            "ai_concurrency": args.ai_concurrency,
+            "ai_batch_size": args.ai_batch_size,
+            "incremental_scan": args.incremental_scan,
+            "copy_files": args.copy_files,
+            "new_ratio": args.new_ratio,
+        },
+        "tree": {"media_files": generator.media_files, "other_files": generator.other_files},
+        "outputs": outputs,
+        "phases": phases,
+    }
+
+
+def compare(current: Dict, baseline: Dict):
+    """打印与基准结果的对比"""
+    print(f"\n对比 {baseline.get('plugin_version')} -> {current.get('plugin_version')}")
+    for phase, result in current.get("phases", {}).items():
+        before = baseline.get("phases", {}).get(phase)
+        if not before:
+            continue
+        changes = []
+        for key in ("seconds", "api_calls", "prompt_tokens", "peak_rss_mb", "syscr", "syscw"):
+            old, new = before.get(key), result.get(key)
+            if old is None or new is None:
+                continue
+            delta = f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+            changes.append(f"{key} {old} -> {new} ({delta})")
+        print(f"{phase:<12} " + ", ".join(changes))
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="CloudStrmAI 性能测试")
+    parser.add_argument("--scale", default="10k", help="文件数: 10k/100k/1m 或具体数字")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子，相同种子生成相同目录")
+    parser.add_argument("--ambiguous", type=float, default=0.3, help="不规范命名（需要AI识别）的比例")
+    parser.add_argument("--latency", type=float, default=200, help="模拟API延迟(毫秒)")
+    parser.add_argument("--error-rate", type=float, default=0, help="模拟API错误率(0~1)")
+    parser.add_argument("--ai-concurrency", type=int, default=4)
+    parser.add_argument("--ai-batch-size", type=int, default=1)
+    parser.add_argument("--no-ai", action="store_true", help="不启用AI命名")
+    parser.add_argument("--no-local-parse", action="store_true", help="关闭本地规则解析")
+    parser.add_argument("--incremental-scan", action="store_true", help="开启增量扫描")
+    parser.add_argument("--copy-files", action="store_true", help="复制非媒体文件")
+    parser.add_argument("--new-ratio", type=float, default=0.01, help="增量扫描前新增文件的比例")
+    parser.add_argument("--settle", type=float, default=2, help="重建后等待秒数，避免目录修改时间落在同一粒度内")
+    parser.add_argument("--workdir", help="工作目录（指定时不删除）")
+    parser.add_argument("--keep", action="store_true", help="保留临时目录")
+    parser.add_argument("--output", help="结果JSON保存路径")
+    parser.add_argument("--compare", help="对比的基准结果JSON")
+    args = parser.parse_args(argv)
+
+    result = run(args)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存: {args.output}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(result, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
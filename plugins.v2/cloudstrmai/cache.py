@@ -0,0 +1,145 @@
+import json
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from app.log import logger
+
+# 样本文件名中的集数标记，去掉后同一剧集的各集文件得到相同的键
+_EPISODE_MARK_RE = re.compile(r'[Ss]\d{1,2}[Ee]\d{1,4}(?:-?[Ee]?\d{1,4})?|(?<![A-Za-z])[Ee][Pp]?\d{1,4}(?!\d)'
+                              r'|第\s*\d+\s*[集话話]|(?<!\d)\d{1,3}(?!\d)')
+
+
+class FolderInfoCache:
+    """AI文件夹信息持久化缓存（SQLite）
+
+    以规范化后的文件夹名和样本文件名（去掉集数标记）为键，支持过期时间（TTL）和按最近访问时间淘汰（LRU），
+    插件重载或重启后仍可复用，避免重建索引时重复调用API。
+    只按两者同时匹配查找：同一剧集新增的集可以命中，不同剧集下同名的文件夹（如 Season 1）互不混用。
+    """
+
+    def __init__(self, db_path: str, ttl_days: float = 30, max_size: int = 10000):
+        self._ttl = max(float(ttl_days or 0), 0) * 86400
+        self._max_size = max(int(max_size or 0), 0)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.hits = 0
+        self.misses = 0
+        self._init_schema()
+        self._size = self._conn.execute("SELECT COUNT(*) FROM folder_cache").fetchone()[0]
+
+    def _init_schema(self):
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS folder_cache (
+                    folder_key TEXT NOT NULL,
+                    sample_key TEXT NOT NULL,
+                    data TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    PRIMARY KEY (folder_key, sample_key)
+                );
+                CREATE INDEX IF NOT EXISTS idx_folder_cache_accessed ON folder_cache(accessed_at);
+            """)
+            self._conn.commit()
+
+    @staticmethod
+    def normalize(name: str, strip_suffix: bool = False) -> str:
+        """规范化名称：统一分隔符和大小写，文件名可去掉扩展名"""
+        name = str(name or "").strip()
+        if strip_suffix:
+            name = Path(name).stem
+        return re.sub(r'[\s._\-]+', ' ', name).strip().lower()
+
+    @classmethod
+    def sample_key(cls, sample_filename: str) -> str:
+        """样本文件名的键：去掉扩展名和集数标记后规范化"""
+        return cls.normalize(_EPISODE_MARK_RE.sub(" ", Path(str(sample_filename or "")).stem))
+
+    def get(self, folder_name: str, sample_filename: str = None) -> Optional[Dict]:
+        """读取缓存，文件夹名和样本文件名都匹配才命中"""
+        folder_key = self.normalize(folder_name)
+        sample_key = self.sample_key(sample_filename)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT sample_key, data, created_at FROM folder_cache WHERE folder_key = ? AND sample_key = ?",
+                (folder_key, sample_key)
+            ).fetchone()
+            if row and self._ttl and now - row[2] > self._ttl:
+                self._conn.execute("DELETE FROM folder_cache WHERE folder_key = ? AND sample_key = ?",
+                                   (folder_key, row[0]))
+                self._conn.commit()
+                self._size -= 1
+                row = None
+            if not row:
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE folder_cache SET accessed_at = ? WHERE folder_key = ? AND sample_key = ?",
+                (now, folder_key, row[0])
+            )
+            self._conn.commit()
+            self.hits += 1
+        try:
+            return json.loads(row[1])
+        except ValueError:
+            return None
+
+    def set(self, folder_name: str, sample_filename: str, data: Dict):
+        """写入缓存，超出容量时淘汰最久未访问的记录"""
+        folder_key = self.normalize(folder_name)
+        sample_key = self.sample_key(sample_filename)
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO folder_cache (folder_key, sample_key, data, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (folder_key, sample_key, json.dumps(data, ensure_ascii=False), now, now)
+            )
+            if cursor.rowcount:
+                self._size += 1
+            else:
+                self._conn.execute(
+                    "UPDATE folder_cache SET data = ?, created_at = ?, accessed_at = ? "
+                    "WHERE folder_key = ? AND sample_key = ?",
+                    (json.dumps(data, ensure_ascii=False), now, now, folder_key, sample_key)
+                )
+            if self._max_size and self._size > self._max_size:
+                self._evict(self._size - self._max_size)
+            self._conn.commit()
+
+    def _evict(self, count: int):
+        self._conn.execute(
+            "DELETE FROM folder_cache WHERE rowid IN "
+            "(SELECT rowid FROM folder_cache ORDER BY accessed_at ASC LIMIT ?)",
+            (count,)
+        )
+        self._size = self._conn.execute("SELECT COUNT(*) FROM folder_cache").fetchone()[0]
+
+    def purge_expired(self) -> int:
+        """清理过期记录"""
+        if not self._ttl:
+            return 0
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM folder_cache WHERE created_at < ?",
+                                        (time.time() - self._ttl,))
+            self._conn.commit()
+            self._size -= cursor.rowcount
+            return cursor.rowcount
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": self._size}
+
+    def close(self):
+        with self._lock:
+            try:
+                self._conn.commit()
+                self._conn.close()
+            except sqlite3.Error as e:
+                logger.error(f"[CloudStrmAI] 关闭缓存失败: {e}")
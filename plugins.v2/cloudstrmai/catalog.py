@@ -0,0 +1,547 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from app.log import logger
+
+
+class FileCatalog:
+    """已处理文件索引（SQLite）
+
+    记录源文件的大小、修改时间、所属源目录以及生成的strm路径，替代原先 cloudstrmai_files.json 中的线性列表。
+
+    紧凑存储：目录路径（源文件所在目录、strm所在目录、源目录）只在paths表中保存一次，
+    文件记录只保存 (目录id, 文件名)，同一目录下的大量文件不再重复保存相同的长前缀；
+    文件记录以 (目录id, 文件名) 为主键（WITHOUT ROWID），成员检查先在内存中查目录id再走主键。
+
+    使用WAL日志：每次提交只追加变化的页，处理过程中定期提交，中断的运行不会丢失已处理的文件；
+    扫描结束后执行checkpoint，将日志合并回数据库文件。
+    """
+
+    # 按目录拼接完整路径：目录路径以/结尾，直接拼接文件名
+    _SELECT = ("SELECT f.path || e.name AS path, s.path AS source_dir, e.size, e.mtime, "
+               "t.path || e.strm_name AS strm_path, e.updated_at FROM entries e "
+               "JOIN paths f ON f.id = e.folder JOIN paths s ON s.id = e.source_dir "
+               "LEFT JOIN paths t ON t.id = e.strm_folder")
+
+    def __init__(self, db_path: str, commit_interval: float = 5, commit_batch: int = 500):
+        """
+        Args:
+            commit_interval: 有未提交记录时，距上次提交超过该秒数即提交
+            commit_batch: 未提交记录达到该数量即提交
+        """
+        self._db_path = db_path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._commit_interval = commit_interval
+        self._commit_batch = commit_batch
+        self._pending = 0
+        self._last_commit = time.monotonic()
+        # 路径 -> id（目录数远少于文件数，全部缓存在内存中）
+        self._path_ids: Dict[str, int] = {}
+        # 缓存是否包含全部路径：完整时未命中即不存在，不再查询数据库
+        self._path_ids_complete = False
+        # 数据库的修改计数（其他连接提交时变化），用于判断内存缓存是否失效
+        self._data_version: Optional[int] = None
+        # 累计提交耗时（秒）
+        self.commit_seconds = 0.0
+        self._init_schema()
+
+    def _init_schema(self):
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS paths (
+                    id INTEGER PRIMARY KEY,
+                    path TEXT NOT NULL UNIQUE
+                );
+                CREATE TABLE IF NOT EXISTS entries (
+                    folder INTEGER NOT NULL,
+                    name TEXT NOT NULL,
+                    source_dir INTEGER NOT NULL,
+                    size INTEGER,
+                    mtime REAL,
+                    strm_folder INTEGER,
+                    strm_name TEXT,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (folder, name)
+                ) WITHOUT ROWID;
+                CREATE INDEX IF NOT EXISTS idx_entries_source_dir ON entries(source_dir);
+                CREATE INDEX IF NOT EXISTS idx_entries_strm ON entries(strm_folder, strm_name);
+                CREATE TABLE IF NOT EXISTS dirs (
+                    path TEXT PRIMARY KEY,
+                    source_dir TEXT NOT NULL,
+                    mtime REAL,
+                    subdirs TEXT,
+                    scanned_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_dirs_source_dir ON dirs(source_dir);
+                CREATE TABLE IF NOT EXISTS retries (
+                    folder TEXT PRIMARY KEY,
+                    source_dir TEXT NOT NULL,
+                    name TEXT,
+                    sample TEXT,
+                    attempts INTEGER NOT NULL,
+                    next_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_retries_source_dir ON retries(source_dir, next_at);
+                CREATE TABLE IF NOT EXISTS meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                );
+            """)
+            self._conn.commit()
+            self._migrate_files_table()
+
+    def _migrate_files_table(self):
+        """将旧版以完整路径为主键的files表转换为紧凑格式，完成后压缩数据库文件"""
+        if not self._conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'files'").fetchone():
+            return
+        count = 0
+        cursor = self._conn.execute("SELECT path, source_dir, size, mtime, strm_path, updated_at FROM files")
+        while True:
+            rows = cursor.fetchmany(5000)
+            if not rows:
+                break
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO entries (folder, name, source_dir, size, mtime, strm_folder, strm_name, "
+                "updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [self._entry(row[0], row[1], row[2], row[3], row[4], row[5]) for row in rows]
+            )
+            count += len(rows)
+        self._conn.execute("DROP TABLE files")
+        self._conn.commit()
+        self._conn.execute("VACUUM")
+        logger.info(f"[CloudStrmAI] 索引已转换为紧凑格式: {count}条")
+
+    def load(self) -> int:
+        """将全部路径id载入内存，之后的运行直接复用，不再逐个目录查询paths表
+
+        Returns:
+            int: 路径数量
+        """
+        with self._lock:
+            self._path_ids = {row[0]: row[1] for row in self._conn.execute("SELECT path, id FROM paths")}
+            self._path_ids_complete = True
+            self._data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            return len(self._path_ids)
+
+    def refresh(self) -> bool:
+        """检查数据库是否被其他连接（如另一个进程）修改过，修改过则重新载入路径缓存
+
+        本连接自身的写入不改变data_version，内存中的缓存在运行之间保持有效；
+        回滚后缓存不完整时也重新载入。
+
+        Returns:
+            bool: 是否被其他连接修改过
+        """
+        with self._lock:
+            version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            changed = version != self._data_version
+            if changed or not self._path_ids_complete:
+                self.load()
+            return changed
+
+    def _invalidate(self):
+        """清空路径缓存，之后按需查询"""
+        self._path_ids.clear()
+        self._path_ids_complete = False
+
+    @staticmethod
+    def _split(path: str) -> Tuple[str, str]:
+        """拆分为以/结尾的目录路径和文件名"""
+        index = path.rfind("/") + 1
+        return path[:index], path[index:]
+
+    def _path_id(self, path: str, create: bool = False) -> Optional[int]:
+        """路径字符串的id，不存在时按需创建"""
+        path_id = self._path_ids.get(path)
+        if path_id is not None:
+            return path_id
+        if not self._path_ids_complete:
+            row = self._conn.execute("SELECT id FROM paths WHERE path = ?", (path,)).fetchone()
+            if row:
+                self._path_ids[path] = row[0]
+                return row[0]
+        if not create:
+            return None
+        try:
+            path_id = self._conn.execute("INSERT INTO paths (path) VALUES (?)", (path,)).lastrowid
+        except sqlite3.IntegrityError:
+            # 载入缓存后由其他连接新建
+            path_id = self._conn.execute("SELECT id FROM paths WHERE path = ?", (path,)).fetchone()[0]
+        self._path_ids[path] = path_id
+        return path_id
+
+    def _key(self, path: str) -> Optional[Tuple[int, str]]:
+        """文件记录主键 (目录id, 文件名)，目录没有记录时返回None"""
+        folder, name = self._split(path)
+        folder_id = self._path_id(folder)
+        return (folder_id, name) if folder_id is not None else None
+
+    def _entry(self, path: str, source_dir: str, size: Optional[int], mtime: Optional[float],
+               strm_path: Optional[str], updated_at: float) -> Tuple:
+        folder, name = self._split(path)
+        strm_folder, strm_name = self._split(strm_path) if strm_path else (None, None)
+        return (self._path_id(folder, create=True), name, self._path_id(source_dir, create=True), size, mtime,
+                self._path_id(strm_folder, create=True) if strm_folder is not None else None, strm_name,
+                updated_at)
+
+    def _prune_paths(self):
+        """删除不再被文件记录引用的路径"""
+        self._conn.execute(
+            "DELETE FROM paths WHERE id NOT IN (SELECT folder FROM entries) "
+            "AND id NOT IN (SELECT source_dir FROM entries) "
+            "AND id NOT IN (SELECT strm_folder FROM entries WHERE strm_folder IS NOT NULL)"
+        )
+        if self._path_ids_complete:
+            self.load()
+        else:
+            self._invalidate()
+
+    def __contains__(self, path: str) -> bool:
+        with self._lock:
+            key = self._key(path)
+            row = self._conn.execute("SELECT 1 FROM entries WHERE folder = ? AND name = ?",
+                                     key).fetchone() if key else None
+        return row is not None
+
+    def get(self, path: str) -> Optional[Dict]:
+        """获取单个文件记录"""
+        with self._lock:
+            key = self._key(path)
+            row = self._conn.execute(f"{self._SELECT} WHERE e.folder = ? AND e.name = ?",
+                                     key).fetchone() if key else None
+        return dict(row) if row else None
+
+    def folder_names(self, folder: str) -> Set[str]:
+        """文件夹下直接包含的已记录文件名，用于批量成员检查"""
+        with self._lock:
+            folder_id = self._path_id(folder.rstrip("/") + "/")
+            if folder_id is None:
+                return set()
+            return {row[0] for row in self._conn.execute("SELECT name FROM entries WHERE folder = ?", (folder_id,))}
+
+    def add(self, path: str, source_dir: str, size: Optional[int] = None,
+            mtime: Optional[float] = None, strm_path: Optional[str] = None):
+        """新增或更新文件记录（需调用commit落盘）"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (folder, name, source_dir, size, mtime, strm_folder, strm_name, "
+                "updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                self._entry(path, source_dir, size, mtime, strm_path, time.time())
+            )
+            self._pending += 1
+
+    def set_strm_path(self, path: str, strm_path: Optional[str]):
+        """更新生成的strm路径（需调用commit落盘）"""
+        with self._lock:
+            key = self._key(path)
+            if not key:
+                return
+            strm_folder, strm_name = self._split(strm_path) if strm_path else (None, None)
+            self._conn.execute(
+                "UPDATE entries SET strm_folder = ?, strm_name = ?, updated_at = ? WHERE folder = ? AND name = ?",
+                (self._path_id(strm_folder, create=True) if strm_folder is not None else None, strm_name,
+                 time.time(), *key)
+            )
+
+    def iter_targets(self, source_dir: str, batch_size: int = 1000) -> Iterator[Tuple[str, str]]:
+        """按strm目录分组分批返回 (源文件, strm路径)，不一次性加载全部记录"""
+        with self._lock:
+            source_id = self._path_id(source_dir)
+        if source_id is None:
+            return
+        last = (0, "", 0, "")
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT f.path || e.name, t.path || e.strm_name, e.strm_folder, e.strm_name, e.folder, e.name "
+                    "FROM entries e JOIN paths f ON f.id = e.folder JOIN paths t ON t.id = e.strm_folder "
+                    "WHERE e.source_dir = ? AND (e.strm_folder, e.strm_name, e.folder, e.name) > (?, ?, ?, ?) "
+                    "ORDER BY e.strm_folder, e.strm_name, e.folder, e.name LIMIT ?",
+                    (source_id, *last, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield row[0], row[1]
+            last = tuple(rows[-1])[2:]
+
+    def untracked_targets(self, source_dir: str) -> List[str]:
+        """没有记录strm路径的源文件（旧版索引迁移而来）"""
+        with self._lock:
+            source_id = self._path_id(source_dir)
+            if source_id is None:
+                return []
+            rows = self._conn.execute(
+                "SELECT f.path || e.name FROM entries e JOIN paths f ON f.id = e.folder "
+                "WHERE e.source_dir = ? AND e.strm_folder IS NULL", (source_id,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def stale_entries(self, folder: str, names: Set[str]) -> List[Tuple[str, Optional[str]]]:
+        """文件夹下已不存在的文件记录
+
+        直接子文件不在names中的，以及位于names中没有的子目录（按路径范围查询）下的全部记录。
+
+        Args:
+            folder: 本次列出的文件夹
+            names: 文件夹中现有的文件名和子目录名
+
+        Returns:
+            List: [(源文件, strm路径)]
+        """
+        prefix = folder.rstrip("/") + "/"
+        stale = [(path, strm_path) for path, strm_path in self.folder_files(folder)
+                 if path[len(prefix):] not in names]
+        with self._lock:
+            subfolders = [row[0] for row in self._conn.execute(
+                "SELECT id, path FROM paths WHERE path > ? AND path < ?", (prefix, prefix[:-1] + "0"))
+                if row[1][len(prefix):].split("/", 1)[0] not in names]
+            for folder_id in subfolders:
+                stale.extend((row[0], row[1]) for row in self._conn.execute(
+                    "SELECT f.path || e.name, t.path || e.strm_name FROM entries e JOIN paths f ON f.id = e.folder "
+                    "LEFT JOIN paths t ON t.id = e.strm_folder WHERE e.folder = ?", (folder_id,)))
+        return stale
+
+    def folder_files(self, folder: str) -> List[Tuple[str, Optional[str]]]:
+        """文件夹下直接包含的文件记录 [(源文件, strm路径)]"""
+        prefix = folder.rstrip("/") + "/"
+        with self._lock:
+            folder_id = self._path_id(prefix)
+            if folder_id is None:
+                return []
+            rows = self._conn.execute(
+                "SELECT e.name, t.path || e.strm_name FROM entries e LEFT JOIN paths t ON t.id = e.strm_folder "
+                "WHERE e.folder = ?", (folder_id,)
+            ).fetchall()
+        return [(prefix + row[0], row[1]) for row in rows]
+
+    def remove(self, paths: List[str]):
+        """删除文件记录（需调用commit落盘）"""
+        with self._lock:
+            keys = [key for key in (self._key(path) for path in paths) if key]
+            self._conn.executemany("DELETE FROM entries WHERE folder = ? AND name = ?", keys)
+            self._pending += len(keys)
+
+    def is_target(self, strm_path: str) -> bool:
+        """是否仍有文件记录使用该strm路径"""
+        with self._lock:
+            key = self._key(strm_path)
+            row = self._conn.execute("SELECT 1 FROM entries WHERE strm_folder = ? AND strm_name = ? LIMIT 1",
+                                     key).fetchone() if key else None
+        return row is not None
+
+    def target_sources(self, strm_path: str) -> List[str]:
+        """使用该strm路径的源文件"""
+        with self._lock:
+            key = self._key(strm_path)
+            rows = self._conn.execute(
+                "SELECT f.path || e.name FROM entries e JOIN paths f ON f.id = e.folder "
+                "WHERE e.strm_folder = ? AND e.strm_name = ?", key
+            ).fetchall() if key else []
+        return [row[0] for row in rows]
+
+    def count(self, source_dir: str = None) -> int:
+        with self._lock:
+            if source_dir:
+                source_id = self._path_id(source_dir)
+                if source_id is None:
+                    return 0
+                row = self._conn.execute("SELECT COUNT(*) FROM entries WHERE source_dir = ?",
+                                         (source_id,)).fetchone()
+            else:
+                row = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()
+        return row[0]
+
+    def is_empty(self) -> bool:
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM entries LIMIT 1").fetchone()
+        return row is None
+
+    def clear(self, source_dir: str = None):
+        """清空索引（需调用commit落盘）"""
+        with self._lock:
+            if source_dir:
+                self._conn.execute("DELETE FROM entries WHERE source_dir = (SELECT id FROM paths WHERE path = ?)",
+                                   (source_dir,))
+            else:
+                self._conn.execute("DELETE FROM entries")
+            self._prune_paths()
+
+    def retain(self, source_dirs: List[str]):
+        """删除不属于给定源目录的记录（需调用commit落盘）"""
+        placeholders = ",".join("?" * len(source_dirs))
+        with self._lock:
+            self._conn.execute(f"DELETE FROM entries WHERE source_dir NOT IN "
+                               f"(SELECT id FROM paths WHERE path IN ({placeholders}))", source_dirs)
+            for table in ("dirs", "retries"):
+                self._conn.execute(f"DELETE FROM {table} WHERE source_dir NOT IN ({placeholders})", source_dirs)
+            self._prune_paths()
+
+    def get_dir(self, path: str) -> Optional[Dict]:
+        """获取目录上次扫描时的状态"""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM dirs WHERE path = ?", (path,)).fetchone()
+        if not row:
+            return None
+        record = dict(row)
+        record["subdirs"] = json.loads(record["subdirs"]) if record["subdirs"] else []
+        return record
+
+    def set_dirs(self, source_dir: str, states: Dict[str, Tuple[Optional[float], List[str]]]):
+        """保存目录状态（需调用commit落盘）
+
+        Args:
+            states: 目录路径 -> (修改时间, 子目录名列表)
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO dirs (path, source_dir, mtime, subdirs, scanned_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(path, source_dir, mtime, json.dumps(subdirs, ensure_ascii=False), now)
+                 for path, (mtime, subdirs) in states.items()]
+            )
+
+    def clear_dirs(self, source_dir: str = None):
+        """清空目录状态，下次扫描完整遍历（需调用commit落盘）"""
+        with self._lock:
+            if source_dir:
+                self._conn.execute("DELETE FROM dirs WHERE source_dir = ?", (source_dir,))
+            else:
+                self._conn.execute("DELETE FROM dirs")
+
+    def add_retry(self, folder: str, source_dir: str, name: str, sample: str,
+                  backoff: float = 600, max_backoff: float = 86400, count: bool = True) -> int:
+        """记录一次AI命名失败，下次重试时间按失败次数指数退避（需调用commit落盘）
+
+        Args:
+            count: 计入失败次数；未实际请求（后端均已熔断）时只重新安排重试时间
+
+        Returns:
+            int: 累计失败次数
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT attempts FROM retries WHERE folder = ?", (folder,)).fetchone()
+            attempts = (row[0] if row else 0) + (1 if count else 0)
+            next_at = time.time() + min(backoff * 2 ** max(attempts - 1, 0), max_backoff)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO retries (folder, source_dir, name, sample, attempts, next_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)", (folder, source_dir, name, sample, attempts, next_at)
+            )
+        return attempts
+
+    def due_retries(self, source_dir: str, limit: int = 500) -> List[Dict]:
+        """已到重试时间的文件夹"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM retries WHERE source_dir = ? AND next_at <= ? ORDER BY next_at LIMIT ?",
+                (source_dir, time.time(), limit)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def remove_retry(self, folder: str):
+        """移出重试队列（需调用commit落盘）"""
+        with self._lock:
+            self._conn.execute("DELETE FROM retries WHERE folder = ?", (folder,))
+
+    def retry_count(self, source_dir: str = None) -> int:
+        with self._lock:
+            if source_dir:
+                row = self._conn.execute("SELECT COUNT(*) FROM retries WHERE source_dir = ?",
+                                         (source_dir,)).fetchone()
+            else:
+                row = self._conn.execute("SELECT COUNT(*) FROM retries").fetchone()
+        return row[0]
+
+    def get_meta(self, key: str, default: str = None) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key: str, value: Any):
+        """保存元数据（需调用commit落盘）"""
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def commit(self):
+        with self._lock:
+            start = time.perf_counter()
+            self._conn.commit()
+            self._pending = 0
+            self._last_commit = time.monotonic()
+            self.commit_seconds += time.perf_counter() - start
+
+    def commit_if_due(self):
+        """未提交记录较多或距上次提交较久时提交"""
+        with self._lock:
+            if self._pending >= self._commit_batch or \
+                    (self._pending and time.monotonic() - self._last_commit >= self._commit_interval):
+                self.commit()
+
+    def checkpoint(self):
+        """提交并将WAL日志合并回数据库文件，截断日志"""
+        with self._lock:
+            try:
+                self.commit()
+                start = time.perf_counter()
+                self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                self.commit_seconds += time.perf_counter() - start
+            except sqlite3.Error as e:
+                logger.error(f"[CloudStrmAI] 索引checkpoint失败: {e}")
+
+    def rollback(self):
+        with self._lock:
+            self._conn.rollback()
+            # 回滚后新建的路径id失效
+            self._invalidate()
+
+    def close(self):
+        with self._lock:
+            try:
+                self._conn.commit()
+                self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                self._conn.close()
+            except sqlite3.Error as e:
+                logger.error(f"[CloudStrmAI] 关闭索引失败: {e}")
+
+    def migrate_from_json(self, json_path: str, source_dirs: List[str]) -> int:
+        """从旧版 cloudstrmai_files.json 一次性迁移
+
+        旧文件只有路径列表，大小和修改时间留空，迁移完成后重命名为 .migrated 保留备份。
+
+        Returns:
+            int: 迁移的记录数
+        """
+        if not os.path.exists(json_path):
+            return 0
+        try:
+            with open(json_path, 'r') as file:
+                content = file.read()
+            paths = json.loads(content) if content else []
+        except Exception as e:
+            logger.error(f"[CloudStrmAI] 读取旧索引失败: {e}")
+            return 0
+
+        # 按最长前缀匹配所属源目录
+        source_dirs = sorted(source_dirs, key=len, reverse=True)
+        now = time.time()
+        with self._lock:
+            rows = [self._entry(str(path), next((d for d in source_dirs if str(path).startswith(d)), ""),
+                                None, None, None, now) for path in paths]
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO entries (folder, name, source_dir, size, mtime, strm_folder, strm_name, "
+                "updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+            self._conn.commit()
+
+        os.replace(json_path, f"{json_path}.migrated")
+        logger.info(f"[CloudStrmAI] 旧索引已迁移: {len(rows)}条")
+        return len(rows)
@@ -0,0 +1,155 @@
+import threading
+import time
+from typing import Callable, Dict
+
+from app.log import logger
+
+
+class RunCancelled(Exception):
+    """插件停止，运行中的任务中止"""
+    pass
+
+
+class RunCoordinator:
+    """运行协调
+
+    定时扫描、重建索引、远程命令、立即运行一次和实时监控可能同时触发，同一源目录同一时间只允许一个任务运行；
+    运行期间到达的触发合并为一次后续运行，由正在运行的线程在结束后执行。
+    试运行和应用计划需要在返回时确定已完成，使用run等待源目录空闲，不合并。
+    """
+
+    IDLE = "idle"
+    RUNNING = "running"
+    QUEUED = "queued"
+
+    # 任务优先级：排队的任务只保留优先级最高的一个（重建索引包含扫描）
+    _PRIORITY = {"scan": 1, "rebuild": 2}
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # 源目录结束运行时通知等待的任务
+        self._idle = threading.Condition(self._lock)
+        # 源目录 -> 正在运行的任务名
+        self._running: Dict[str, str] = {}
+        # 源目录 -> (排队的任务名, 任务函数)
+        self._queued: Dict[str, tuple] = {}
+        # 源目录 -> 运行信息
+        self._info: Dict[str, Dict] = {}
+
+    def submit(self, key: str, job: str, func: Callable[[], None]) -> bool:
+        """运行任务，该源目录正在运行时合并为一次后续运行并立即返回
+
+        Returns:
+            bool: 是否在当前线程运行
+        """
+        with self._lock:
+            if key in self._running:
+                queued = self._queued.get(key)
+                if not queued or self._PRIORITY.get(job, 0) >= self._PRIORITY.get(queued[0], 0):
+                    self._queued[key] = (job, func)
+                logger.info(f"[CloudStrmAI] ⏳ {key} 正在运行{self._running[key]}，{job}已合并到下一次运行")
+                return False
+            self._start(key, job)
+
+        while True:
+            cancelled = False
+            try:
+                func()
+            except RunCancelled:
+                logger.info(f"[CloudStrmAI] ⏹ 插件已停止，{job}中止: {key}")
+                cancelled = True
+            except Exception as e:
+                logger.error(f"[CloudStrmAI] {job}运行失败: {key} {str(e)}")
+            with self._lock:
+                self._info[key]["finished_at"] = time.time()
+                self._info[key]["last_job"] = job
+                queued = self._queued.pop(key, None)
+                if not queued or cancelled:
+                    self._finish(key)
+                    return True
+                job, func = queued
+                self._start(key, job)
+
+    def try_run(self, key: str, job: str, func: Callable[[], None]) -> bool:
+        """源目录空闲时运行任务，否则不运行也不排队
+
+        Returns:
+            bool: 是否已运行
+        """
+        with self._lock:
+            if key in self._running:
+                return False
+            self._start(key, job)
+        return self._run_started(key, job, func)
+
+    def run(self, key: str, job: str, func: Callable[[], None], cancelled: Callable[[], bool] = None) -> bool:
+        """等待该源目录空闲后运行任务，不合并到正在运行的任务
+
+        Args:
+            cancelled: 等待期间返回True时放弃运行（插件停止）
+
+        Returns:
+            bool: 是否已运行
+        """
+        with self._lock:
+            if key in self._running:
+                logger.info(f"[CloudStrmAI] ⏳ {key} 正在运行{self._running[key]}，{job}等待其完成")
+            while key in self._running:
+                if cancelled and cancelled():
+                    return False
+                self._idle.wait(1)
+            self._start(key, job)
+        return self._run_started(key, job, func)
+
+    def _run_started(self, key: str, job: str, func: Callable[[], None]) -> bool:
+        try:
+            func()
+        except RunCancelled:
+            logger.info(f"[CloudStrmAI] ⏹ 插件已停止，{job}中止: {key}")
+            return True
+        finally:
+            with self._lock:
+                self._info[key]["finished_at"] = time.time()
+                self._info[key]["last_job"] = job
+                self._finish(key)
+        # 运行期间到达的触发
+        with self._lock:
+            queued = self._queued.pop(key, None)
+        if queued:
+            self.submit(key, *queued)
+        return True
+
+    def _start(self, key: str, job: str):
+        self._running[key] = job
+        self._info.setdefault(key, {})["started_at"] = time.time()
+
+    def _finish(self, key: str):
+        self._running.pop(key, None)
+        self._idle.notify_all()
+
+    def state(self, key: str) -> str:
+        with self._lock:
+            if key in self._queued:
+                return self.QUEUED
+            return self.RUNNING if key in self._running else self.IDLE
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """所有源目录的运行状态"""
+        with self._lock:
+            result = {}
+            for key, info in self._info.items():
+                queued = self._queued.get(key)
+                result[key] = {
+                    "state": self.QUEUED if queued else self.RUNNING if key in self._running else self.IDLE,
+                    "job": self._running.get(key),
+                    "queued_job": queued[0] if queued else None,
+                    "started_at": info.get("started_at"),
+                    "finished_at": info.get("finished_at"),
+                    "last_job": info.get("last_job"),
+                }
+            return result
+
+    def clear(self):
+        """丢弃排队的任务（插件停止时）"""
+        with self._lock:
+            self._queued.clear()
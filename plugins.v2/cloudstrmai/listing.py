@@ -0,0 +1,207 @@
+from abc import ABC, abstractmethod
+import posixpath
+import urllib.parse
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.log import logger
+
+
+class CloudEntry(NamedTuple):
+    """云盘目录条目"""
+    name: str
+    is_dir: bool
+    size: Optional[int] = None
+    mtime: Optional[float] = None
+
+
+class CloudListError(Exception):
+    """云盘API列目录失败"""
+    pass
+
+
+class CloudLister(ABC):
+    """通过云盘API列目录，替代遍历本地挂载
+
+    本地路径与云盘路径的映射与strm地址一致：云盘路径 = 本地路径去掉挂载路径(cloud_path)前缀。
+    """
+
+    def __init__(self, base_url: str, cloud_path: str, concurrency: int = 4, timeout: int = 30):
+        self.base_url = base_url.rstrip("/")
+        self.cloud_path = cloud_path.rstrip("/")
+        self._concurrency = max(int(concurrency or 1), 1)
+        self._timeout = timeout
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self._concurrency)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+
+    def to_remote(self, local_path: str) -> str:
+        path = local_path.replace("\\", "/")
+        if self.cloud_path and path.startswith(self.cloud_path):
+            path = path[len(self.cloud_path):]
+        return "/" + path.strip("/")
+
+    def to_local(self, remote_path: str) -> str:
+        return self.cloud_path + remote_path if remote_path != "/" else self.cloud_path or "/"
+
+    @abstractmethod
+    def list_dir(self, remote_path: str) -> List[CloudEntry]:
+        """列出单个目录，失败时抛出CloudListError"""
+
+    def walk(self, local_root: str, dir_filter: Callable[[str], bool] = None
+             ) -> Iterator[Tuple[str, List[str], Dict[str, Tuple[Optional[int], Optional[float]]], List[str]]]:
+        """并发遍历目录树，按完成先后返回
+
+        根目录列出失败时抛出CloudListError，由调用方回退到本地遍历；子目录失败只记录日志。
+
+        Args:
+            local_root: 本地源目录
+            dir_filter: 子目录过滤，返回False的目录不再向下遍历
+
+        Yields:
+            Tuple: (本地目录路径, 文件名列表, 文件名 -> (大小, 修改时间), 子目录名列表（含被过滤的）)
+        """
+        root = self.to_remote(local_root)
+        entries = self.list_dir(root)
+        with ThreadPoolExecutor(max_workers=self._concurrency, thread_name_prefix="CloudStrmAI-List") as executor:
+            futures = {}
+            pending = [(root, entries)]
+            while pending or futures:
+                for remote_dir, dir_entries in pending:
+                    files, stats, dirs = [], {}, []
+                    for entry in dir_entries:
+                        child = posixpath.join(remote_dir, entry.name)
+                        if entry.is_dir:
+                            dirs.append(entry.name)
+                            if not dir_filter or dir_filter(self.to_local(child)):
+                                futures[executor.submit(self.list_dir, child)] = child
+                        else:
+                            files.append(entry.name)
+                            stats[entry.name] = (entry.size, entry.mtime)
+                    yield self.to_local(remote_dir), files, stats, dirs
+                pending = []
+                if not futures:
+                    break
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    remote_dir = futures.pop(future)
+                    try:
+                        pending.append((remote_dir, future.result()))
+                    except Exception as e:
+                        logger.warning(f"[CloudStrmAI] 云盘目录列出失败: {remote_dir} {str(e)}")
+
+    def close(self):
+        self._session.close()
+
+
+class AlistLister(CloudLister):
+    """Alist fs/list 接口，分页列出大目录"""
+
+    def __init__(self, base_url: str, cloud_path: str, token: str = None, page_size: int = 200, **kwargs):
+        super().__init__(base_url, cloud_path, **kwargs)
+        self._page_size = page_size
+        if token:
+            self._session.headers.update({"Authorization": token})
+
+    def list_dir(self, remote_path: str) -> List[CloudEntry]:
+        entries = []
+        page = 1
+        while True:
+            try:
+                response = self._session.post(f"{self.base_url}/api/fs/list", json={
+                    "path": remote_path,
+                    "password": "",
+                    "page": page,
+                    "per_page": self._page_size,
+                    "refresh": False
+                }, timeout=self._timeout)
+                result = response.json()
+            except (requests.RequestException, ValueError) as e:
+                raise CloudListError(str(e))
+            if result.get("code") != 200:
+                raise CloudListError(f"[{result.get('code')}] {result.get('message')}")
+
+            data = result.get("data") or {}
+            content = data.get("content") or []
+            for item in content:
+                entries.append(CloudEntry(
+                    name=item.get("name"),
+                    is_dir=bool(item.get("is_dir")),
+                    size=item.get("size"),
+                    mtime=self._parse_time(item.get("modified"))
+                ))
+            total = data.get("total") or 0
+            if not content or len(entries) >= total:
+                return entries
+            page += 1
+
+    @staticmethod
+    def _parse_time(value: str) -> Optional[float]:
+        if not value:
+            return None
+        try:
+            # 兼容超过6位的小数秒
+            value = value.replace("Z", "+00:00")
+            if "." in value:
+                head, tail = value.split(".", 1)
+                digits = len(tail) - len(tail.lstrip("0123456789"))
+                value = f"{head}.{tail[:min(digits, 6)]}{tail[digits:]}"
+            return datetime.fromisoformat(value).timestamp()
+        except ValueError:
+            return None
+
+
+class WebDavLister(CloudLister):
+    """WebDAV PROPFIND 列目录（CloudDrive2 内置WebDAV服务）"""
+
+    _NS = {"d": "DAV:"}
+
+    def __init__(self, base_url: str, cloud_path: str, auth: str = None, dav_prefix: str = "/dav", **kwargs):
+        super().__init__(base_url, cloud_path, **kwargs)
+        self._dav_prefix = "/" + dav_prefix.strip("/") if dav_prefix else ""
+        if auth and ":" in auth:
+            self._session.auth = tuple(auth.split(":", 1))
+
+    def list_dir(self, remote_path: str) -> List[CloudEntry]:
+        url_path = self._dav_prefix + urllib.parse.quote(remote_path.rstrip("/") + "/")
+        try:
+            response = self._session.request("PROPFIND", f"{self.base_url}{url_path}",
+                                             headers={"Depth": "1"}, timeout=self._timeout)
+        except requests.RequestException as e:
+            raise CloudListError(str(e))
+        if response.status_code != 207:
+            raise CloudListError(f"[{response.status_code}]")
+        try:
+            root = ET.fromstring(response.content)
+        except ET.ParseError as e:
+            raise CloudListError(str(e))
+
+        self_path = urllib.parse.unquote(url_path).rstrip("/")
+        entries = []
+        for item in root.findall("d:response", self._NS):
+            href = urllib.parse.unquote(urllib.parse.urlparse(item.findtext("d:href", "", self._NS)).path)
+            if href.rstrip("/") == self_path:
+                continue
+            prop = item.find("d:propstat/d:prop", self._NS)
+            if prop is None:
+                continue
+            size = prop.findtext("d:getcontentlength", None, self._NS)
+            modified = prop.findtext("d:getlastmodified", None, self._NS)
+            try:
+                mtime = parsedate_to_datetime(modified).timestamp() if modified else None
+            except (TypeError, ValueError):
+                mtime = None
+            entries.append(CloudEntry(
+                name=posixpath.basename(href.rstrip("/")),
+                is_dir=prop.find("d:resourcetype/d:collection", self._NS) is not None,
+                size=int(size) if size and size.isdigit() else None,
+                mtime=mtime
+            ))
+        return entries
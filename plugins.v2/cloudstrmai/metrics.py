@@ -0,0 +1,159 @@
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence
+
+# 阶段：遍历目录、查询索引、获取文件夹信息、写strm/复制、提交索引、检查目标
+PHASES = ("walk", "lookup", "resolve", "write", "commit", "reconcile")
+
+
+def percentile(values: Sequence[float], p: float) -> Optional[float]:
+    """百分位数（最近秩），无数据时返回None"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(max(math.ceil(p / 100 * len(ordered)) - 1, 0), len(ordered) - 1)
+    return ordered[index]
+
+
+class RunMetrics:
+    """单次运行（一个源目录的一次扫描、重建或实时处理）的分阶段耗时和计数
+
+    各阶段耗时为累计的工作时间，写入、AI等在多个线程中并行的阶段累计值可能超过总耗时。
+    """
+
+    def __init__(self, job: str, source_dir: str):
+        self.job = job
+        self.source_dir = source_dir
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+        self._start = time.perf_counter()
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.phases: Dict[str, float] = {phase: 0.0 for phase in PHASES}
+        self.counters: Dict[str, int] = {
+            "files_seen": 0,
+            "new_files": 0,
+            "folders": 0,
+            "strm": 0,
+            "copied": 0,
+            "failures": 0,
+        }
+        self.duration: Optional[float] = None
+        self.api_latency: Dict[str, Optional[float]] = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def add_time(self, name: str, seconds: float):
+        with self._lock:
+            self.phases[name] = self.phases.get(name, 0.0) + seconds
+            self._updated = time.monotonic()
+
+    def incr(self, name: str, value: int = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+            self._updated = time.monotonic()
+
+    def idle_seconds(self) -> float:
+        """距上次有进展的秒数"""
+        with self._lock:
+            return time.monotonic() - self._updated
+
+    def finish(self, totals_before: Dict[str, float], totals_after: Dict[str, float], latencies: List[float]):
+        """结束运行，合并AI、缓存和索引的累计计数在本次运行期间的增量
+
+        同时运行的其他源目录也会计入这些增量。
+        """
+        self.duration = time.perf_counter() - self._start
+        self.finished_at = time.time()
+        with self._lock:
+            for key, value in totals_after.items():
+                delta = value - totals_before.get(key, 0)
+                if key in self.phases:
+                    self.phases[key] += delta
+                else:
+                    self.counters[key] = self.counters.get(key, 0) + delta
+        self.api_latency = {
+            "p50": percentile(latencies, 50),
+            "p90": percentile(latencies, 90),
+            "p99": percentile(latencies, 99),
+            "max": max(latencies) if latencies else None,
+        }
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            return {
+                "job": self.job,
+                "source_dir": self.source_dir,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                "duration": round(self.duration if self.duration is not None
+                                  else time.perf_counter() - self._start, 3),
+                "phases": {key: round(value, 3) for key, value in self.phases.items()},
+                "counters": {key: round(value, 3) if isinstance(value, float) else value
+                             for key, value in self.counters.items()},
+                "api_latency": {key: round(value, 3) if value is not None else None
+                                for key, value in self.api_latency.items()},
+            }
+
+    def summary(self) -> str:
+        """日志摘要"""
+        phases = " ".join(f"{name}={self.phases.get(name, 0):.1f}s" for name in PHASES)
+        counters = self.counters
+        p50, p99 = self.api_latency.get("p50"), self.api_latency.get("p99")
+        latency = f" p50={p50 * 1000:.0f}ms p99={p99 * 1000:.0f}ms" if p50 is not None else ""
+        tokens = (f" tokens提示{int(counters.get('prompt_tokens', 0))}(缓存{int(counters.get('cached_tokens', 0))})"
+                  f"/输出{int(counters.get('completion_tokens', 0))}") if counters.get('prompt_tokens') else ""
+        return (f"{self.source_dir} {self.job} 耗时{self.duration or 0:.1f}s [{phases}] "
+                f"文件{counters.get('files_seen', 0)} 新增{counters.get('new_files', 0)} "
+                f"缓存命中{int(counters.get('cache_hits', 0))}/未命中{int(counters.get('cache_misses', 0))} "
+                f"本地解析{int(counters.get('local', 0))} AI请求{int(counters.get('api_calls', 0))}次{latency}{tokens} "
+                f"失败{counters.get('failures', 0) + int(counters.get('api_failures', 0))}")
+
+
+class MetricsRecorder:
+    """记录正在运行和最近完成的运行"""
+
+    def __init__(self, history: int = 30):
+        self._lock = threading.Lock()
+        self._active: List[RunMetrics] = []
+        self._recent = deque(maxlen=history)
+
+    def start(self, job: str, source_dir: str) -> RunMetrics:
+        metrics = RunMetrics(job, source_dir)
+        with self._lock:
+            self._active.append(metrics)
+        return metrics
+
+    def finish(self, metrics: RunMetrics):
+        with self._lock:
+            if metrics in self._active:
+                self._active.remove(metrics)
+            self._recent.appendleft(metrics.to_dict())
+
+    def load(self, records: List[Dict]):
+        """恢复保存的历史记录（新的在前）"""
+        with self._lock:
+            self._recent.clear()
+            self._recent.extend(record for record in (records or []) if isinstance(record, dict))
+
+    def active(self, source_dir: str) -> Optional[RunMetrics]:
+        """源目录正在进行的运行"""
+        with self._lock:
+            return next((metrics for metrics in self._active if metrics.source_dir == source_dir), None)
+
+    def running(self) -> List[Dict]:
+        with self._lock:
+            return [metrics.to_dict() for metrics in self._active]
+
+    def recent(self) -> List[Dict]:
+        with self._lock:
+            return list(self._recent)
@@ -0,0 +1,108 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Set, Tuple
+
+from app.log import logger
+
+
+class OutputWriter:
+    """输出阶段：并行写strm和复制文件
+
+    strm写入和文件复制使用各自的线程池和有界队列，复制云盘文件较慢时不会占住strm写入的线程；
+    已创建的目录在本次运行内缓存，避免重复的exists/makedirs调用；
+    strm目标路径写入前先在锁内预留，不同源文件得到相同的目标时不会相互覆盖。
+    """
+
+    def __init__(self, workers: int = 4, queue_size: int = 256,
+                 same_source: Callable[[str, str, str], bool] = None):
+        """
+        Args:
+            same_source: 判断已存在的strm(路径, 内容)是否属于源文件，属于时覆盖写入
+        """
+        self._same_source = same_source
+        workers = max(int(workers or 1), 1)
+        self._strm_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="CloudStrmAI-Strm")
+        self._copy_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="CloudStrmAI-Copy")
+        self._strm_slots = threading.BoundedSemaphore(queue_size)
+        self._copy_slots = threading.BoundedSemaphore(queue_size)
+        self._dirs: Set[str] = set()
+        self._dirs_lock = threading.Lock()
+        # 本次运行已预留的strm路径 -> 内容
+        self._targets: Dict[str, str] = {}
+        self._targets_lock = threading.Lock()
+
+    def ensure_dir(self, path: str):
+        """创建目录（同一目录只检查一次）"""
+        path = str(path)
+        with self._dirs_lock:
+            if path in self._dirs:
+                return
+        os.makedirs(path, exist_ok=True)
+        with self._dirs_lock:
+            self._dirs.add(path)
+
+    def reserve(self, path: str, content: str, source_file: str = None) -> Tuple[str, bool]:
+        """预留strm路径，已被其他源文件占用时依次改用 "名称 - 2"、"名称 - 3"...
+
+        本次运行中已由其他内容预留，或已存在、内容不同且不属于该源文件时视为占用；
+        属于该源文件的旧strm（播放地址配置变化）直接覆盖。
+
+        Returns:
+            Tuple[str, bool]: (预留的路径, 是否需要写入)，已存在且内容相同时无需写入
+        """
+        stem, suffix = os.path.splitext(path)
+        index = 1
+        while True:
+            candidate = path if index == 1 else f"{stem} - {index}{suffix}"
+            with self._targets_lock:
+                reserved = self._targets.setdefault(candidate, content)
+            if reserved == content:
+                existing = self.read_target(candidate)
+                if existing is None or existing == content or (
+                        self._same_source and source_file and self._same_source(candidate, existing, source_file)):
+                    if index > 1:
+                        logger.warning(f"[CloudStrmAI] ⚠️ 目标重名，改为: {os.path.basename(candidate)}")
+                    return candidate, existing != content
+            index += 1
+
+    @staticmethod
+    def read_target(path: str) -> Optional[str]:
+        """读取已存在的strm内容，不存在返回None"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return f.read().strip()
+        except FileNotFoundError:
+            return None
+        except (OSError, UnicodeDecodeError):
+            return ""
+
+    def submit_strm(self, func: Callable, *args, **kwargs):
+        self._submit(self._strm_pool, self._strm_slots, func, *args, **kwargs)
+
+    def submit_copy(self, func: Callable, *args, **kwargs):
+        self._submit(self._copy_pool, self._copy_slots, func, *args, **kwargs)
+
+    @staticmethod
+    def _submit(pool: ThreadPoolExecutor, slots: threading.BoundedSemaphore, func: Callable, *args, **kwargs):
+        # 队列已满时等待，限制积压的任务数量
+        slots.acquire()
+
+        def _run():
+            try:
+                func(*args, **kwargs)
+            except Exception as e:
+                logger.error(f"[CloudStrmAI] 输出失败: {str(e)}")
+            finally:
+                slots.release()
+
+        try:
+            pool.submit(_run)
+        except Exception:
+            slots.release()
+            raise
+
+    def close(self):
+        """等待所有任务完成"""
+        self._strm_pool.shutdown(wait=True)
+        self._copy_pool.shutdown(wait=True)
@@ -0,0 +1,213 @@
+import re
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+# 季度文件夹
+SEASON_FOLDER_PATTERNS = [
+    re.compile(r'(?<![A-Za-z])S(eason)?\s*0?\d{1,2}(?!\d)', re.IGNORECASE),  # S01, S1, Season 1, season 01
+    re.compile(r'第\s*[\d一二三四五六七八九十]+\s*季', re.IGNORECASE),  # 第一季, 第1季
+    re.compile(r'Season\s*\d+', re.IGNORECASE),  # Season 1, Season 01
+]
+
+# 集数格式，按优先级排列；前两个为明确的季集标记
+EPISODE_PATTERNS = [
+    re.compile(r'[Ss](\d{1,2})[Ee](\d{1,2})'),  # S01E01
+    re.compile(r'第\s*(\d+)\s*季.*?第\s*(\d+)\s*集'),  # 第1季第1集
+    re.compile(r'[Ee][Pp]?(\d{1,2})'),  # EP01, E01
+    re.compile(r'第\s*(\d+)\s*集'),  # 第1集
+    re.compile(r'^\.?(\d{1,2})\.'),  # 开头的数字: 01., .01.
+    re.compile(r'[^\d](\d{1,2})\.'),  # 中间的数字
+]
+_EXPLICIT_EPISODE_PATTERNS = 2
+
+_YEAR_RE = re.compile(r'(?<![\dA-Za-z])[(\[（]?((?:19|20)\d{2})[)\]）]?(?![\dA-Za-z])')
+_SEASON_RE = re.compile(r'(?<![A-Za-z])S(\d{1,2})(?!\d)|Season\s*(\d{1,2})|第\s*([\d一二三四五六七八九十]+)\s*季',
+                        re.IGNORECASE)
+_RESOLUTION_RE = re.compile(r'(?<![A-Za-z\d])(2160p|1080[pi]|720p|480p|4K|UHD)(?![A-Za-z\d])', re.IGNORECASE)
+_CODEC_RE = re.compile(r'(?<![A-Za-z\d])([HX]\.?\s?26[45]|HEVC|AVC|AV1|HDR10\+?|HDR|DV|DoVi|10bit)(?![A-Za-z\d])',
+                       re.IGNORECASE)
+_AUDIO_RE = re.compile(
+    r'(?<![A-Za-z\d])(DDP\s?[257]\.[01]|DD\+?\s?[257]\.[01]|E?AC3|AAC(?:\s?[257]\.[01])?|Atmos|TrueHD'
+    r'|DTS(?:-HD\s?MA|-X)?(?:\s?[257]\.[01])?|FLAC|LPCM|OPUS)(?![A-Za-z\d])',
+    re.IGNORECASE
+)
+_SOURCE_RE = re.compile(r'(?<![A-Za-z\d])(WEB-?DL|WEB-?Rip|Blu-?Ray|BDRip|REMUX|HDTV|DVDRip|WEB)(?![A-Za-z\d])',
+                        re.IGNORECASE)
+# 出现即可能是网站水印、发布组标记等难以解析的名称
+_NOISE_RE = re.compile(r'[\[\]【】@#]|www\.|\.com|\.cn', re.IGNORECASE)
+_CJK_RE = re.compile(r'[一-鿿]')
+_CJK_TITLE_RE = re.compile(r'[一-鿿][一-鿿\d：:·！!？?、，, ]*')
+_LATIN_TITLE_RE = re.compile(r"[A-Za-z][A-Za-z\d'&:!,\- ]*")
+# 点和下划线视为分隔符，保留声道中的点（5.1、2.0）
+_SEPARATOR_RE = re.compile(r'_+|(?<!\d)\.|\.(?![01](?!\d))')
+
+
+def is_season_folder(folder_name: str) -> bool:
+    """判断是否为季度文件夹"""
+    return any(pattern.search(folder_name) for pattern in SEASON_FOLDER_PATTERNS)
+
+
+def extract_episode(filename: str) -> Optional[Tuple[str, str, bool]]:
+    """从文件名中提取季集信息
+
+    Returns:
+        Tuple[str, str, bool]: (season, episode, 是否为明确的季集标记) 或 None
+    """
+    for index, pattern in enumerate(EPISODE_PATTERNS):
+        match = pattern.search(filename)
+        if match:
+            groups = match.groups()
+            explicit = index < _EXPLICIT_EPISODE_PATTERNS
+            if len(groups) == 2:
+                return f"S{int(groups[0]):02d}", f"E{int(groups[1]):02d}", explicit
+            return "S01", f"E{int(groups[0]):02d}", explicit
+    return None
+
+
+class LocalMediaParser:
+    """本地规则解析器
+
+    解析规范的场景命名（如 Show.Name.S02E05.2160p.WEB-DL.H265.DDP5.1），提取标题、年份、季集、
+    质量和音频，并给出置信度；置信度达到阈值时可以直接使用，无需调用AI。
+    """
+
+    def parse(self, folder_name: str, sample_filename: str) -> Tuple[Optional[Dict], float]:
+        """解析文件夹名和样本文件名
+
+        Returns:
+            Tuple[Dict, float]: (与AI返回格式一致的文件夹信息, 置信度0~1)，无法解析时信息为None
+        """
+        stem = Path(sample_filename).stem if sample_filename else ""
+        folder_text = self._clean(folder_name)
+        file_text = self._clean(stem)
+        if _NOISE_RE.search(folder_name or "") and _NOISE_RE.search(stem):
+            return None, 0.0
+
+        # 标题：取年份、季集、质量等标记之前的部分，中英文分别识别
+        chinese_title = english_title = ""
+        latin_titles, cjk_titles = [], []
+        for text in (folder_text, file_text):
+            head = self._title_part(text)
+            match = _CJK_TITLE_RE.search(head)
+            cjk_titles.append(match.group(0).strip(" ：:·，,") if match else "")
+            if not chinese_title:
+                chinese_title = cjk_titles[-1]
+            match = _LATIN_TITLE_RE.search(_CJK_RE.sub(" ", head))
+            latin_titles.append(re.sub(r'\s+', ' ', match.group(0)).strip(" -:,") if match else "")
+            if not english_title:
+                english_title = latin_titles[-1]
+        if len(english_title) < 2:
+            english_title = ""
+        if not chinese_title and not english_title:
+            return None, 0.0
+
+        year_match, year_candidates = self._year(folder_text)
+        if not year_match:
+            year_match, year_candidates = self._year(file_text)
+        year = year_match.group(1) if year_match else ""
+
+        # 类型只按明确的季标记或SxxEyy判断，标题中的数字（如 Furious 7）不视为季
+        episode = extract_episode(stem)
+        season_match = _SEASON_RE.search(folder_text)
+        media_type = "tv" if (episode and episode[2]) or season_match else "movie"
+        if media_type == "movie" and episode and _CJK_RE.search(stem) and "集" in stem:
+            media_type = "tv"
+
+        combined = f"{folder_text} {file_text}"
+        codecs = [re.sub(r'[\s.]', '', codec) for codec in _CODEC_RE.findall(combined)]
+        quality = self._unique(_RESOLUTION_RE.findall(combined) + codecs)
+        audio = self._unique(_AUDIO_RE.findall(combined))
+        other = self._unique(_SOURCE_RE.findall(combined))
+
+        # 置信度
+        confidence = 0.4
+        if chinese_title and english_title:
+            confidence += 0.1
+        if year:
+            confidence += 0.2
+        if media_type == "tv":
+            if episode and episode[2]:
+                confidence += 0.3
+            elif episode:
+                confidence += 0.1
+            if quality or other:
+                confidence += 0.1
+        elif quality or other:
+            confidence += 0.2
+        if _NOISE_RE.search(folder_name or "") or _NOISE_RE.search(stem):
+            confidence -= 0.3
+        if self._conflict(*latin_titles):
+            # 文件夹与文件的英文标题不一致，文件夹可能是分类目录
+            confidence -= 0.2
+        if cjk_titles[0] and not latin_titles[0] and latin_titles[1] and not cjk_titles[1] \
+                and not _YEAR_RE.search(folder_text):
+            # 只有中文名、没有年份的文件夹与英文文件名无法相互印证，文件夹可能是分类目录（如 电影）
+            confidence -= 0.2
+        if year_candidates > 1:
+            # 多个年份候选（如 Blade Runner 2049 (2017)），标题中的数字可能被误认为年份
+            confidence -= 0.2
+        if not year:
+            # 文件夹命名要求包含年份
+            confidence = min(confidence, 0.6)
+        confidence = round(max(min(confidence, 1.0), 0.0), 2)
+
+        titles = " ".join(t for t in (chinese_title, english_title) if t)
+        info = {
+            "type": media_type,
+            "chinese_title": chinese_title,
+            "english_title": english_title,
+            "year": year,
+            "season": episode[0] if episode and media_type == "tv" else "",
+            "episode": episode[1] if episode and media_type == "tv" else "",
+            "quality": quality,
+            "audio": audio,
+            "other": other,
+            "folder_name": f"{titles} ({year})" if year else titles,
+        }
+        return info, confidence
+
+    @staticmethod
+    def _clean(text: str) -> str:
+        return _SEPARATOR_RE.sub(" ", str(text or "")).strip()
+
+    @staticmethod
+    def _year(text: str) -> Tuple[Optional[re.Match], int]:
+        """年份：优先取括号中的年份，否则取最后一个
+
+        Returns:
+            Tuple: (年份匹配, 不同年份候选的数量)
+        """
+        matches = list(_YEAR_RE.finditer(text))
+        if not matches:
+            return None, 0
+        bracketed = [match for match in matches if match.group(0)[0] in "([（"]
+        return (bracketed or matches)[-1], len({match.group(1) for match in matches})
+
+    @classmethod
+    def _title_part(cls, text: str) -> str:
+        """标题部分：年份/季集/质量标记之前的文本"""
+        year_match, _ = cls._year(text)
+        end = year_match.start() if year_match and year_match.start() > 0 else len(text)
+        for pattern in (_SEASON_RE, _RESOLUTION_RE, _CODEC_RE, _SOURCE_RE, _AUDIO_RE,
+                        EPISODE_PATTERNS[0], EPISODE_PATTERNS[3]):
+            match = pattern.search(text)
+            if match and match.start() > 0:
+                end = min(end, match.start())
+        return text[:end].strip(" -([（")
+
+    @staticmethod
+    def _conflict(folder_title: str, file_title: str) -> bool:
+        """文件夹和文件的英文标题互不包含"""
+        folder_key = re.sub(r'[^a-z\d]', '', folder_title.lower())
+        file_key = re.sub(r'[^a-z\d]', '', file_title.lower())
+        if not folder_key or not file_key:
+            return False
+        return folder_key not in file_key and file_key not in folder_key
+
+    @staticmethod
+    def _unique(values) -> str:
+        seen = []
+        for value in values:
+            if value and value.upper() not in [v.upper() for v in seen]:
+                seen.append(value)
+        return " ".join(seen)
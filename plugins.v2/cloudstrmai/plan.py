@@ -0,0 +1,114 @@
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterator, Optional, Set
+
+from app.log import logger
+
+# 差异类型：新增、内容变化、与现有文件一致、目标目录中存在但计划中没有
+ADD = "add"
+CHANGE = "change"
+SAME = "same"
+ORPHAN = "orphan"
+
+
+class PlanWriter:
+    """试运行计划（JSON Lines）
+
+    每行一条记录：
+        {"type": "folder", "source_dir", "folder", "name", "sample", "info"}  文件夹及解析到的信息
+        {"type": "file", "source_dir", "source", "target", "content", "diff"}  源文件 -> 目标路径 -> strm内容（复制为null）
+        {"type": "orphan", "source_dir", "target"}                             目标目录中不在计划内的strm
+    同时生成可读的差异文件（+ 新增，~ 内容变化，- 计划外），内容一致的不列出。
+    多个源目录并行写入，先写临时文件，完成后替换。
+    """
+
+    def __init__(self, path: str, diff_path: str):
+        self.path = path
+        self.diff_path = diff_path
+        self._lock = threading.Lock()
+        self._file = open(f"{path}.tmp", "w", encoding="utf-8")
+        self._diff = open(f"{diff_path}.tmp", "w", encoding="utf-8")
+        self._targets: Dict[str, Set[str]] = {}
+        self.counts: Dict[str, int] = {ADD: 0, CHANGE: 0, SAME: 0, ORPHAN: 0}
+        self._write({"type": "header", "created_at": time.time()})
+
+    def _write(self, record: Dict, diff_line: str = None):
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+        with self._lock:
+            self._file.write(line + "\n")
+            if diff_line:
+                self._diff.write(diff_line + "\n")
+
+    def folder(self, source_dir: str, folder_path: str, name: Optional[str], sample: Optional[str],
+               info: Optional[Dict]):
+        self._write({"type": "folder", "source_dir": source_dir, "folder": folder_path,
+                     "name": name, "sample": sample, "info": info})
+
+    def file(self, source_dir: str, source_file: str, target: str, content: Optional[str]):
+        """记录一个文件的计划，与现有目标文件比较得到差异"""
+        diff = target_diff(target, content)
+        with self._lock:
+            self._targets.setdefault(source_dir, set()).add(target)
+            self.counts[diff] += 1
+        self._write({"type": "file", "source_dir": source_dir, "source": source_file,
+                     "target": target, "content": content, "diff": diff},
+                    f"+ {target}" if diff == ADD else f"~ {target}" if diff == CHANGE else None)
+
+    def orphans(self, source_dir: str, dest_dir: str):
+        """列出目标目录中不在本次计划内的strm文件（改名后残留的旧文件等）"""
+        with self._lock:
+            planned = self._targets.pop(source_dir, set())
+        for root, _, files in os.walk(dest_dir):
+            for name in files:
+                target = os.path.join(root, name)
+                if not name.endswith(".strm") or target in planned:
+                    continue
+                with self._lock:
+                    self.counts[ORPHAN] += 1
+                self._write({"type": "orphan", "source_dir": source_dir, "target": target}, f"- {target}")
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+            self._diff.close()
+        os.replace(f"{self.path}.tmp", self.path)
+        os.replace(f"{self.diff_path}.tmp", self.diff_path)
+
+    def discard(self):
+        """运行失败时丢弃未完成的计划"""
+        with self._lock:
+            self._file.close()
+            self._diff.close()
+        for path in (f"{self.path}.tmp", f"{self.diff_path}.tmp"):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def target_diff(target: str, content: Optional[str]) -> str:
+    """与现有目标文件比较：strm比较内容，复制的文件只检查是否存在"""
+    try:
+        if content is None:
+            return SAME if os.path.exists(target) else ADD
+        with open(target, encoding="utf-8") as f:
+            return SAME if f.read() == content else CHANGE
+    except FileNotFoundError:
+        return ADD
+    except (OSError, UnicodeDecodeError):
+        return CHANGE
+
+
+def read_plan(path: str, source_dir: str = None) -> Iterator[Dict]:
+    """逐行读取计划记录，可按源目录过滤"""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                logger.warning(f"[CloudStrmAI] 计划文件记录无效: {line[:100]}")
+                continue
+            if source_dir is None or record.get("source_dir") == source_dir:
+                yield record
@@ -0,0 +1,68 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from app.plugins.cloudstrmai import CloudStrmAINamer
+from app.plugins.cloudstrmai.cache import FolderInfoCache
+
+
+class FolderInfoCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.cache = FolderInfoCache(os.path.join(self._dir.name, "cache.db"))
+
+    def tearDown(self):
+        self.cache.close()
+        self._dir.cleanup()
+
+    def test_same_folder_name_different_shows_do_not_collide(self):
+        show_a = {"type": "tv", "english_title": "Show A", "year": "2020"}
+        self.cache.set("Season 1", "Show.A.S01E01.1080p.mkv", show_a)
+
+        self.assertIsNone(self.cache.get("Season 1", "Show.B.S01E01.1080p.mkv"))
+        self.assertEqual(self.cache.get("Season 1", "Show.A.S01E01.1080p.mkv"), show_a)
+
+    def test_other_episodes_of_same_show_hit(self):
+        info = {"type": "tv", "english_title": "Show A", "year": "2020"}
+        self.cache.set("Show.A.2020", "Show.A.S01E01.1080p.WEB-DL.mkv", info)
+
+        self.assertEqual(self.cache.get("Show.A.2020", "Show.A.S01E07.1080p.WEB-DL.mkv"), info)
+        self.assertEqual(self.cache.get("show a 2020", "Show_A_S02E10_1080p_WEB-DL.mkv"), info)
+
+    def test_sample_key_strips_episode_markers(self):
+        self.assertEqual(FolderInfoCache.sample_key("剧名 第03集 4K.mp4"),
+                         FolderInfoCache.sample_key("剧名 第12集 4K.mp4"))
+        self.assertNotEqual(FolderInfoCache.sample_key("Show.A.E01.mkv"),
+                            FolderInfoCache.sample_key("Show.B.E01.mkv"))
+
+    def test_expired_entry_is_removed(self):
+        cache = FolderInfoCache(os.path.join(self._dir.name, "ttl.db"), ttl_days=0.000001)
+        try:
+            cache.set("Movie (2020)", "Movie.2020.mkv", {"type": "movie"})
+            cache._conn.execute("UPDATE folder_cache SET created_at = 0")
+            self.assertIsNone(cache.get("Movie (2020)", "Movie.2020.mkv"))
+            self.assertEqual(cache.stats()["size"], 0)
+        finally:
+            cache.close()
+
+
+class ResolveFoldersTest(unittest.TestCase):
+
+    def test_same_folder_name_different_shows_are_resolved_separately(self):
+        namer = CloudStrmAINamer([])
+        folders = [("/a/Season 1", "Season 1", "Show.A.S01E01.mkv"),
+                   ("/b/Season 1", "Season 1", "Show.B.S01E01.mkv"),
+                   ("/c/Season 1", "Season 1", "Show.A.S01E02.mkv")]
+        with mock.patch.object(namer, "_resolve_chunk",
+                               side_effect=lambda chunk: [{"sample": sample} for _, sample in chunk]):
+            results = dict(namer.resolve_folders(folders))
+
+        self.assertEqual(results["/a/Season 1"], {"sample": "Show.A.S01E01.mkv"})
+        self.assertEqual(results["/b/Season 1"], {"sample": "Show.B.S01E01.mkv"})
+        self.assertTrue(results["/c/Season 1"]["sample"].startswith("Show.A."))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from app.plugins.cloudstrmai import CloudStrmAI
+
+
+class RemoveStaleTest(unittest.TestCase):
+    """源文件删除后清理strm，源目录列出为空（挂载异常）时即使记录很少也不删除"""
+
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        root = self._dir.name
+        self.source, self.dest, self.data = (os.path.join(root, name) for name in ("src", "dst", "data"))
+        os.makedirs(self.data)
+        for relative in ("Movie.2020/Movie.2020.1080p.mkv", "Other.2021/Other.2021.1080p.mkv",
+                         "Third.2022/Third.2022.1080p.mkv"):
+            path = os.path.join(self.source, relative)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            Path(path).write_text("x")
+
+        self.plugin = CloudStrmAI()
+        patches = [mock.patch.object(CloudStrmAI, "get_data_path", return_value=self.data),
+                   mock.patch.object(CloudStrmAI, "get_data", return_value=None),
+                   mock.patch.object(CloudStrmAI, "save_data"),
+                   mock.patch.object(CloudStrmAI, "update_config")]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.plugin.init_plugin({"enabled": True, "monitor_confs": f"{self.source}#{self.dest}#/media/lib",
+                                 "delete_stale": True})
+        self.plugin.scan()
+
+    def tearDown(self):
+        self.plugin.stop_service()
+        self._dir.cleanup()
+
+    def _targets(self):
+        return sorted(path.parent.name for path in Path(self.dest).rglob("*.strm"))
+
+    def test_deleted_source_file_removes_strm(self):
+        shutil.rmtree(os.path.join(self.source, "Other.2021"))
+        self.plugin.scan()
+        self.assertEqual(len(self._targets()), 2)
+        self.assertEqual(self.plugin._catalog.count(self.source), 2)
+
+    def test_empty_listing_keeps_small_library(self):
+        before = self._targets()
+        for name in os.listdir(self.source):
+            shutil.rmtree(os.path.join(self.source, name))
+        self.plugin.scan()
+        self.assertEqual(self._targets(), before)
+        self.assertEqual(self.plugin._catalog.count(self.source), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
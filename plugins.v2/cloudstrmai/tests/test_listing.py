@@ -0,0 +1,145 @@
+import json
+import threading
+import unittest
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from app.plugins.cloudstrmai.listing import AlistLister, CloudListError, CloudLister, WebDavLister
+
+# 云盘上的目录树：目录 -> [(名称, 是否目录, 大小)]
+TREE = {
+    "/": [("Movies", True, 0)],
+    "/Movies": [("Big Folder", True, 0), ("a.mkv", False, 10)],
+    "/Movies/Big Folder": [(f"ep{i:02d}.mkv", False, i) for i in range(1, 8)],
+}
+
+PROPFIND_TEMPLATE = """<?xml version="1.0" encoding="utf-8"?>
+<d:multistatus xmlns:d="DAV:">{responses}</d:multistatus>"""
+
+PROPFIND_RESPONSE = """<d:response><d:href>{href}</d:href><d:propstat><d:prop>
+<d:resourcetype>{collection}</d:resourcetype>{length}
+<d:getlastmodified>Mon, 02 Jan 2023 03:04:05 GMT</d:getlastmodified>
+</d:prop><d:status>HTTP/1.1 200 OK</d:status></d:propstat></d:response>"""
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """模拟Alist fs/list分页接口和WebDAV PROPFIND"""
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status: int, body: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.requests.append(body)
+        items = TREE.get(body["path"])
+        if items is None:
+            result = {"code": 500, "message": "object not found"}
+        else:
+            start = (body["page"] - 1) * body["per_page"]
+            page = items[start:start + body["per_page"]]
+            result = {"code": 200, "data": {"total": len(items), "content": [
+                {"name": name, "is_dir": is_dir, "size": size, "modified": "2023-01-02T03:04:05.1234567+08:00"}
+                for name, is_dir, size in page]}}
+        self._send(200, json.dumps(result).encode(), "application/json")
+
+    def do_PROPFIND(self):
+        path = urllib.parse.unquote(self.path)
+        assert path.startswith("/dav/") and self.headers["Depth"] == "1"
+        remote = "/" + path[len("/dav/"):].strip("/")
+        items = TREE.get(remote)
+        if items is None:
+            self._send(404, b"", "text/plain")
+            return
+        base = path.rstrip("/") + "/"
+        responses = [PROPFIND_RESPONSE.format(href=urllib.parse.quote(base), collection="<d:collection/>",
+                                              length="")]
+        for name, is_dir, size in items:
+            href = urllib.parse.quote(base + name + ("/" if is_dir else ""))
+            responses.append(PROPFIND_RESPONSE.format(
+                href=f"http://{self.headers['Host']}{href}",
+                collection="<d:collection/>" if is_dir else "",
+                length="" if is_dir else f"<d:getcontentlength>{size}</d:getcontentlength>"))
+        self._send(207, PROPFIND_TEMPLATE.format(responses="".join(responses)).encode(), "application/xml")
+
+
+class ListerTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+        cls.server.requests = []
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_port}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.server.requests.clear()
+
+    def test_cloud_lister_is_abstract(self):
+        with self.assertRaises(TypeError):
+            CloudLister(self.base_url, "/mnt/cloud")
+
+    def test_alist_pagination(self):
+        lister = AlistLister(self.base_url, "/mnt/cloud", page_size=3)
+        try:
+            entries = lister.list_dir("/Movies/Big Folder")
+        finally:
+            lister.close()
+        self.assertEqual([entry.name for entry in entries], [f"ep{i:02d}.mkv" for i in range(1, 8)])
+        self.assertEqual([request["page"] for request in self.server.requests], [1, 2, 3])
+        self.assertEqual(entries[0].size, 1)
+        self.assertAlmostEqual(entries[0].mtime, 1672599845.123456, places=3)
+
+    def test_alist_error(self):
+        lister = AlistLister(self.base_url, "/mnt/cloud")
+        try:
+            with self.assertRaises(CloudListError):
+                lister.list_dir("/missing")
+        finally:
+            lister.close()
+
+    def test_webdav_propfind(self):
+        lister = WebDavLister(self.base_url, "/mnt/cloud")
+        try:
+            entries = lister.list_dir("/Movies")
+        finally:
+            lister.close()
+        self.assertEqual({(entry.name, entry.is_dir, entry.size) for entry in entries},
+                         {("Big Folder", True, None), ("a.mkv", False, 10)})
+        self.assertEqual(entries[0].mtime, 1672628645.0)
+
+    def test_webdav_error(self):
+        lister = WebDavLister(self.base_url, "/mnt/cloud")
+        try:
+            with self.assertRaises(CloudListError):
+                lister.list_dir("/missing")
+        finally:
+            lister.close()
+
+    def test_walk_maps_remote_tree_to_local_paths(self):
+        for lister in (AlistLister(self.base_url, "/mnt/cloud", page_size=2),
+                       WebDavLister(self.base_url, "/mnt/cloud")):
+            with self.subTest(lister=type(lister).__name__):
+                try:
+                    walked = {path: (sorted(files), dirs) for path, files, _, dirs in lister.walk("/mnt/cloud/Movies")}
+                finally:
+                    lister.close()
+                self.assertEqual(walked, {
+                    "/mnt/cloud/Movies": (["a.mkv"], ["Big Folder"]),
+                    "/mnt/cloud/Movies/Big Folder": ([f"ep{i:02d}.mkv" for i in range(1, 8)], []),
+                })
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from app.plugins.cloudstrmai import CloudStrmAI, CloudStrmAINamer
+from app.plugins.cloudstrmai.backend import ChatBackend
+from app.plugins.cloudstrmai.parser import LocalMediaParser
+
+
+class BaselineMigrationTest(unittest.TestCase):
+    """旧版（只有json路径列表）升级后，补记旧版已生成的strm，不生成重复文件"""
+
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        root = self._dir.name
+        self.source, self.dest, self.data = (os.path.join(root, name) for name in ("src", "dst", "data"))
+        os.makedirs(self.data)
+
+        # 旧版按AI命名生成的strm（AI返回的信息与本地解析一致）
+        self.named_source = self._source("Some.Show.2020/Season 1/Some.Show.S01E01.1080p.WEB-DL.mkv")
+        namer = CloudStrmAINamer([])
+        info, _ = LocalMediaParser().parse("Some.Show.2020", "Some.Show.S01E01.1080p.WEB-DL.mkv")
+        filename, folder = namer._parse_ai_response_with_episode(info, "Some.Show.S01E01.1080p.WEB-DL.mkv")
+        self.named_strm = self._strm(f"Some.Show.2020/{folder}/{Path(filename).stem}.strm", self.named_source)
+        # 旧版AI命名失败，按原名生成的strm
+        self.raw_source = self._source("Random Folder/clip01.mkv")
+        self.raw_strm = self._strm("Random Folder/clip01.strm", self.raw_source)
+        # 旧版索引中有记录但strm已被删除
+        self.gone_source = self._source("Gone.2019/Gone.2019.1080p.mkv")
+
+        with open(os.path.join(self.data, "cloudstrmai_files.json"), "w") as f:
+            json.dump([self.named_source, self.raw_source, self.gone_source], f)
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+    def _source(self, relative: str) -> str:
+        path = os.path.join(self.source, relative)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        Path(path).write_text("x")
+        return path
+
+    def _strm(self, relative: str, source_file: str) -> str:
+        path = os.path.join(self.dest, relative)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        Path(path).write_text(source_file.replace(self.source, "/media/lib"))
+        return path
+
+    def _targets(self):
+        return sorted(str(path) for path in Path(self.dest).rglob("*") if path.is_file())
+
+    def test_legacy_entries_record_existing_strm_without_writing(self):
+        before = self._targets()
+        plugin = CloudStrmAI()
+        with mock.patch.object(CloudStrmAI, "get_data_path", return_value=self.data), \
+                mock.patch.object(CloudStrmAI, "get_data", return_value=None), \
+                mock.patch.object(CloudStrmAI, "save_data"), \
+                mock.patch.object(CloudStrmAI, "update_config"), \
+                mock.patch.object(ChatBackend, "chat", side_effect=AssertionError("API不应被调用")):
+            plugin.init_plugin({
+                "enabled": True,
+                "monitor_confs": f"{self.source}#{self.dest}#/media/lib",
+                "enable_ai_naming": True,
+                "deepseek_api_key": "sk-test",
+            })
+            try:
+                plugin.scan()
+                targets = dict(plugin._catalog.iter_targets(self.source))
+                untracked = set(plugin._catalog.untracked_targets(self.source))
+            finally:
+                plugin.stop_service()
+
+        self.assertEqual(self._targets(), before)
+        self.assertEqual(targets[self.named_source], self.named_strm)
+        self.assertEqual(targets[self.raw_source], self.raw_strm)
+        self.assertIn(self.gone_source, untracked)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+import os
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from app.plugins.cloudstrmai import CloudStrmAI
+from app.plugins.cloudstrmai.output import OutputWriter
+
+
+class OutputWriterReserveTest(unittest.TestCase):
+
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.writer = OutputWriter(workers=8)
+        self.target = os.path.join(self._dir.name, "Show (2020) S01E01 - 1080p.strm")
+
+    def tearDown(self):
+        self.writer.close()
+        self._dir.cleanup()
+
+    def _write(self, path: str, content: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+
+    def test_parallel_sources_with_same_target_do_not_collide(self):
+        results = {}
+        start = threading.Barrier(8)
+
+        def _output(index: int):
+            content = f"/media/lib/source-{index}.mkv"
+            start.wait()
+            path, write = self.writer.reserve(self.target, content)
+            if write:
+                self._write(path, content)
+            results[content] = path
+
+        for index in range(8):
+            self.writer.submit_strm(_output, index)
+        self.writer.close()
+
+        self.assertEqual(len(set(results.values())), 8)
+        for content, path in results.items():
+            with open(path, encoding='utf-8') as f:
+                self.assertEqual(f.read(), content)
+
+    def test_existing_target_with_same_content_is_reused(self):
+        self._write(self.target, "/media/lib/a.mkv")
+
+        self.assertEqual(self.writer.reserve(self.target, "/media/lib/a.mkv"), (self.target, False))
+
+    def test_existing_target_of_other_source_gets_suffix(self):
+        self._write(self.target, "/media/lib/a.mkv")
+
+        path, write = self.writer.reserve(self.target, "/media/lib/b.mkv")
+        self.assertEqual(os.path.basename(path), "Show (2020) S01E01 - 1080p - 2.strm")
+        self.assertTrue(write)
+        # 同一源文件再次预留得到相同路径
+        self.assertEqual(self.writer.reserve(self.target, "/media/lib/b.mkv"), (path, True))
+
+    def test_existing_target_of_same_source_is_overwritten(self):
+        self._write(self.target, "http://alist:5244/dav/a.mkv")
+        writer = OutputWriter(same_source=lambda path, content, source_file: source_file == "/cloud/a.mkv")
+        try:
+            self.assertEqual(writer.reserve(self.target, "https://alist:5244/dav/a.mkv", "/cloud/a.mkv"),
+                             (self.target, True))
+            path, _ = writer.reserve(self.target, "https://alist:5244/dav/b.mkv", "/cloud/b.mkv")
+            self.assertEqual(os.path.basename(path), "Show (2020) S01E01 - 1080p - 2.strm")
+        finally:
+            writer.close()
+
+
+class ConfigChangeRebuildTest(unittest.TestCase):
+    """修改播放地址相关配置后重建，覆盖原strm，不另存为带序号的新文件"""
+
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        root = self._dir.name
+        self.source, self.dest, self.data = (os.path.join(root, name) for name in ("src", "dst", "data"))
+        os.makedirs(self.data)
+        for relative in ("Movie.2020/Movie.2020.1080p.mkv", "Show.2021/Show.2021.S01E01.1080p.mkv"):
+            path = os.path.join(self.source, relative)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            Path(path).write_text("x")
+
+        self.plugin = CloudStrmAI()
+        patches = [mock.patch.object(CloudStrmAI, "get_data_path", return_value=self.data),
+                   mock.patch.object(CloudStrmAI, "get_data", return_value=None),
+                   mock.patch.object(CloudStrmAI, "save_data"),
+                   mock.patch.object(CloudStrmAI, "update_config")]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        self.plugin.stop_service()
+        self._dir.cleanup()
+
+    def _scan(self, monitor_conf: str, **config):
+        self.plugin.init_plugin({"enabled": True, "monitor_confs": monitor_conf, **config})
+        self.plugin.scan()
+        return {str(path): path.read_text() for path in Path(self.dest).rglob("*.strm")}
+
+    def test_https_and_cloud_url_change(self):
+        before = self._scan(f"{self.source}#{self.dest}#alist#{self.source}#alist:5244")
+        self.assertEqual(len(before), 2)
+
+        after = self._scan(f"{self.source}#{self.dest}#alist#{self.source}#alist:5244", https=True, rebuild=True)
+        self.assertEqual(sorted(after), sorted(before))
+        self.assertTrue(all(content.startswith("https://alist:5244/dav/") for content in after.values()))
+
+        after = self._scan(f"{self.source}#{self.dest}#alist#{self.source}#media:5244", rebuild=True)
+        self.assertEqual(sorted(after), sorted(before))
+        self.assertTrue(all(content.startswith("http://media:5244/dav/") for content in after.values()))
+
+    def test_library_dir_change(self):
+        before = self._scan(f"{self.source}#{self.dest}#/media/lib")
+        after = self._scan(f"{self.source}#{self.dest}#/media/new", rebuild=True)
+        self.assertEqual(sorted(after), sorted(before))
+        self.assertTrue(all(content.startswith("/media/new/") for content in after.values()))
+
+
+    def test_fast_rebuild_without_verify_does_not_copy_again(self):
+        subtitle = os.path.join(self.source, "Movie.2020/Movie.2020.1080p.srt")
+        Path(subtitle).write_text("1")
+        conf = f"{self.source}#{self.dest}#/media/lib"
+        self._scan(conf, copy_files=True)
+        self._scan(conf, copy_files=True, fast_rebuild=True, rebuild=True)
+
+        with mock.patch("shutil.copy2") as copy:
+            self._scan(conf, copy_files=True)
+        copy.assert_not_called()
+        self.assertEqual(self.plugin._catalog.count(self.source), 3)
+
+        Path(subtitle).write_text("changed")
+        os.utime(subtitle, (0, 0))
+        with mock.patch("shutil.copy2") as copy:
+            self._scan(conf, copy_files=True, rebuild=True)
+        copy.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
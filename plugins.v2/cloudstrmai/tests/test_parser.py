@@ -0,0 +1,66 @@
+import unittest
+
+from app.plugins.cloudstrmai.parser import LocalMediaParser, is_season_folder
+
+# 插件默认的本地解析阈值
+THRESHOLD = 0.8
+
+# (文件夹名, 样本文件名, 类型, 是否达到阈值直接使用)
+CONFIDENCE_CASES = [
+    # 规范命名
+    ("Show.Name.2020", "Show.Name.S01E02.1080p.WEB-DL.H265.mkv", "tv", True),
+    ("The Last of Us (2023)", "The.Last.of.Us.S01E03.2160p.WEB-DL.DDP5.1.mkv", "tv", True),
+    ("Inception (2010)", "Inception.2010.1080p.BluRay.x264.mkv", "movie", True),
+    ("流浪地球 The Wandering Earth (2019)", "The.Wandering.Earth.2019.2160p.WEB-DL.mkv", "movie", True),
+    ("Fast and Furious 7 (2015)", "Fast.and.Furious.7.2015.1080p.BluRay.mkv", "movie", True),
+    # 有歧义，交给AI
+    ("Season 1", "Show.Name.S01E02.1080p.mkv", "tv", False),
+    ("电影", "Some.Movie.2021.1080p.mkv", "movie", False),
+    ("Documentaries", "Planet.Earth.II.2016.1080p.BluRay.mkv", "movie", False),
+    ("Blade Runner 2049 (2017)", "Blade.Runner.2049.2017.2160p.BluRay.mkv", "movie", False),
+    ("Random Folder", "video001.mkv", "movie", False),
+    ("狂飙", "狂飙 第05集 4K.mp4", "tv", False),
+]
+
+
+class LocalMediaParserTest(unittest.TestCase):
+
+    def setUp(self):
+        self.parser = LocalMediaParser()
+
+    def test_confidence_against_threshold(self):
+        for folder_name, sample_filename, media_type, accepted in CONFIDENCE_CASES:
+            with self.subTest(folder=folder_name):
+                info, confidence = self.parser.parse(folder_name, sample_filename)
+                self.assertEqual(info["type"], media_type)
+                self.assertEqual(confidence >= THRESHOLD, accepted, confidence)
+
+    def test_noisy_names_are_rejected(self):
+        info, confidence = self.parser.parse("【高清影视之家发布 www.hdbthd.com】某电影", "[某电影].mkv")
+        self.assertIsNone(info)
+        self.assertEqual(confidence, 0.0)
+
+    def test_number_in_title_is_not_season(self):
+        info, _ = self.parser.parse("Fast and Furious 7 (2015)", "Fast.and.Furious.7.2015.1080p.BluRay.x264.mkv")
+        self.assertEqual(info["type"], "movie")
+        self.assertEqual(info["year"], "2015")
+        self.assertEqual(info["english_title"], "Fast and Furious 7")
+
+        info, _ = self.parser.parse("Pegasus 2 (2024)", "Pegasus.2.2024.2160p.WEB-DL.mkv")
+        self.assertEqual(info["type"], "movie")
+
+    def test_bracketed_year_preferred_and_ambiguous_year_below_threshold(self):
+        info, confidence = self.parser.parse("Blade Runner 2049 (2017)", "Blade.Runner.2049.2017.2160p.BluRay.mkv")
+        self.assertEqual(info["year"], "2017")
+        self.assertEqual(info["english_title"], "Blade Runner 2049")
+        self.assertLess(confidence, 0.8)
+
+    def test_season_folder_detection(self):
+        for name in ("S01", "Season 2", "season 01", "第一季", "Show S02"):
+            self.assertTrue(is_season_folder(name), name)
+        for name in ("Fast and Furious 7", "Pegasus 2", "Movies 2023"):
+            self.assertFalse(is_season_folder(name), name)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from app.plugins.cloudstrmai import CloudStrmAI
+from app.plugins.cloudstrmai.plan import read_plan
+
+
+class PlanBusyDirTest(unittest.TestCase):
+    """源目录正在运行其他任务时，试运行和应用计划等待其完成，不合并到后续运行"""
+
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        root = self._dir.name
+        self.source, self.dest, self.data = (os.path.join(root, name) for name in ("src", "dst", "data"))
+        os.makedirs(self.data)
+        for relative in ("Movie.2020/Movie.2020.1080p.mkv", "Other.2021/Other.2021.1080p.mkv"):
+            path = os.path.join(self.source, relative)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            Path(path).write_text("x")
+        self.plan_file = os.path.join(self.data, "cloudstrmai_plan.jsonl")
+
+        self.plugin = CloudStrmAI()
+        patches = [mock.patch.object(CloudStrmAI, "get_data_path", return_value=self.data),
+                   mock.patch.object(CloudStrmAI, "get_data", return_value=None),
+                   mock.patch.object(CloudStrmAI, "save_data"),
+                   mock.patch.object(CloudStrmAI, "update_config")]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        self.plugin.stop_service()
+        self._dir.cleanup()
+
+    def _init(self, **config):
+        self.plugin.init_plugin({"enabled": True, "monitor_confs": f"{self.source}#{self.dest}#/media/lib",
+                                 **config})
+
+    def _while_busy(self, func):
+        """源目录被另一个任务占用时运行func，返回占用期间func是否已返回"""
+        release, started = threading.Event(), threading.Event()
+
+        def _busy():
+            started.set()
+            release.wait()
+
+        busy = threading.Thread(target=self.plugin._coordinator.submit, args=(self.source, "scan", _busy))
+        busy.start()
+        started.wait()
+        worker = threading.Thread(target=func)
+        worker.start()
+        worker.join(timeout=2)
+        returned = not worker.is_alive()
+        release.set()
+        worker.join(timeout=30)
+        busy.join(timeout=30)
+        return returned
+
+    def test_plan_and_apply_wait_for_busy_dir(self):
+        self._init(plan_mode=True)
+        self.assertFalse(self._while_busy(self.plugin.scan))
+        files = [record for record in read_plan(self.plan_file) if record.get("type") == "file"]
+        self.assertEqual(len(files), 2)
+        self.assertFalse(os.path.exists(f"{self.plan_file}.tmp"))
+
+        self._init(apply_plan=True)
+        self.assertFalse(self._while_busy(self.plugin.scan))
+        self.assertTrue(os.path.exists(f"{self.plan_file}.applied"))
+        for record in files:
+            self.assertTrue(os.path.exists(record["target"]))
+
+    def test_stop_while_waiting_discards_plan(self):
+        self._init(plan_mode=True)
+        release, started = threading.Event(), threading.Event()
+
+        def _busy():
+            started.set()
+            release.wait()
+
+        busy = threading.Thread(target=self.plugin._coordinator.submit, args=(self.source, "scan", _busy))
+        busy.start()
+        started.wait()
+        worker = threading.Thread(target=self.plugin.scan)
+        worker.start()
+        time.sleep(0.5)
+        self.plugin._stop_event.set()
+        worker.join(timeout=30)
+        release.set()
+        busy.join(timeout=30)
+        self.assertFalse(worker.is_alive())
+        self.assertFalse(os.path.exists(self.plan_file))
+        self.assertFalse(os.path.exists(f"{self.plan_file}.tmp"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from app.plugins.cloudstrmai import CloudStrmAI
+from app.plugins.cloudstrmai.backend import ChatBackend
+
+
+class BreakerRetryTest(unittest.TestCase):
+    """后端均已熔断时未发出请求，重试队列不计入失败次数"""
+
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        root = self._dir.name
+        self.source, self.dest, self.data = (os.path.join(root, name) for name in ("src", "dst", "data"))
+        os.makedirs(self.data)
+        self.folder = os.path.join(self.source, "Random Folder")
+        os.makedirs(self.folder)
+        Path(os.path.join(self.folder, "clip01.mkv")).write_text("x")
+
+        self.plugin = CloudStrmAI()
+        patches = [mock.patch.object(CloudStrmAI, "get_data_path", return_value=self.data),
+                   mock.patch.object(CloudStrmAI, "get_data", return_value=None),
+                   mock.patch.object(CloudStrmAI, "save_data"),
+                   mock.patch.object(CloudStrmAI, "update_config")]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.plugin.init_plugin({"enabled": True, "monitor_confs": f"{self.source}#{self.dest}#/media/lib",
+                                 "enable_ai_naming": True, "deepseek_api_key": "sk-test"})
+
+    def tearDown(self):
+        self.plugin.stop_service()
+        self._dir.cleanup()
+
+    def _attempts(self):
+        row = self.plugin._catalog._conn.execute("SELECT attempts FROM retries WHERE folder = ?",
+                                                 (self.folder,)).fetchone()
+        return row[0] if row else None
+
+    def _retry(self):
+        self.plugin._catalog._conn.execute("UPDATE retries SET next_at = 0")
+        self.plugin.scan()
+
+    def test_open_breaker_does_not_count_attempts(self):
+        with mock.patch.object(ChatBackend, "allow", return_value=False), \
+                mock.patch.object(ChatBackend, "chat", side_effect=AssertionError("API不应被调用")):
+            self.plugin.scan()
+            self.assertEqual(self._attempts(), 0)
+            self._retry()
+            self.assertEqual(self._attempts(), 0)
+
+        with mock.patch.object(ChatBackend, "chat", return_value=None) as chat:
+            self._retry()
+        chat.assert_called()
+        self.assertEqual(self._attempts(), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
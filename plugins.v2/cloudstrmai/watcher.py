@@ -0,0 +1,139 @@
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from watchdog.events import FileSystemEvent, FileSystemEventHandler
+from watchdog.observers import Observer
+
+from app.log import logger
+
+
+class _FolderEventHandler(FileSystemEventHandler):
+    """将文件事件转换为所在文件夹"""
+
+    def __init__(self, watcher: "FolderWatcher", source_dir: str):
+        super().__init__()
+        self._watcher = watcher
+        self._source_dir = source_dir
+
+    def _touch(self, path: str, is_directory: bool):
+        if not path:
+            return
+        # 新建或移入的目录整体处理，文件按所在文件夹处理
+        folder = path if is_directory else os.path.dirname(path)
+        self._watcher.touch(self._source_dir, folder)
+
+    def on_created(self, event: FileSystemEvent):
+        self._touch(event.src_path, event.is_directory)
+
+    def on_moved(self, event: FileSystemEvent):
+        self._touch(event.dest_path, event.is_directory)
+
+    def on_modified(self, event: FileSystemEvent):
+        if not event.is_directory:
+            self._touch(event.src_path, False)
+
+
+class FolderWatcher:
+    """监控源目录变化
+
+    同一文件夹的事件合并，安静debounce秒后才回调，避免文件仍在写入时处理。
+    FUSE/rclone等网络挂载注册监控成功但不产生事件，源目录超过poll_interval秒没有事件时回调poll轮询一次。
+    """
+
+    def __init__(self, callback: Callable[[str, List[str]], None], debounce: float = 10,
+                 poll: Callable[[str], None] = None, poll_interval: float = 1800):
+        """
+        Args:
+            callback: 回调(源目录, 需要处理的文件夹列表)
+            debounce: 文件夹无新事件的等待秒数
+            poll: 轮询回调(源目录)，在单独的线程中运行
+            poll_interval: 源目录无事件多少秒后轮询，0为不轮询
+        """
+        self._callback = callback
+        self._debounce = max(float(debounce or 0), 1)
+        self._poll = poll
+        self._poll_interval = float(poll_interval or 0)
+        # 源目录 -> 最后一次事件或轮询的时间
+        self._last_activity: Dict[str, float] = {}
+        self._observer = Observer(timeout=1)
+        self._lock = threading.Lock()
+        # 源目录 -> {文件夹: 最后事件时间}
+        self._pending: Dict[str, Dict[str, float]] = {}
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def watch(self, source_dir: str) -> bool:
+        """添加监控目录，不支持文件系统通知时返回False"""
+        try:
+            self._observer.schedule(_FolderEventHandler(self, source_dir), source_dir, recursive=True)
+            with self._lock:
+                self._last_activity[source_dir] = time.monotonic()
+            return True
+        except Exception as e:
+            logger.warning(f"[CloudStrmAI] 目录不支持实时监控，仅定时扫描: {source_dir} {str(e)}")
+            return False
+
+    def touch(self, source_dir: str, folder: str):
+        with self._lock:
+            now = time.monotonic()
+            self._pending.setdefault(source_dir, {})[folder] = now
+            self._last_activity[source_dir] = now
+
+    def start(self):
+        self._observer.start()
+        self._thread = threading.Thread(target=self._run, name="CloudStrmAI-Watch", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        try:
+            self._observer.stop()
+            self._observer.join(timeout=5)
+        except Exception as e:
+            logger.error(f"[CloudStrmAI] 停止目录监控失败: {str(e)}")
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def _run(self):
+        while not self._stop_event.wait(1):
+            for source_dir, folders in self._collect().items():
+                try:
+                    self._callback(source_dir, folders)
+                except Exception as e:
+                    logger.error(f"[CloudStrmAI] 处理目录变化失败: {str(e)}")
+            for source_dir in self._idle():
+                threading.Thread(target=self._run_poll, args=(source_dir,), name="CloudStrmAI-Poll",
+                                 daemon=True).start()
+
+    def _run_poll(self, source_dir: str):
+        try:
+            self._poll(source_dir)
+        except Exception as e:
+            logger.error(f"[CloudStrmAI] 轮询扫描失败: {source_dir} {str(e)}")
+
+    def _idle(self) -> List[str]:
+        """取出超过poll_interval秒没有事件的源目录，并重新计时"""
+        if not self._poll or self._poll_interval <= 0:
+            return []
+        now = time.monotonic()
+        idle = []
+        with self._lock:
+            for source_dir, last_activity in self._last_activity.items():
+                if now - last_activity >= self._poll_interval:
+                    idle.append(source_dir)
+                    self._last_activity[source_dir] = now
+        return idle
+
+    def _collect(self) -> Dict[str, List[str]]:
+        """取出已安静超过debounce秒的文件夹"""
+        now = time.monotonic()
+        ready: Dict[str, List[str]] = {}
+        with self._lock:
+            for source_dir, folders in self._pending.items():
+                for folder, last_event in list(folders.items()):
+                    if now - last_event >= self._debounce:
+                        ready.setdefault(source_dir, []).append(folder)
+                        del folders[folder]
+        return ready